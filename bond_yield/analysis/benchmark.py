@@ -0,0 +1,345 @@
+import argparse
+import gc
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bond_yield.analysis.cross_validator import CrossValidator, CrossValidatorBySlope
+from bond_yield.data_processing.loader import load_bond_yields
+from bond_yield.data_processing.rating_converter_by_slopes import (AbsoluteDifferenceStrategy,
+                                                                  SlopeMinimizingRatingConverter)
+from bond_yield.data_processing.synthetic import generate_yield_cube, make_rating_labels, write_synthetic_csv
+from bond_yield.data_processing.yield_cube import csv_to_cube
+from bond_yield.interpolators.interpolate_bond_yields import MatrixInterpolator
+from bond_yield.interpolators.linear import LinearInterpolator
+from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+
+DEFAULT_GRID_SIZES = (5, 10, 20)
+DEFAULT_HISTORY_LENGTHS = (30, 250, 1000)
+DEFAULT_CV_DATES = (5, 20)
+DEFAULT_REPEAT = 3
+
+
+def make_history(n_dates, n_ratings, n_tenors, missing_fraction=0.2, seed=0):
+    """
+    Build a per-date dictionary of synthetic surfaces in the `load_bond_yields` layout, with
+    the ratings in credit order and replaced by their credit ranks 1..n_ratings so any
+    interpolator can fit them.
+    """
+    cube = generate_yield_cube(n_dates=n_dates, n_ratings=n_ratings, n_tenors=n_tenors,
+                               missing_fraction=missing_fraction, seed=seed)
+    history = {}
+    for position, date in enumerate(cube.dates):
+        df = cube.frame_at(position).loc[make_rating_labels(n_ratings)]
+        df.index = np.arange(1, n_ratings + 1, dtype=float)
+        history[date] = df
+    return history
+
+
+def make_surface(n_ratings, n_tenors, missing_fraction=0.2, seed=0):
+    """
+    Build one synthetic surface indexed by credit ranks with tenors in days as columns.
+    """
+    return next(iter(make_history(1, n_ratings, n_tenors, missing_fraction, seed).values()))
+
+
+def _observed_points(df):
+    mask = ~np.isnan(df.to_numpy())
+    rating_grid, tenor_grid = np.meshgrid(df.index.to_numpy(dtype=float), df.columns.to_numpy(dtype=float),
+                                          indexing='ij')
+    X = np.column_stack([rating_grid[mask], tenor_grid[mask]])
+    return X, df.to_numpy()[mask]
+
+
+def _grid_points(df):
+    rating_grid, tenor_grid = np.meshgrid(df.index.to_numpy(dtype=float), df.columns.to_numpy(dtype=float),
+                                          indexing='ij')
+    return np.column_stack([rating_grid.ravel(), tenor_grid.ravel()])
+
+
+class Benchmark:
+    """
+    A named benchmark: `setup(params)` builds fresh untimed state, `run(state)` is timed.
+    """
+
+    def __init__(self, name, setup, run, scale, teardown=None):
+        """
+        Parameters:
+        - name: str, Benchmark name.
+        - setup: callable, params dict -> state.
+        - run: callable, state -> None; the timed part.
+        - scale: str, Which suite axis the benchmark is scaled over: 'grid', 'history' or 'cv'.
+        - teardown: callable, optional, state -> None; releases what setup created.
+        """
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.scale = scale
+        self.teardown = teardown or (lambda state: None)
+
+
+def _fit_setup(interpolator_class):
+    def setup(params):
+        df = make_surface(params['n_ratings'], params['n_tenors'])
+        X, y = _observed_points(df)
+        return interpolator_class(), X, y
+    return setup
+
+
+def _interpolate_setup(interpolator_class):
+    def setup(params):
+        interpolator, X, y = _fit_setup(interpolator_class)(params)
+        interpolator.fit(X, y)
+        return interpolator, _grid_points(make_surface(params['n_ratings'], params['n_tenors']))
+    return setup
+
+
+def _slope_setup(params):
+    df = make_surface(params['n_ratings'], params['n_tenors'])
+    initial = {rating: (i + 1) / len(df.index) for i, rating in enumerate(df.index)}
+    return SlopeMinimizingRatingConverter(initial, AbsoluteDifferenceStrategy(df))
+
+
+def _cv_setup(params):
+    return make_history(params['n_dates'], params['n_ratings'], params['n_tenors'], missing_fraction=0.0)
+
+
+def _slope_cv_setup(params):
+    history = {}
+    for date, df in _cv_setup(params).items():
+        df.index = [f'R{int(rating)}' for rating in df.index]
+        history[date] = df
+    ratings = list(next(iter(history.values())).index)
+    initial = {rating: (i + 1) / len(ratings) for i, rating in enumerate(ratings)}
+    return history, SlopeMinimizingRatingConverter(initial, AbsoluteDifferenceStrategy())
+
+
+def _csv_setup(params):
+    directory = tempfile.mkdtemp(prefix='bond_yield_bench_')
+    csv_path = Path(directory) / 'history.csv'
+    write_synthetic_csv(csv_path, n_dates=params['n_dates'], n_ratings=params['n_ratings'],
+                        n_tenors=params['n_tenors'], seed=0)
+    return csv_path
+
+
+def _cube_setup(params):
+    csv_path = _csv_setup(params)
+    cube_path = csv_path.parent / 'cube'
+    csv_to_cube(csv_path, cube_path)
+    return cube_path
+
+
+def _remove_parent_directory(path):
+    shutil.rmtree(Path(path).parent, ignore_errors=True)
+
+
+BENCHMARKS = [
+    Benchmark('tps_fit', _fit_setup(ThinPlateSplineInterpolator),
+              lambda state: state[0].fit(state[1], state[2]), 'grid'),
+    Benchmark('tps_interpolate', _interpolate_setup(ThinPlateSplineInterpolator),
+              lambda state: state[0].interpolate(state[1]), 'grid'),
+    Benchmark('linear_fit', _fit_setup(LinearInterpolator),
+              lambda state: state[0].fit(state[1], state[2]), 'grid'),
+    Benchmark('linear_interpolate', _interpolate_setup(LinearInterpolator),
+              lambda state: state[0].interpolate(state[1]), 'grid'),
+    Benchmark('matrix_fit_interpolate_tps',
+              lambda params: make_surface(params['n_ratings'], params['n_tenors']),
+              lambda df: MatrixInterpolator(ThinPlateSplineInterpolator()).fit_interpolate(df), 'grid'),
+    Benchmark('slope_optimize_ratings', _slope_setup,
+              lambda converter: converter.optimize_ratings(), 'grid'),
+    Benchmark('cross_validator_linear', _cv_setup,
+              lambda history: CrossValidator(LinearInterpolator, history).perform_cross_validation(), 'cv'),
+    Benchmark('cross_validator_tps', _cv_setup,
+              lambda history: CrossValidator(ThinPlateSplineInterpolator, history).perform_cross_validation(), 'cv'),
+    Benchmark('cross_validator_by_slope_tps', _slope_cv_setup,
+              lambda state: CrossValidatorBySlope(ThinPlateSplineInterpolator, state[0],
+                                                  state[1]).perform_cross_validation(), 'cv'),
+    Benchmark('load_bond_yields_csv', _csv_setup, load_bond_yields, 'history', _remove_parent_directory),
+    Benchmark('load_bond_yields_cube', _cube_setup, load_bond_yields, 'history', _remove_parent_directory),
+]
+
+
+def suite_cases(grid_sizes=DEFAULT_GRID_SIZES, history_lengths=DEFAULT_HISTORY_LENGTHS, cv_dates=DEFAULT_CV_DATES,
+                cv_grid_size=5, history_grid_size=10):
+    """
+    Expand the suite axes into (benchmark, params) cases.
+    """
+    cases = []
+    for benchmark in BENCHMARKS:
+        if benchmark.scale == 'grid':
+            params_list = [{'n_ratings': size, 'n_tenors': size} for size in grid_sizes]
+        elif benchmark.scale == 'history':
+            params_list = [{'n_dates': n, 'n_ratings': history_grid_size, 'n_tenors': history_grid_size}
+                           for n in history_lengths]
+        else:
+            params_list = [{'n_dates': n, 'n_ratings': cv_grid_size, 'n_tenors': cv_grid_size} for n in cv_dates]
+        cases.extend((benchmark, params) for params in params_list)
+    return cases
+
+
+def measure(benchmark, params, repeat=DEFAULT_REPEAT):
+    """
+    Time a benchmark case and record its peak traced memory.
+
+    The wall time is the best of `repeat` runs without tracing; peak memory comes from one
+    extra run under `tracemalloc`, which also sees numpy's allocations.
+
+    Returns:
+    - dict: Result record with wall times and peak memory in bytes.
+    """
+    times = []
+    for _ in range(repeat):
+        state = benchmark.setup(params)
+        gc.collect()
+        start = time.perf_counter()
+        try:
+            benchmark.run(state)
+            times.append(time.perf_counter() - start)
+        finally:
+            benchmark.teardown(state)
+
+    state = benchmark.setup(params)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        benchmark.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        benchmark.teardown(state)
+
+    return {
+        'name': benchmark.name,
+        'params': params,
+        'wall_seconds': min(times),
+        'wall_seconds_all': times,
+        'peak_memory_bytes': int(peak),
+    }
+
+
+def run_suite(names=None, repeat=DEFAULT_REPEAT, progress=True, **axes):
+    """
+    Run the benchmark suite.
+
+    Parameters:
+    - names: list of str, optional, Only run these benchmarks.
+    - repeat: int, Timed runs per case.
+    - progress: bool, Print each result as it completes.
+    - axes: Passed to `suite_cases` (grid_sizes, history_lengths, cv_dates, ...).
+
+    Returns:
+    - dict: {'metadata': ..., 'results': [...]}, ready for `save_results`.
+    """
+    results = []
+    for benchmark, params in suite_cases(**axes):
+        if names and benchmark.name not in names:
+            continue
+        record = measure(benchmark, params, repeat)
+        results.append(record)
+        if progress:
+            print(f"{benchmark.name:32s} {_format_params(params):28s} "
+                  f"{record['wall_seconds']:10.4f}s {record['peak_memory_bytes'] / 2 ** 20:10.2f} MiB")
+
+    return {
+        'metadata': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def _format_params(params):
+    return ','.join(f'{key}={value}' for key, value in sorted(params.items()))
+
+
+def save_results(results, path):
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2)
+
+
+def load_results(path):
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def compare_results(baseline, candidate, threshold=1.2):
+    """
+    Compare two suite runs case by case.
+
+    Parameters:
+    - baseline: dict, Results of `run_suite` (or `load_results`).
+    - candidate: dict, Results to compare against the baseline.
+    - threshold: float, Time or memory ratio above which a case counts as a regression.
+
+    Returns:
+    - list of dict: One row per case present in both runs with time and memory ratios.
+    """
+    baseline_by_case = {(r['name'], _format_params(r['params'])): r for r in baseline['results']}
+    rows = []
+    for record in candidate['results']:
+        key = (record['name'], _format_params(record['params']))
+        if key not in baseline_by_case:
+            continue
+        reference = baseline_by_case[key]
+        time_ratio = record['wall_seconds'] / max(reference['wall_seconds'], 1e-12)
+        memory_ratio = record['peak_memory_bytes'] / max(reference['peak_memory_bytes'], 1)
+        rows.append({
+            'name': key[0],
+            'params': key[1],
+            'baseline_seconds': reference['wall_seconds'],
+            'candidate_seconds': record['wall_seconds'],
+            'time_ratio': time_ratio,
+            'memory_ratio': memory_ratio,
+            'regression': time_ratio > threshold or memory_ratio > threshold,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the interpolators, converters, cross-validators and loaders.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Run the suite and save the results as JSON.')
+    run.add_argument('output', help='Where to write the JSON results.')
+    run.add_argument('--only', nargs='*', help='Benchmark names to run.')
+    run.add_argument('--grid-sizes', nargs='*', type=int, default=list(DEFAULT_GRID_SIZES))
+    run.add_argument('--history-lengths', nargs='*', type=int, default=list(DEFAULT_HISTORY_LENGTHS))
+    run.add_argument('--cv-dates', nargs='*', type=int, default=list(DEFAULT_CV_DATES))
+    run.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+
+    compare = commands.add_parser('compare', help='Compare two saved runs.')
+    compare.add_argument('baseline')
+    compare.add_argument('candidate')
+    compare.add_argument('--threshold', type=float, default=1.2)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        results = run_suite(names=args.only, repeat=args.repeat, grid_sizes=args.grid_sizes,
+                            history_lengths=args.history_lengths, cv_dates=args.cv_dates)
+        save_results(results, args.output)
+        return 0
+
+    rows = compare_results(load_results(args.baseline), load_results(args.candidate), args.threshold)
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['name']:32s} {row['params']:28s} {row['baseline_seconds']:10.4f}s -> "
+              f"{row['candidate_seconds']:10.4f}s  x{row['time_ratio']:.2f} time  x{row['memory_ratio']:.2f} memory{flag}")
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
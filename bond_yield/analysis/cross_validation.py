@@ -1,9 +1,11 @@
 
+from bond_yield.utils.date_frames import iter_date_frames
 from bond_yield.interpolators.baseInterpolator import BaseInterpolator
+from bond_yield.utils.profiling import count, span
 
 import numpy as np
-from sklearn.model_selection import KFold
-from sklearn.metrics import mean_squared_error
+
+from bond_yield.analysis.splits import grid_observations, kfold_split, mean_squared_error
 
 
 def cross_validate_single_dataframe(df, interpolator_class, n_splits=5, random_state=42):
@@ -19,25 +21,20 @@ def cross_validate_single_dataframe(df, interpolator_class, n_splits=5, random_s
     Returns:
     - tuple: (Mean squared error from cross-validation, number of samples).
     """
-    kf = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
 
     mse_metrics = []
 
-    X, y = [], []
-    for tenor in df.columns:
-        for rating in df.index:
-            X.append([rating, tenor])
-            y.append(df.loc[rating, tenor])
-    X = np.array(X)
-    y = np.array(y)
+    X, y = grid_observations(df)
 
-    for train_index, test_index in kf.split(X):
+    for train_index, test_index in kfold_split(len(X), n_splits, shuffle=True, random_state=random_state):
         X_train, X_test = X[train_index], X[test_index]
         y_train, y_test = y[train_index], y[test_index]
 
-        interpolator = interpolator_class()
-        interpolator.fit(X_train, y_train)
-        y_pred = interpolator.interpolate(X_test)
+        with span('cv.fold', train=len(y_train), test=len(y_test)):
+            interpolator = interpolator_class()
+            interpolator.fit(X_train, y_train)
+            y_pred = interpolator.interpolate(X_test)
+        count('cv.folds')
         mse = mean_squared_error(y_test, y_pred)
         mse_metrics.append(mse)
 
@@ -50,7 +47,8 @@ def perform_cross_validation(interpolator_class, date_dataframes, n_splits=5, ra
 
     Parameters:
     - interpolator_class: Class inheriting from BaseInterpolator.
-    - date_dataframes: Dictionary of date keys and DataFrame values for cross-validation.
+    - date_dataframes: Dictionary of date keys and DataFrame values for cross-validation,
+      or a lazy iterable of (date, DataFrame) pairs such as `iter_bond_yields`.
     - n_splits: Number of folds for k-fold cross-validation.
     - random_state: Seed for reproducible random splits.
 
@@ -60,8 +58,9 @@ def perform_cross_validation(interpolator_class, date_dataframes, n_splits=5, ra
     total_mse = 0
     total_samples = 0
 
-    for date, df in date_dataframes.items():
-        mse, samples = cross_validate_single_dataframe(df, interpolator_class, n_splits, random_state)
+    for date, df in iter_date_frames(date_dataframes):
+        with span('cv.date'):
+            mse, samples = cross_validate_single_dataframe(df, interpolator_class, n_splits, random_state)
         total_mse += mse * samples
         total_samples += samples
 
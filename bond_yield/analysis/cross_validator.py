@@ -1,6 +1,8 @@
 import numpy as np
-from sklearn.model_selection import KFold
-from sklearn.metrics import mean_squared_error
+
+from bond_yield.analysis.splits import grid_observations, kfold_split, mean_squared_error
+from bond_yield.utils.date_frames import iter_date_frames
+from bond_yield.utils.profiling import count, span
 
 class BaseCrossValidator:
     def __init__(self, interpolator_class, date_dataframes, n_splits=5, random_state=42):
@@ -10,41 +12,45 @@ class BaseCrossValidator:
         self.random_state = random_state
 
     def prepare_dataframes(self):
+        """
+        Prepare every DataFrame up front. Only possible when `date_dataframes` is a dict.
+        """
+        for date, df in self.date_dataframes.items():
+            self.prepare_dataframe(df, date)
+
+    def prepare_dataframe(self, df, date=None):
         # Default implementation does nothing.
-        pass
+        return df
 
     def cross_validate_single_dataframe(self, df):
-        kf = KFold(n_splits=self.n_splits, shuffle=True, random_state=self.random_state)
         mse_metrics = []
 
-        X, y = [], []
-        for tenor in df.columns:
-            for rating in df.index:
-                X.append([rating, tenor])
-                y.append(df.loc[rating, tenor])
-        X = np.array(X)
-        y = np.array(y)
+        X, y = grid_observations(df)
 
-        for train_index, test_index in kf.split(X):
+        for train_index, test_index in kfold_split(len(X), self.n_splits, shuffle=True, random_state=self.random_state):
             X_train, X_test = X[train_index], X[test_index]
             y_train, y_test = y[train_index], y[test_index]
 
-            interpolator = self.interpolator_class()
-            interpolator.fit(X_train, y_train)
-            y_pred = interpolator.interpolate(X_test)
+            with span('cv.fold', train=len(y_train), test=len(y_test)):
+                interpolator = self.interpolator_class()
+                interpolator.fit(X_train, y_train)
+                y_pred = interpolator.interpolate(X_test)
+            count('cv.folds')
             mse = mean_squared_error(y_test, y_pred)
             mse_metrics.append(mse)
 
         return np.mean(mse_metrics), len(y)
 
     def perform_cross_validation(self):
-        self.prepare_dataframes()
-
         total_mse = 0
         total_samples = 0
 
-        for date, df in self.date_dataframes.items():
-            mse, samples = self.cross_validate_single_dataframe(df)
+        # Dates are prepared one at a time so that lazy sources are consumed as they are read
+        for date, df in iter_date_frames(self.date_dataframes):
+            with span('cv.prepare'):
+                df = self.prepare_dataframe(df, date)
+            with span('cv.date'):
+                mse, samples = self.cross_validate_single_dataframe(df)
             total_mse += mse * samples
             total_samples += samples
 
@@ -56,19 +62,33 @@ class BaseCrossValidator:
             raise ValueError("No data available for cross-validation.")
 
 class CrossValidator(BaseCrossValidator):
-    def prepare_dataframes(self):
+    def prepare_dataframe(self, df, date=None):
         # Implement specific logic if necessary.
-        pass
+        return df
 
 class CrossValidatorBySlope(BaseCrossValidator):
     def __init__(self, interpolator_class, date_dataframes, rating_converter, n_splits=5, random_state=42):
         super().__init__(interpolator_class, date_dataframes, n_splits, random_state)
         self.rating_converter = rating_converter
 
-    def prepare_dataframes(self):
-        for date, df in self.date_dataframes.items():
-            self.rating_converter.strategy.bond_yield_df = df
-            self.rating_converter.optimize_ratings()
-            scale = self.rating_converter.get_rating_scale()
-            df.index = df.index.map(lambda x: scale.get(x, 0))
+    def prepare_dataframe(self, df, date=None):
+        self.rating_converter.strategy.bond_yield_df = df
+        self.rating_converter.optimize_ratings()
+        df.index = self.rating_converter.scale.map_index(df.index, default=0)
+        return df
+
+class CrossValidatorByRollingScale(BaseCrossValidator):
+    def __init__(self, interpolator_class, date_dataframes, rating_converter, n_splits=5, random_state=42):
+        """
+        Cross-validate on the rating scales of a RollingYieldRatingConverter, computed for the
+        whole history up front instead of one converter per date.
+
+        Parameters:
+        - rating_converter: RollingYieldRatingConverter, Covering every date of `date_dataframes`.
+        """
+        super().__init__(interpolator_class, date_dataframes, n_splits, random_state)
+        self.rating_converter = rating_converter
 
+    def prepare_dataframe(self, df, date=None):
+        df.index = self.rating_converter.scale_at(date).map_index(df.index)
+        return df
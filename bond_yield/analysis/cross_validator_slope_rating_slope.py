@@ -1,6 +1,9 @@
 import numpy as np
-from sklearn.model_selection import KFold
-from sklearn.metrics import mean_squared_error
+
+from bond_yield.analysis.splits import grid_observations, kfold_split, mean_squared_error
+from bond_yield.data_processing.encoding import KEEP_LABEL
+from bond_yield.utils.date_frames import iter_date_frames
+from bond_yield.utils.profiling import count, span
 
 class SlopeBasedCrossValidator:
     def __init__(self, interpolator_class, date_dataframes, rating_converter, n_splits=5, random_state=42):
@@ -9,7 +12,8 @@ class SlopeBasedCrossValidator:
 
         Parameters:
         - interpolator_class (class): A class inheriting from BaseInterpolator.
-        - date_dataframes (dict): Dictionary with dates as keys and bond yield DataFrames as values.
+        - date_dataframes (dict or iterable): Dictionary with dates as keys and bond yield DataFrames as values,
+          or a lazy iterable of (date, DataFrame) pairs such as `iter_bond_yields`.
         - rating_converter (SlopeMinimizingRatingConverter): An instance pre-configured with a strategy.
         - n_splits (int): Number of folds for k-fold cross-validation.
         - random_state (int): Seed for reproducible random splits.
@@ -23,15 +27,28 @@ class SlopeBasedCrossValidator:
     def prepare_dataframes(self):
         """
         Prepare the dataframes by optimizing the rating scales for each date-specific DataFrame.
+        Only possible when `date_dataframes` is a dict.
         """
         for date, df in self.date_dataframes.items():
-            # Set the DataFrame for the current date in the strategy
-            self.rating_converter.strategy.bond_yield_df = df
-            # Optimize ratings based on current DataFrame
-            self.rating_converter.optimize_ratings()
-            # Apply the optimized ratings to transform the DataFrame's index
-            optimized_scales = self.rating_converter.get_rating_scale()
-            df.index = df.index.map(lambda x: optimized_scales.get(x, x))  # Default to original if not found
+            self.prepare_dataframe(df)
+
+    def prepare_dataframe(self, df):
+        """
+        Optimize the rating scale of a single DataFrame and apply it to its index.
+
+        Parameters:
+        - df (DataFrame): Bond yields of one date, indexed by rating labels.
+
+        Returns:
+        - DataFrame: The same DataFrame, re-indexed by the optimized rating values.
+        """
+        # Set the DataFrame for the current date in the strategy
+        self.rating_converter.strategy.bond_yield_df = df
+        # Optimize ratings based on current DataFrame
+        self.rating_converter.optimize_ratings()
+        # Apply the optimized ratings to transform the DataFrame's index
+        df.index = self.rating_converter.scale.map_index(df.index, default=KEEP_LABEL)  # Default to original if not found
+        return df
 
     def cross_validate_single_dataframe(self, df):
         """
@@ -43,24 +60,19 @@ class SlopeBasedCrossValidator:
         Returns:
         - tuple: (Mean squared error from cross-validation, number of samples).
         """
-        kf = KFold(n_splits=self.n_splits, shuffle=True, random_state=self.random_state)
         mse_metrics = []
 
-        X, y = [], []
-        for tenor in df.columns:
-            for rating in df.index:
-                X.append([rating, tenor])
-                y.append(df.loc[rating, tenor])
-        X = np.array(X)
-        y = np.array(y)
+        X, y = grid_observations(df)
 
-        for train_index, test_index in kf.split(X):
+        for train_index, test_index in kfold_split(len(X), self.n_splits, shuffle=True, random_state=self.random_state):
             X_train, X_test = X[train_index], X[test_index]
             y_train, y_test = y[train_index], y[test_index]
 
-            interpolator = self.interpolator_class()
-            interpolator.fit(X_train, y_train)
-            y_pred = interpolator.interpolate(X_test)
+            with span('cv.fold', train=len(y_train), test=len(y_test)):
+                interpolator = self.interpolator_class()
+                interpolator.fit(X_train, y_train)
+                y_pred = interpolator.interpolate(X_test)
+            count('cv.folds')
             mse = mean_squared_error(y_test, y_pred)
             mse_metrics.append(mse)
 
@@ -73,13 +85,15 @@ class SlopeBasedCrossValidator:
         Returns:
         - float: Weighted mean squared error averaged over all dates.
         """
-        self.prepare_dataframes()  # Prepare dataframes by optimizing the ratings
-
         total_mse = 0
         total_samples = 0
 
-        for date, df in self.date_dataframes.items():
-            mse, samples = self.cross_validate_single_dataframe(df)
+        # Dates are prepared one at a time so that lazy sources are consumed as they are read
+        for date, df in iter_date_frames(self.date_dataframes):
+            with span('cv.prepare'):
+                df = self.prepare_dataframe(df)  # Optimize the ratings of this date
+            with span('cv.date'):
+                mse, samples = self.cross_validate_single_dataframe(df)
             total_mse += mse * samples
             total_samples += samples
 
@@ -0,0 +1,178 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from bond_yield.data_processing.synthetic import credit_rating_map, generate_yield_cube
+from bond_yield.data_processing.yield_cube import YieldCube
+from bond_yield.interpolators.interpolate_bond_yields import MatrixInterpolator
+from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+from bond_yield.utils.profiling import AggregateRecorder, recording
+
+TENOR_UNITS = {'days': 1, 'years': 365}
+
+
+def history_memory(cube):
+    """
+    Memory footprint of a history in each storage layout, in bytes.
+
+    Parameters:
+    - cube: YieldCube, The history.
+
+    Returns:
+    - dict: Layout name -> bytes for the float64 per-date DataFrames of `load_bond_yields`,
+            the float64 and float32 cubes, and the float32 observations with integer codes.
+    """
+    n_dates, n_ratings, n_tenors = cube.shape
+    frame = cube.frame_at(0, np.float64) if n_dates else None
+    frame_bytes = int(frame.memory_usage(deep=True, index=True).sum()) if frame is not None else 0
+    observations = cube.to_observations(np.float32)
+    return {
+        'dataframes_float64': frame_bytes * n_dates,
+        'cube_float64': n_dates * n_ratings * n_tenors * 8,
+        'cube_float32': n_dates * n_ratings * n_tenors * 4,
+        'observations_float32': int(sum(array.nbytes for array in observations.values())),
+    }
+
+
+def _fill(values, ratings, tenors, dtype, lambda_val):
+    """
+    Fill one date's rating x tenor matrix with the TPS, ratings at their credit ranks `ratings`.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame(values, index=ratings, columns=tenors)
+    interpolator = ThinPlateSplineInterpolator(lambda_val=lambda_val, dtype=dtype)
+    filled = MatrixInterpolator(interpolator).fit_interpolate(df)
+    return filled.to_numpy(dtype=float), interpolator
+
+
+def compare_surfaces(cube, n_dates=20, tenor_unit='years', lambda_val=0.1, seed=0):
+    """
+    Fill sampled dates with the float64 and the float32 TPS and compare them.
+
+    Parameters:
+    - cube: YieldCube, A synthetic history; ratings are placed at their `credit_rating_map` ranks.
+    - n_dates: int, Number of dates sampled without replacement.
+    - tenor_unit: str, 'days' or 'years', unit of the tenor coordinate seen by the TPS. The
+                  kernel is far worse conditioned in days, which defeats single precision.
+    - lambda_val: float, TPS regularization.
+    - seed: int, Seed of the date sample.
+
+    Returns:
+    - dict: Accuracy of the float32 surfaces against float64 (max and RMS absolute error over
+            the filled cells), the share of solves that fell back to float64, the share of
+            dates evaluated with a float32 kernel, peak kernel bytes and fit times per mode.
+    """
+    rng = np.random.default_rng(seed)
+    positions = np.sort(rng.choice(len(cube.dates), size=min(n_dates, len(cube.dates)), replace=False))
+    tenors = np.asarray(cube.tenors, dtype=float) / TENOR_UNITS[tenor_unit]
+    credit_ranks = credit_rating_map(len(cube.ratings))
+    ratings = np.array([credit_ranks[rating] for rating in cube.ratings], dtype=float)
+
+    errors = []
+    seconds = {'float64': 0.0, 'float32': 0.0}
+    kernel_bytes = {'float64': 0, 'float32': 0}
+    fallbacks = 0
+    single_evaluations = 0
+    for position in positions:
+        values = np.asarray(cube.values[position], dtype=float)
+        missing = np.isnan(values)
+        surfaces = {}
+        for name, dtype in (('float64', np.float64), ('float32', np.float32)):
+            started = time.perf_counter()
+            surfaces[name], interpolator = _fill(values.copy(), ratings, tenors, dtype, lambda_val)
+            seconds[name] += time.perf_counter() - started
+            n_points = int((~missing).sum())
+            size = n_points * n_points * np.dtype(dtype).itemsize
+            if interpolator.refined is False:
+                # The fallback assembles the float64 kernel next to the float32 factors
+                size += n_points * n_points * 8
+            kernel_bytes[name] = max(kernel_bytes[name], size)
+        fallbacks += interpolator.refined is False
+        single_evaluations += interpolator.evaluation_dtype == np.float32
+        errors.append(np.abs(surfaces['float32'] - surfaces['float64'])[missing])
+
+    errors = np.concatenate(errors) if errors else np.empty(0)
+    return {
+        'dates': len(positions),
+        'tenor_unit': tenor_unit,
+        'max_abs_error': float(errors.max()) if len(errors) else 0.0,
+        'rms_error': float(np.sqrt(np.mean(errors ** 2))) if len(errors) else 0.0,
+        'fallback_share': fallbacks / max(len(positions), 1),
+        'float32_evaluation_share': single_evaluations / max(len(positions), 1),
+        'kernel_bytes': kernel_bytes,
+        'fit_seconds': seconds,
+    }
+
+
+def precision_report(cube, n_dates=20, tenor_units=('years', 'days'), lambda_val=0.1, seed=0):
+    """
+    Report memory footprint and accuracy of the compact mode against the float64 path.
+
+    Parameters:
+    - cube: YieldCube, The history.
+    - n_dates: int, Dates sampled for the accuracy comparison.
+    - tenor_units: sequence of str, Tenor units compared (see `compare_surfaces`).
+    - lambda_val: float, TPS regularization.
+    - seed: int, Seed of the date sample.
+
+    Returns:
+    - dict: {'shape', 'memory': see `history_memory`, 'accuracy': list of `compare_surfaces` results}.
+    """
+    return {
+        'shape': list(cube.shape),
+        'memory': history_memory(cube),
+        'accuracy': [compare_surfaces(cube, n_dates, unit, lambda_val, seed) for unit in tenor_units],
+    }
+
+
+def format_report(report):
+    """
+    Format a `precision_report` result as plain text.
+    """
+    lines = [f"History of {report['shape'][0]} dates x {report['shape'][1]} ratings x {report['shape'][2]} tenors"]
+    baseline = report['memory']['dataframes_float64']
+    for name, size in report['memory'].items():
+        ratio = size / baseline if baseline else float('nan')
+        lines.append(f"  {name:24s} {size / 2 ** 20:12.3f} MiB  x{ratio:.3f}")
+    for result in report['accuracy']:
+        lines.append(f"TPS float32 vs float64, tenors in {result['tenor_unit']} ({result['dates']} dates)")
+        lines.append(f"  max abs error {result['max_abs_error']:.3e}, rms {result['rms_error']:.3e}")
+        lines.append(f"  float64 fallback share {result['fallback_share']:.0%}, "
+                     f"float32 evaluation share {result['float32_evaluation_share']:.0%}")
+        lines.append(f"  kernel {result['kernel_bytes']['float64'] / 2 ** 20:.3f} MiB -> "
+                     f"{result['kernel_bytes']['float32'] / 2 ** 20:.3f} MiB, fit "
+                     f"{result['fit_seconds']['float64']:.3f}s -> {result['fit_seconds']['float32']:.3f}s")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare memory and accuracy of the compact (float32) mode with float64.')
+    parser.add_argument('source', nargs='?', help='Cube directory; a synthetic history is generated if omitted.')
+    parser.add_argument('--dates', type=int, default=20, help='Dates sampled for the accuracy comparison.')
+    parser.add_argument('--ratings', type=int, default=20, help='Ratings of the synthetic history.')
+    parser.add_argument('--tenors', type=int, default=20, help='Tenors of the synthetic history.')
+    parser.add_argument('--history-length', type=int, default=2500, help='Dates of the synthetic history.')
+    parser.add_argument('--lambda-val', type=float, default=0.1)
+    parser.add_argument('--profile-summary', action='store_true', help='Print per-stage timings at the end.')
+    args = parser.parse_args(argv)
+
+    if args.source:
+        cube = YieldCube.open(args.source)
+    else:
+        cube = generate_yield_cube(n_dates=args.history_length, n_ratings=args.ratings, n_tenors=args.tenors,
+                                   missing_fraction=0.3, seed=0)
+
+    recorder = AggregateRecorder()
+    with recording(recorder):
+        report = precision_report(cube, n_dates=args.dates, lambda_val=args.lambda_val)
+    print(format_report(report))
+    if args.profile_summary:
+        print(recorder.report(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+import argparse
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bond_yield.analysis.tournament import (_evaluate_slice, _init_worker, _leaderboard, evaluate_candidate,
+                                            format_leaderboard, parse_candidate, prepare_history, save_leaderboard)
+from bond_yield.interpolators.registry import available_interpolators, get_interpolator
+from bond_yield.utils.profiling import count, span
+
+
+def _date_scores(results):
+    """
+    Per-date MSE of one candidate, NaN for dates where every fold failed.
+    """
+    return np.array([result['sse'] / result['points'] if result['points'] else np.nan for result in results])
+
+
+def _eliminate(alive, scores, confidence, min_dates):
+    """
+    Split the alive candidates into those whose paired confidence bound on the MSE
+    difference to the leader stays below zero and those that are worse with confidence.
+    """
+    means = {i: np.nanmean(scores[i]) if np.isfinite(scores[i]).any() else np.inf for i in alive}
+    leader = min(alive, key=lambda i: means[i])
+    kept, dropped = [leader], []
+    for i in alive:
+        if i == leader:
+            continue
+        if not np.isfinite(means[i]):
+            dropped.append(i)
+            continue
+        both = np.isfinite(scores[i]) & np.isfinite(scores[leader])
+        differences = scores[i][both] - scores[leader][both]
+        if len(differences) >= max(min_dates, 2):
+            # scipy.stats is slow to import, so it is only loaded once bounds are computed
+            from scipy.stats import t
+            quantile = t.ppf(confidence, len(differences) - 1)
+            lower = differences.mean() - quantile * differences.std(ddof=1) / math.sqrt(len(differences))
+            if lower > 0:
+                dropped.append(i)
+                continue
+        kept.append(i)
+    return sorted(kept, key=lambda i: means[i]), dropped
+
+
+def run_race(date_dataframes, candidates, rating_scale='yield', rating_map=None, n_splits=5, random_state=42,
+             initial_dates=4, growth=2.0, confidence=0.95, eta=None, min_dates=3, workers=1):
+    """
+    Select among interpolator configurations without cross-validating all of them on every date.
+
+    The dates are shuffled once and evaluated in rounds on growing prefixes of that order
+    (`initial_dates`, then `growth` times more each round). After each round a candidate is
+    dropped when the one-sided `confidence` bound (Student's t) on its per-date MSE
+    difference to the leader, paired on the same dates and folds, is above zero; with `eta`
+    only the best 1 / eta of the remaining candidates also go on, as in successive halving. The race ends
+    when one candidate is left or every date has been used, so the compute saved on losing
+    candidates goes to evaluating the survivors on more dates.
+
+    Parameters:
+    - date_dataframes: dict of date -> DataFrame, or an iterable of (date, DataFrame) pairs.
+    - candidates: list of Candidate or str, Configurations; strings are parsed by `parse_candidate`.
+    - rating_scale: str, See `bond_yield.batch.build_rating_scale`.
+    - rating_map: dict, optional, Rating label -> value.
+    - n_splits: int, Number of folds per date.
+    - random_state: int, Seed of the date order and of the fold shuffle.
+    - initial_dates: int, Dates in the first round.
+    - growth: float, Ratio between the dates of consecutive rounds.
+    - confidence: float, One-sided confidence required to drop a candidate.
+    - eta: float, optional, Successive-halving ratio applied after the confidence test.
+    - min_dates: int, Dates a candidate is evaluated on before it can be dropped by the bound.
+    - workers: int, Number of worker processes; 1 runs in this process.
+
+    Returns:
+    - dict: 'leaderboard' (tournament rows with the dates each candidate was evaluated on,
+            its status and the round it was dropped in; survivors first), 'rounds' (dates used,
+            survivors and dropped candidates per round) and 'work' (folds and seconds spent
+            against an exhaustive run).
+    """
+    candidates = [parse_candidate(c) if isinstance(c, str) else c for c in candidates]
+    for candidate in candidates:
+        get_interpolator(candidate.name)
+    if initial_dates < 1 or growth <= 1:
+        raise ValueError(f"Expected initial_dates >= 1 and growth > 1, got {initial_dates} and {growth}.")
+    prepared = prepare_history(date_dataframes, rating_scale, rating_map, n_splits, random_state)
+    if not prepared:
+        raise ValueError("No data available for the race.")
+    order = np.random.RandomState(random_state).permutation(len(prepared))
+    prepared = [prepared[position] for position in order]
+
+    results = [[] for _ in candidates]
+    alive = list(range(len(candidates)))
+    dropped_in = {}
+    rounds = []
+    done = 0
+
+    executor = (ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(prepared,))
+                if workers > 1 else None)
+    try:
+        with span('race.run', candidates=len(candidates), dates=len(prepared)):
+            while len(alive) > 1 and done < len(prepared):
+                stop = min(len(prepared), max(done + 1, int(round(initial_dates * growth ** len(rounds)))))
+                with span('race.round', candidates=len(alive), dates=stop - done):
+                    if executor is None:
+                        new = {i: [evaluate_candidate(candidates[i], [item]) for item in prepared[done:stop]]
+                               for i in alive}
+                    else:
+                        futures = {i: [executor.submit(_evaluate_slice, candidates[i], position, position + 1)
+                                       for position in range(done, stop)] for i in alive}
+                        new = {i: [future.result() for future in futures[i]] for i in alive}
+                for i in alive:
+                    results[i].extend(new[i])
+                done = stop
+
+                scores = {i: _date_scores(results[i]) for i in alive}
+                kept, dropped = _eliminate(alive, scores, confidence, min_dates)
+                if eta and len(kept) > 1:
+                    survivors = max(1, math.ceil(len(alive) / eta))
+                    kept, dropped = kept[:survivors], dropped + kept[survivors:]
+                for i in dropped:
+                    dropped_in[i] = len(rounds)
+                count('race.dropped', len(dropped))
+                rounds.append({'round': len(rounds), 'dates': done,
+                               'survivors': [candidates[i].label for i in kept],
+                               'dropped': [candidates[i].label for i in dropped]})
+                alive = kept
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    keys = ('sse', 'points', 'fit_seconds', 'query_seconds', 'folds', 'failures')
+    totals = [{key: sum(result[key] for result in candidate_results) for key in keys} for candidate_results in results]
+    rows = _leaderboard(candidates, totals)
+    by_label = {candidate.label: i for i, candidate in enumerate(candidates)}
+    for row in rows:
+        i = by_label[row['candidate']]
+        row['dates'] = len(results[i])
+        row['status'] = 'dropped' if i in dropped_in else 'survivor'
+        row['dropped_round'] = dropped_in.get(i)
+    rows.sort(key=lambda row: row['status'] == 'dropped')
+
+    # An exhaustive run evaluates every candidate on every date; its time is extrapolated
+    # from each candidate's mean time per evaluated date.
+    folds_run = sum(total['folds'] + total['failures'] for total in totals)
+    seconds_run = sum(total['fit_seconds'] + total['query_seconds'] for total in totals)
+    seconds_exhaustive = sum((total['fit_seconds'] + total['query_seconds']) / len(candidate_results) * len(prepared)
+                             for total, candidate_results in zip(totals, results) if candidate_results)
+    folds_exhaustive = len(candidates) * n_splits * len(prepared)
+    work = {
+        'dates': len(prepared),
+        'candidate_dates_run': sum(len(candidate_results) for candidate_results in results),
+        'candidate_dates_exhaustive': len(candidates) * len(prepared),
+        'folds_run': folds_run,
+        'folds_exhaustive': folds_exhaustive,
+        'skipped_fraction': 1 - folds_run / folds_exhaustive,
+        'seconds_run': seconds_run,
+        'seconds_exhaustive_estimate': seconds_exhaustive,
+    }
+    return {'leaderboard': rows, 'rounds': rounds, 'work': work}
+
+
+def format_race(result):
+    """
+    Format a race as its leaderboard, the rounds and the work saved.
+    """
+    lines = [format_leaderboard(result['leaderboard']), '']
+    for row in result['leaderboard']:
+        if row['status'] == 'dropped':
+            lines.append(f"dropped in round {row['dropped_round']} after {row['dates']} dates: {row['candidate']}")
+    work = result['work']
+    lines.append(f"folds run: {work['folds_run']} of {work['folds_exhaustive']} "
+                 f"({100 * work['skipped_fraction']:.1f}% skipped), "
+                 f"{work['seconds_run']:.2f}s instead of about {work['seconds_exhaustive_estimate']:.2f}s")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Select an interpolator configuration by racing them on growing '
+                                                 'subsets of dates.')
+    parser.add_argument('source', help='Wide historical CSV, cube directory or directory of daily files.')
+    parser.add_argument('--candidate', dest='candidates', action='append',
+                        help="Configuration 'name[:key=value,...]', repeatable; defaults to every registered "
+                             f"interpolator ({', '.join(available_interpolators())}).")
+    parser.add_argument('--start', dest='start_date')
+    parser.add_argument('--end', dest='end_date')
+    parser.add_argument('--rating-scale', default='yield', choices=('ordinal', 'yield', 'slope'))
+    parser.add_argument('--rating-map', help='YAML file mapping rating labels to values.')
+    parser.add_argument('--n-splits', type=int, default=5)
+    parser.add_argument('--initial-dates', type=int, default=4)
+    parser.add_argument('--growth', type=float, default=2.0)
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--eta', type=float, help='Also keep only the best 1/ETA candidates each round.')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--output', help='Write the leaderboard to this CSV or JSON file.')
+    args = parser.parse_args(argv)
+
+    from bond_yield.batch import load_rating_map
+    from bond_yield.data_processing.loader import load_bond_yields
+
+    history = load_bond_yields(args.source, start_date=args.start_date, end_date=args.end_date)
+    result = run_race(history, args.candidates or available_interpolators(), rating_scale=args.rating_scale,
+                      rating_map=load_rating_map(args.rating_map) if args.rating_map else None,
+                      n_splits=args.n_splits, initial_dates=args.initial_dates, growth=args.growth,
+                      confidence=args.confidence, eta=args.eta, workers=args.workers)
+    print(format_race(result))
+    if args.output:
+        save_leaderboard(result['leaderboard'], args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
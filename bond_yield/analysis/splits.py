@@ -0,0 +1,63 @@
+import numpy as np
+
+
+def kfold_split(n_samples, n_splits=5, shuffle=False, random_state=None):
+    """
+    Generate k-fold train/test index arrays.
+
+    The folds are identical to scikit-learn's `KFold(n_splits, shuffle=shuffle,
+    random_state=random_state).split(X)` for an integer seed, so cross-validation
+    results do not change with the dependency gone.
+
+    Parameters:
+    - n_samples: int, Number of samples to split.
+    - n_splits: int, Number of folds (at least 2).
+    - shuffle: bool, Whether to shuffle the samples before splitting.
+    - random_state: int, optional, Seed for the shuffle.
+
+    Yields:
+    - tuple: (train_index, test_index), both sorted ascending.
+    """
+    if n_splits < 2:
+        raise ValueError(f"k-fold cross-validation requires at least 2 splits, got n_splits={n_splits}.")
+    if n_splits > n_samples:
+        raise ValueError(f"Cannot have number of splits n_splits={n_splits} greater than the number of samples: n_samples={n_samples}.")
+
+    indices = np.arange(n_samples)
+    if shuffle:
+        np.random.RandomState(random_state).shuffle(indices)
+
+    fold_sizes = np.full(n_splits, n_samples // n_splits, dtype=int)
+    fold_sizes[:n_samples % n_splits] += 1
+
+    current = 0
+    for fold_size in fold_sizes:
+        test_mask = np.zeros(n_samples, dtype=bool)
+        test_mask[indices[current:current + fold_size]] = True
+        yield np.flatnonzero(~test_mask), np.flatnonzero(test_mask)
+        current += fold_size
+
+
+def mean_squared_error(y_true, y_pred):
+    """
+    Mean squared error between two arrays of the same length.
+    """
+    y_true = np.asarray(y_true, dtype=float).ravel()
+    y_pred = np.asarray(y_pred, dtype=float).ravel()
+    return float(np.mean((y_true - y_pred) ** 2))
+
+
+def grid_observations(df):
+    """
+    Flatten a rating x tenor DataFrame into one (rating, tenor) row per cell, tenor by tenor.
+
+    Parameters:
+    - df: DataFrame, Yields indexed by rating with tenors as columns.
+
+    Returns:
+    - tuple: (X of shape (n_cells, 2), y of shape (n_cells,)).
+    """
+    X = np.column_stack((np.tile(df.index.to_numpy(), len(df.columns)),
+                         np.repeat(df.columns.to_numpy(), len(df.index))))
+    y = df.to_numpy().T.ravel()
+    return X, y
@@ -0,0 +1,313 @@
+import argparse
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bond_yield.analysis.splits import kfold_split
+from bond_yield.data_processing.encoding import as_scale_vector
+from bond_yield.interpolators.registry import available_interpolators, get_interpolator
+from bond_yield.utils.date_frames import iter_date_frames
+from bond_yield.utils.profiling import count, span
+from bond_yield.utils.scheduler import CostModel, format_utilization, pack_longest_first, timed_call, utilization_report
+
+# Prepared history of the current worker process, set once by `_init_worker`
+_PREPARED = None
+
+
+class Candidate:
+    """
+    One interpolator configuration taking part in a tournament.
+    """
+
+    def __init__(self, name, params=None, label=None):
+        """
+        Parameters:
+        - name: str, Name registered in `bond_yield.interpolators.registry`.
+        - params: dict, optional, Keyword arguments of the interpolator.
+        - label: str, optional, Name shown in the leaderboard; built from name and params by default.
+        """
+        self.name = name
+        self.params = dict(params or {})
+        self.label = label or (name + ''.join(f' {key}={value}' for key, value in sorted(self.params.items())))
+
+    def make(self):
+        return get_interpolator(self.name)(**self.params)
+
+
+def _convert(value):
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+
+def parse_candidate(text):
+    """
+    Parse 'name' or 'name:key=value,key=value' (e.g. 'tps:lambda_val=0.05') into a Candidate.
+    """
+    name, _, options = text.partition(':')
+    params = {}
+    for option in filter(None, options.split(',')):
+        if '=' not in option:
+            raise ValueError(f"Expected KEY=VALUE in candidate '{text}', got '{option}'.")
+        key, value = option.split('=', 1)
+        params[key] = _convert(value)
+    return Candidate(name, params)
+
+
+def prepare_history(date_dataframes, rating_scale='yield', rating_map=None, n_splits=5, random_state=42):
+    """
+    Turn a history into the arrays every candidate is scored on: the observed points of
+    each date on a numerical rating scale, and their k-fold train/test splits.
+
+    Parameters:
+    - date_dataframes: dict of date -> DataFrame, or an iterable of (date, DataFrame) pairs.
+    - rating_scale: str, See `bond_yield.batch.build_rating_scale`.
+    - rating_map: dict, optional, Rating label -> value.
+    - n_splits: int, Number of folds per date.
+    - random_state: int, Seed of the fold shuffle.
+
+    Returns:
+    - list of dict: One {'date', 'X', 'y', 'folds'} per date with at least `n_splits` quotes.
+    """
+    from bond_yield.batch import build_rating_scale
+
+    prepared = []
+    for date, df in iter_date_frames(date_dataframes):
+        with span('tournament.prepare'):
+            scale = build_rating_scale(df, rating_scale, rating_map)
+            values = df.to_numpy(dtype=float)
+            rows, cols = np.nonzero(~np.isnan(values))
+            if len(rows) < n_splits:
+                continue
+            ratings = as_scale_vector(scale).convert_many(df.index)
+            tenors = df.columns.to_numpy(dtype=float)
+            X = np.column_stack((ratings[rows], tenors[cols]))
+            y = values[rows, cols]
+            folds = list(kfold_split(len(y), n_splits, shuffle=True, random_state=random_state))
+        prepared.append({'date': str(date), 'X': X, 'y': y, 'folds': folds})
+    return prepared
+
+
+def evaluate_candidate(candidate, prepared):
+    """
+    Cross-validate one candidate on prepared dates.
+
+    Returns:
+    - dict: Sums of squared errors, test points, fit and query seconds, folds and failed folds.
+    """
+    totals = {'sse': 0.0, 'points': 0, 'fit_seconds': 0.0, 'query_seconds': 0.0, 'folds': 0, 'failures': 0}
+    for item in prepared:
+        X, y = item['X'], item['y']
+        for train_index, test_index in item['folds']:
+            try:
+                interpolator = candidate.make()
+                started = time.perf_counter()
+                interpolator.fit(X[train_index], y[train_index])
+                fitted = time.perf_counter()
+                predictions = np.asarray(interpolator.interpolate(X[test_index]), dtype=float).ravel()
+                queried = time.perf_counter()
+            except (ValueError, np.linalg.LinAlgError):
+                totals['failures'] += 1
+                continue
+            totals['sse'] += float(np.sum((predictions - y[test_index]) ** 2))
+            totals['points'] += len(test_index)
+            totals['fit_seconds'] += fitted - started
+            totals['query_seconds'] += queried - fitted
+            totals['folds'] += 1
+    count('tournament.folds', totals['folds'] + totals['failures'])
+    return totals
+
+
+def _init_worker(prepared):
+    global _PREPARED
+    _PREPARED = prepared
+
+
+def _evaluate_slice(candidate, start, stop):
+    return evaluate_candidate(candidate, _PREPARED[start:stop])
+
+
+def _evaluate_positions(candidate, positions):
+    return evaluate_candidate(candidate, [_PREPARED[position] for position in positions])
+
+
+def _leaderboard(candidates, totals):
+    rows = []
+    for candidate, total in zip(candidates, totals):
+        folds = max(total['folds'], 1)
+        mse = total['sse'] / total['points'] if total['points'] else float('nan')
+        rows.append({
+            'candidate': candidate.label,
+            'interpolator': candidate.name,
+            'params': candidate.params,
+            'mse': mse,
+            'rmse': float(np.sqrt(mse)),
+            'fit_ms': 1000 * total['fit_seconds'] / folds,
+            'query_us_per_point': 1e6 * total['query_seconds'] / max(total['points'], 1),
+            'latency_ms': 1000 * (total['fit_seconds'] + total['query_seconds']) / folds,
+            'folds': total['folds'],
+            'failures': total['failures'],
+        })
+
+    # A candidate is on the Pareto front if no other one is at least as accurate and as fast
+    for row in rows:
+        row['pareto'] = not np.isnan(row['mse']) and not any(
+            other is not row and not np.isnan(other['mse'])
+            and other['mse'] <= row['mse'] and other['latency_ms'] <= row['latency_ms']
+            and (other['mse'] < row['mse'] or other['latency_ms'] < row['latency_ms'])
+            for other in rows)
+    rows.sort(key=lambda row: (np.isnan(row['mse']), row['mse']))
+    return rows
+
+
+def run_tournament(date_dataframes, candidates, rating_scale='yield', rating_map=None, n_splits=5,
+                   random_state=42, workers=1, chunk_size=16, cost_model=None, stream=None):
+    """
+    Score many interpolator configurations on the same history in one parallel job.
+
+    The history is preprocessed once (rating scale, observed points, folds) and shared by all
+    candidates; with `workers` > 1 it is sent once to each worker process, and the work is
+    split into (candidate, group of dates) tasks. The dates of each candidate are packed
+    longest-first into groups of similar predicted cost, and the tasks are submitted
+    heaviest first, so a few expensive dates do not leave the other workers idle at the end.
+
+    Parameters:
+    - date_dataframes: dict of date -> DataFrame, or an iterable of (date, DataFrame) pairs.
+    - candidates: list of Candidate or str, Configurations; strings are parsed by `parse_candidate`.
+    - rating_scale: str, See `bond_yield.batch.build_rating_scale`.
+    - rating_map: dict, optional, Rating label -> value.
+    - n_splits: int, Number of folds per date.
+    - random_state: int, Seed of the fold shuffle.
+    - workers: int, Number of worker processes; 1 runs in this process.
+    - chunk_size: int, Average dates per task.
+    - cost_model: CostModel or str, optional, Cost model of the scheduler, or the path of its
+                  JSON timings (loaded if present, saved after the run).
+    - stream: file, optional, Where the utilization report of a parallel run goes (default stderr).
+
+    Returns:
+    - list of dict: Leaderboard sorted by MSE, with fit time per fold, query time per point,
+                    total latency per fold, failures, and whether the candidate is on the
+                    MSE / latency Pareto front.
+    """
+    candidates = [parse_candidate(c) if isinstance(c, str) else c for c in candidates]
+    for candidate in candidates:
+        get_interpolator(candidate.name)
+    prepared = prepare_history(date_dataframes, rating_scale, rating_map, n_splits, random_state)
+    if not prepared:
+        raise ValueError("No data available for the tournament.")
+
+    totals = [{'sse': 0.0, 'points': 0, 'fit_seconds': 0.0, 'query_seconds': 0.0, 'folds': 0, 'failures': 0}
+              for _ in candidates]
+
+    with span('tournament.run', candidates=len(candidates), dates=len(prepared)):
+        if workers <= 1:
+            results = [(i, evaluate_candidate(candidate, prepared)) for i, candidate in enumerate(candidates)]
+        else:
+            if not isinstance(cost_model, CostModel):
+                cost_model = CostModel(cost_model)
+            results = _run_scheduled(prepared, candidates, n_splits, workers, chunk_size, cost_model,
+                                     stream or sys.stderr)
+            if cost_model.path is not None:
+                cost_model.save()
+
+    for i, result in results:
+        for key, value in result.items():
+            totals[i][key] += value
+    return _leaderboard(candidates, totals)
+
+
+def _run_scheduled(prepared, candidates, n_splits, workers, chunk_size, cost_model, stream):
+    """
+    Evaluate every candidate on a process pool in cost-packed tasks and print the pool's utilization.
+
+    Returns:
+    - list: (candidate index, totals) per task.
+    """
+    optimizer = f'cv{n_splits}'
+    points = [len(item['y']) for item in prepared]
+    n_groups = math.ceil(len(prepared) / chunk_size)
+    tasks = []
+    for i, candidate in enumerate(candidates):
+        costs = cost_model.predict(candidate.name, points, optimizer)
+        tasks.extend((load, i, positions) for load, positions in pack_longest_first(costs, n_groups))
+    tasks.sort(key=lambda task: -task[0])
+
+    results, records = [], []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(prepared,)) as executor:
+        futures = [(i, positions, executor.submit(timed_call, _evaluate_positions, candidates[i], positions))
+                   for _, i, positions in tasks]
+        for i, positions, future in futures:
+            result, record = future.result()
+            results.append((i, result))
+            records.append(record)
+            cost_model.observe(candidates[i].name, [points[position] for position in positions],
+                               record['end'] - record['start'], optimizer)
+    report = utilization_report(records, workers, sum(task[0] for task in tasks))
+    print(f"[tournament] {format_utilization(report)}", file=stream)
+    return results
+
+
+def format_leaderboard(rows):
+    """
+    Format a leaderboard as a plain-text table; '*' marks the MSE / latency Pareto front.
+    """
+    lines = [f"{'':2s}{'candidate':36s} {'mse':>12s} {'fit ms':>10s} {'query us/pt':>12s} {'failures':>9s}"]
+    for row in rows:
+        lines.append(f"{'*' if row['pareto'] else ' ':2s}{row['candidate']:36s} {row['mse']:12.4e} "
+                     f"{row['fit_ms']:10.3f} {row['query_us_per_point']:12.3f} {row['failures']:9d}")
+    return '\n'.join(lines)
+
+
+def save_leaderboard(rows, path):
+    """
+    Write a leaderboard as CSV when `path` ends in '.csv', as JSON otherwise.
+    """
+    if str(path).endswith('.csv'):
+        import pandas as pd
+        pd.DataFrame(rows).to_csv(path, index=False)
+    else:
+        with open(path, 'w') as file:
+            json.dump(rows, file, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rank interpolator configurations by cross-validated error and speed.')
+    parser.add_argument('source', help='Wide historical CSV, cube directory or directory of daily files.')
+    parser.add_argument('--candidate', dest='candidates', action='append',
+                        help="Configuration 'name[:key=value,...]', repeatable; defaults to every registered "
+                             f"interpolator ({', '.join(available_interpolators())}).")
+    parser.add_argument('--start', dest='start_date')
+    parser.add_argument('--end', dest='end_date')
+    parser.add_argument('--rating-scale', default='yield', choices=('ordinal', 'yield', 'slope'))
+    parser.add_argument('--rating-map', help='YAML file mapping rating labels to values.')
+    parser.add_argument('--n-splits', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunk-size', type=int, default=16, help='Average dates per task.')
+    parser.add_argument('--cost-model', help='JSON file of recorded timings used to balance the tasks.')
+    parser.add_argument('--output', help='Write the leaderboard to this CSV or JSON file.')
+    args = parser.parse_args(argv)
+
+    from bond_yield.batch import load_rating_map
+    from bond_yield.data_processing.loader import load_bond_yields
+
+    history = load_bond_yields(args.source, start_date=args.start_date, end_date=args.end_date)
+    rows = run_tournament(history, args.candidates or available_interpolators(),
+                          rating_scale=args.rating_scale,
+                          rating_map=load_rating_map(args.rating_map) if args.rating_map else None,
+                          n_splits=args.n_splits, workers=args.workers, chunk_size=args.chunk_size,
+                          cost_model=args.cost_model)
+    print(format_leaderboard(rows))
+    if args.output:
+        save_leaderboard(rows, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from bond_yield.data_processing.encoding import as_scale_vector
+from bond_yield.data_processing.loader import iter_bond_yields
+from bond_yield.data_processing.yield_cube import CubeWriter
+from bond_yield.interpolators.interpolate_bond_yields import MatrixInterpolator
+from bond_yield.interpolators.registry import get_interpolator
+from bond_yield.utils.profiling import span
+from bond_yield.utils.scheduler import CostModel, format_utilization, pack_longest_first, timed_call, utilization_report
+
+RATING_SCALES = ('yield', 'ordinal', 'slope')
+
+OUTPUT_FORMATS = ('csv', 'cube')
+
+
+def load_rating_map(yaml_path):
+    """
+    Load a rating label -> value map from YAML, accepting either a flat mapping or one
+    nested under a top-level 'ratings' key (as in `tests/rating_scores.yaml`).
+    """
+    import yaml
+    with open(yaml_path, 'r') as file:
+        rating_map = yaml.safe_load(file)
+    if isinstance(rating_map.get('ratings'), dict):
+        rating_map = rating_map['ratings']
+    return rating_map
+
+
+def build_rating_scale(df, rating_scale='yield', rating_map=None):
+    """
+    Compute the numerical rating coordinates used to fit one date.
+
+    Parameters:
+    - df: DataFrame, Yields of one date indexed by rating labels.
+    - rating_scale: str, 'yield' uses each rating's average yield, 'ordinal' uses `rating_map`
+                    and 'slope' optimizes `rating_map` (the yield scale when no map is given)
+                    with `SlopeMinimizingRatingConverter`.
+    - rating_map: dict, optional, Rating label -> value; required by 'ordinal', since the
+                  loaders sort ratings lexically and row positions carry no credit order.
+
+    Returns:
+    - dict: Rating label -> numerical value.
+    """
+    if rating_scale == 'ordinal':
+        if rating_map is None:
+            raise ValueError("The ordinal rating scale needs a rating map (label -> value).")
+        scale = dict(zip(df.index, as_scale_vector(rating_map).convert_many(df.index).tolist()))
+    elif rating_scale == 'yield':
+        from bond_yield.data_processing.rating_converter import YieldBasedRatingConverter
+        scale = YieldBasedRatingConverter(df).get_rating_scale()
+    elif rating_scale == 'slope':
+        from bond_yield.data_processing.rating_converter_by_slopes import (AbsoluteDifferenceStrategy,
+                                                                          SlopeMinimizingRatingConverter)
+        if rating_map is None:
+            rating_map = build_rating_scale(df, 'yield')
+        initial = as_scale_vector(rating_map).convert_many(df.index)
+        converter = SlopeMinimizingRatingConverter(dict(zip(df.index, initial.tolist())), AbsoluteDifferenceStrategy(df))
+        converter.optimize_ratings()
+        scale = converter.get_rating_scale()
+    else:
+        raise ValueError(f"Unknown rating scale '{rating_scale}', expected one of {RATING_SCALES}.")
+
+    missing = [rating for rating, value in scale.items() if not np.isfinite(value)]
+    if missing:
+        raise ValueError(f"No {rating_scale} scale value could be derived for ratings {missing}.")
+    return scale
+
+
+def build_surface(df, interpolator_factory, rating_scale='yield', rating_map=None):
+    """
+    Fill one date's surface on a numerical rating scale and return it with its original labels.
+
+    Parameters:
+    - df: DataFrame, Yields of one date indexed by rating labels with tenors in days as columns.
+    - interpolator_factory: callable, Returns a fresh BaseInterpolator.
+    - rating_scale: str, See `build_rating_scale`.
+    - rating_map: dict, optional, See `build_rating_scale`.
+
+    Returns:
+    - DataFrame: Filled surface indexed by the original rating labels and tenors.
+    """
+    ratings = list(df.index)
+    tenors = list(df.columns)
+    with span('batch.rating_scale', strategy=rating_scale):
+        scale = build_rating_scale(df, rating_scale, rating_map)
+
+    scaled = df.copy()
+    scaled.index = as_scale_vector(scale).convert_many(df.index)
+    filled = MatrixInterpolator(interpolator_factory()).fit_interpolate(scaled)
+    filled.index = ratings
+    filled.columns = tenors
+    return filled
+
+
+def make_interpolator_factory(name, params=None):
+    """
+    Return a zero-argument callable building the interpolator registered as `name` with `params`.
+    """
+    interpolator_class = get_interpolator(name)
+    params = dict(params or {})
+    return lambda: interpolator_class(**params)
+
+
+def _build_chunk(settings, items):
+    """
+    Worker entry point: build the surfaces of a chunk of (date, DataFrame) pairs.
+
+    Returns:
+    - list: (date, filled DataFrame or None, error message or None) per date.
+    """
+    factory = make_interpolator_factory(settings['interpolator'], settings['interpolator_params'])
+    results = []
+    for date, df in items:
+        try:
+            surface = build_surface(df, factory, settings['rating_scale'], settings['rating_map'])
+            results.append((date, surface, None))
+        except (ValueError, np.linalg.LinAlgError) as error:
+            results.append((date, None, str(error)))
+    return results
+
+
+def _build_scheduled(settings, items):
+    """
+    Worker entry point of scheduled runs: like `_build_chunk`, plus the seconds spent on each date.
+    """
+    results, seconds = [], []
+    for item in items:
+        started = time.perf_counter()
+        results.extend(_build_chunk(settings, [item]))
+        seconds.append(time.perf_counter() - started)
+    return results, seconds
+
+
+class _SurfaceWriter:
+    def __init__(self, output_path, output_format):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}', expected one of {OUTPUT_FORMATS}.")
+        self.output_path = output_path
+        self.output_format = output_format
+        self.cube_writer = None
+        self.csv_file = None  # Kept open for the whole run
+        self.ratings = None  # Grid of the first surface, which every later surface must match
+        self.tenors = None
+
+    def write_many(self, pairs):
+        """
+        Write the (date, surface) pairs of one chunk, as a single CSV write.
+
+        Raises ValueError if a surface's ratings or tenors differ from those of the first surface,
+        since its cells would not line up with the header (or the cube axes).
+        """
+        if not pairs:
+            return
+        if self.ratings is None:
+            self.ratings, self.tenors = pairs[0][1].index, pairs[0][1].columns
+        for date, surface in pairs:
+            if not (surface.index.equals(self.ratings) and surface.columns.equals(self.tenors)):
+                raise ValueError(f"Surface of '{date}' has ratings {list(surface.index)} and tenors "
+                                 f"{list(surface.columns)}, but the output was started with ratings "
+                                 f"{list(self.ratings)} and tenors {list(self.tenors)}.")
+        with span('batch.write', dates=len(pairs)):
+            if self.output_format == 'cube':
+                if self.cube_writer is None:
+                    self.cube_writer = CubeWriter(self.output_path, self.ratings, self.tenors)
+                for date, surface in pairs:
+                    self.cube_writer.append(date, surface.to_numpy())
+            else:
+                self._write_csv([date for date, _ in pairs],
+                                np.stack([surface.to_numpy().reshape(-1) for _, surface in pairs]))
+
+    def _write_csv(self, dates, rows):
+        first = self.csv_file is None
+        if first:
+            self.csv_file = open(self.output_path, 'w', newline='')
+        columns = [f'{rating}::{tenor}' for rating in self.ratings for tenor in self.tenors]
+        pd.DataFrame(rows, index=dates, columns=columns).to_csv(self.csv_file, header=first)
+
+    def close(self):
+        if self.cube_writer is not None:
+            self.cube_writer.close()
+        if self.csv_file is not None:
+            self.csv_file.close()
+
+
+def _chunked(pairs, chunk_size):
+    chunk = []
+    for pair in pairs:
+        chunk.append(pair)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(source, output, start_date=None, end_date=None, interpolator='tps', interpolator_params=None,
+              rating_scale='yield', rating_map=None, workers=1, chunk_size=64, output_format='csv',
+              progress=True, stream=None, cost_model=None):
+    """
+    Build the filled surface of every date in a range and write them out.
+
+    Loading, fitting and writing are pipelined. With several workers, dates are read in waves
+    of `chunk_size` dates per worker; the cost of every date is predicted from its quote count,
+    the interpolator and the rating scale, and each wave is packed longest-first into tasks of
+    similar cost, submitted heaviest first while the next wave is read. Finished waves are
+    written in date order, and the measured time of every date refines the cost model.
+
+    Parameters:
+    - source: str or Path, Wide CSV or cube directory.
+    - output: str or Path, Output CSV file or cube directory.
+    - start_date, end_date: str, optional, Inclusive date range.
+    - interpolator: str, Name registered in `bond_yield.interpolators.registry`.
+    - interpolator_params: dict, optional, Keyword arguments for the interpolator.
+    - rating_scale: str, One of `RATING_SCALES`.
+    - rating_map: dict, optional, Rating label -> value for the 'ordinal' and 'slope' scales.
+    - workers: int, Number of worker processes; 1 runs everything in this process.
+    - chunk_size: int, Dates per read chunk; with several workers, dates per worker in each wave.
+    - output_format: str, 'csv' for the wide layout or 'cube' for a cube directory.
+    - progress: bool, Whether to print a progress line after each written chunk.
+    - stream: file, optional, Where progress and the summary go (default stderr).
+    - cost_model: CostModel or str, optional, Cost model of the scheduler, or the path of its
+                  JSON timings (loaded if present, saved after the run).
+
+    Returns:
+    - dict: Run summary with counts, failures, elapsed time and throughput; with several
+            workers also 'schedule', the pool's utilization and straggler time.
+    """
+    stream = stream or sys.stderr
+    settings = {
+        'interpolator': interpolator,
+        'interpolator_params': dict(interpolator_params or {}),
+        'rating_scale': rating_scale,
+        'rating_map': rating_map,
+    }
+    make_interpolator_factory(interpolator, interpolator_params)  # Fail fast on unknown names
+    if rating_scale == 'ordinal' and rating_map is None:
+        raise ValueError("The ordinal rating scale needs a rating map (label -> value).")
+    writer = _SurfaceWriter(output, output_format)
+
+    started = time.perf_counter()
+    summary = {'dates': 0, 'cells': 0, 'failures': {}}
+
+    def write_results(results):
+        built = []
+        for date, surface, error in results:
+            if error is not None:
+                summary['failures'][date] = error
+                continue
+            built.append((date, surface))
+            summary['dates'] += 1
+            summary['cells'] += surface.size
+        writer.write_many(built)
+        if progress:
+            elapsed = time.perf_counter() - started
+            print(f"\r[bond-yield] {summary['dates']} dates written, {len(summary['failures'])} failed, "
+                  f"{summary['dates'] / max(elapsed, 1e-9):.1f} dates/s", end='', file=stream, flush=True)
+
+    try:
+        if workers <= 1:
+            chunks = _chunked(iter_bond_yields(source, chunksize=chunk_size, start_date=start_date,
+                                               end_date=end_date), chunk_size)
+            for chunk in chunks:
+                write_results(_build_chunk(settings, chunk))
+        else:
+            if not isinstance(cost_model, CostModel):
+                cost_model = CostModel(cost_model)
+            summary['schedule'] = _run_scheduled(source, start_date, end_date, settings, workers, chunk_size,
+                                                 cost_model, write_results)
+            if cost_model.path is not None:
+                cost_model.save()
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    summary['elapsed_seconds'] = elapsed
+    summary['dates_per_second'] = summary['dates'] / elapsed if elapsed > 0 else float('inf')
+    summary['cells_per_second'] = summary['cells'] / elapsed if elapsed > 0 else float('inf')
+    if progress:
+        print(file=stream)
+    print(f"[bond-yield] {summary['dates']} surfaces ({summary['cells']} cells) in {elapsed:.2f}s: "
+          f"{summary['dates_per_second']:.1f} dates/s, {summary['cells_per_second']:.0f} cells/s, "
+          f"{len(summary['failures'])} failed", file=stream)
+    if 'schedule' in summary:
+        print(f"[bond-yield] {format_utilization(summary['schedule'])}", file=stream)
+    for date, error in summary['failures'].items():
+        print(f"[bond-yield] {date} failed: {error}", file=stream)
+    return summary
+
+
+def _run_scheduled(source, start_date, end_date, settings, workers, chunk_size, cost_model, write_results):
+    """
+    Fit the dates of `source` on a process pool in cost-packed tasks and pass each wave's
+    results to `write_results` in date order.
+
+    Returns:
+    - dict: Utilization report of the pool.
+    """
+    interpolator, rating_scale = settings['interpolator'], settings['rating_scale']
+    records = []
+    predicted = 0.0
+
+    def collect(wave, points, futures):
+        by_position = {}
+        for tasks, future in futures:
+            (results, seconds), record = future.result()
+            records.append(record)
+            for position, result, elapsed in zip(tasks, results, seconds):
+                by_position[position] = result
+                cost_model.observe(interpolator, points[position], elapsed, rating_scale)
+        write_results([by_position[position] for position in range(len(wave))])
+
+    waves = _chunked(iter_bond_yields(source, chunksize=chunk_size, start_date=start_date, end_date=end_date),
+                     chunk_size * workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for wave in waves:
+            points = [int(df.notna().to_numpy().sum()) for _, df in wave]
+            costs = cost_model.predict(interpolator, points, rating_scale)
+            predicted += float(costs.sum())
+            # A few tasks per worker, so the pool can still balance mispredicted costs
+            futures = [(tasks, executor.submit(timed_call, _build_scheduled, settings, [wave[i] for i in tasks]))
+                       for _, tasks in pack_longest_first(costs, 4 * workers)]
+            in_flight.append((wave, points, futures))
+            # The next wave is queued behind this one, so workers do not wait for the writer
+            if len(in_flight) >= 2:
+                collect(*in_flight.popleft())
+        while in_flight:
+            collect(*in_flight.popleft())
+    return utilization_report(records, workers, predicted)
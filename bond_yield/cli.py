@@ -0,0 +1,140 @@
+import argparse
+import sys
+
+
+def _parse_param(text):
+    """
+    Parse a KEY=VALUE interpolator option, converting numeric values.
+    """
+    if '=' not in text:
+        raise argparse.ArgumentTypeError(f"Expected KEY=VALUE, got '{text}'.")
+    key, value = text.split('=', 1)
+    for convert in (int, float):
+        try:
+            return key, convert(value)
+        except ValueError:
+            pass
+    return key, value
+
+
+def build_parser():
+    from bond_yield.batch import OUTPUT_FORMATS, RATING_SCALES
+    from bond_yield.interpolators.registry import available_interpolators
+
+    parser = argparse.ArgumentParser(prog='bond-yield', description='Bond yield surface construction.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='Build filled surfaces for a date range.')
+    build.add_argument('source', help='Wide historical CSV or cube directory.')
+    build.add_argument('output', help='Output CSV file or cube directory.')
+    build.add_argument('--start', dest='start_date', help='First date to build (inclusive, ISO format).')
+    build.add_argument('--end', dest='end_date', help='Last date to build (inclusive, ISO format).')
+    build.add_argument('--interpolator', default='tps', choices=available_interpolators())
+    build.add_argument('--interpolator-param', dest='interpolator_params', action='append', default=[],
+                       type=_parse_param, metavar='KEY=VALUE', help='Interpolator option, e.g. lambda_val=0.05.')
+    build.add_argument('--rating-scale', default='yield', choices=RATING_SCALES)
+    build.add_argument('--rating-map', help='YAML file mapping rating labels to values.')
+    build.add_argument('--workers', type=int, default=1, help='Number of worker processes.')
+    build.add_argument('--chunk-size', type=int, default=64, help='Dates read and fitted per chunk.')
+    build.add_argument('--cost-model', help='JSON file of recorded timings the scheduler predicts task costs from; '
+                                            'updated after each run with several workers.')
+    build.add_argument('--format', dest='output_format', default='csv', choices=OUTPUT_FORMATS)
+    build.add_argument('--quiet', action='store_true', help='Do not print progress while running.')
+    build.add_argument('--trace', help='Write profiling spans of this process to a Chrome trace file, '
+                                       'or to JSON lines if the name ends in .jsonl.')
+    build.add_argument('--profile-summary', action='store_true',
+                       help='Print per-stage timings of this process at the end of the run.')
+
+    serve = commands.add_parser('serve', help='Serve batched yield queries from cached surfaces.')
+    serve.add_argument('source', help='Wide historical CSV or cube directory (a cube is much faster).')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--unix-socket', help='Listen on this Unix socket path instead of a TCP port.')
+    serve.add_argument('--cache-mb', type=float, default=256, help='Memory cap of the surface cache in MiB.')
+    serve.add_argument('--interpolator', default='tps', choices=available_interpolators())
+    serve.add_argument('--interpolator-param', dest='interpolator_params', action='append', default=[],
+                       type=_parse_param, metavar='KEY=VALUE', help='Interpolator option, e.g. lambda_val=0.05.')
+    serve.add_argument('--rating-scale', default='yield', choices=RATING_SCALES)
+    serve.add_argument('--rating-map', help='YAML file mapping rating labels to values.')
+    return parser
+
+
+def run_build(args):
+    from bond_yield.utils import profiling
+
+    recorders = []
+    if args.trace:
+        recorders.append(profiling.recorder_for_path(args.trace))
+    if args.profile_summary:
+        recorders.append(profiling.AggregateRecorder())
+    if not recorders:
+        return _run_build(args)
+
+    recorder = recorders[0] if len(recorders) == 1 else profiling.FanOutRecorder(recorders)
+    with profiling.recording(recorder):
+        exit_code = _run_build(args)
+    if args.profile_summary:
+        print(recorders[-1].report(), file=sys.stderr)
+    return exit_code
+
+
+def _run_build(args):
+    from bond_yield.batch import load_rating_map, run_batch
+
+    summary = run_batch(
+        args.source, args.output,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        interpolator=args.interpolator,
+        interpolator_params=dict(args.interpolator_params),
+        rating_scale=args.rating_scale,
+        rating_map=load_rating_map(args.rating_map) if args.rating_map else None,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        output_format=args.output_format,
+        progress=not args.quiet,
+        cost_model=args.cost_model,
+    )
+    return 1 if summary['failures'] else 0
+
+
+def run_serve(args):
+    import asyncio
+
+    from bond_yield.batch import load_rating_map
+    from bond_yield.service import SurfaceQueryService, make_surface_loader, serve_forever
+
+    loader = make_surface_loader(
+        args.source,
+        interpolator=args.interpolator,
+        interpolator_params=dict(args.interpolator_params),
+        rating_scale=args.rating_scale,
+        rating_map=load_rating_map(args.rating_map) if args.rating_map else None,
+    )
+    service = SurfaceQueryService(loader, max_cache_bytes=int(args.cache_mb * 2 ** 20))
+    address = args.unix_socket or f'http://{args.host}:{args.port}'
+    print(f"Serving surfaces of {args.source} on {address}", file=sys.stderr)
+    try:
+        asyncio.run(serve_forever(service, args.host, args.port, args.unix_socket))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None):
+    """
+    Entry point of the `bond-yield` console script.
+
+    Returns:
+    - int: Process exit code.
+    """
+    args = build_parser().parse_args(argv)
+    if args.command == 'build':
+        return run_build(args)
+    if args.command == 'serve':
+        return run_serve(args)
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+# Default of `ScaleVector.convert_many` / `map_index` that keeps unknown labels unchanged
+KEEP_LABEL = object()
+# Default of `ScaleVector.convert_many` / `map_index` that raises on unknown labels
+RAISE = object()
+
+
+def code_dtype(n_categories):
+    """
+    Smallest signed integer type able to hold the codes 0 .. n_categories - 1.
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories <= np.iinfo(dtype).max + 1:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class LabelEncoder:
+    """
+    Map rating or tenor labels to integer codes (their positions) once, so that later lookups
+    are array operations instead of per-label dictionary accesses.
+    """
+
+    def __init__(self, labels):
+        """
+        Parameters:
+        - labels: iterable, Distinct labels in code order.
+        """
+        self.labels = pd.Index(list(labels))
+        if not self.labels.is_unique:
+            raise ValueError(f"Labels must be unique, got duplicates {list(self.labels[self.labels.duplicated()])}.")
+        self.dtype = code_dtype(len(self.labels))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, label):
+        return label in self.labels
+
+    def encode(self, labels):
+        """
+        Parameters:
+        - labels: iterable, Labels to look up.
+
+        Returns:
+        - np.ndarray: Codes of the labels, -1 for labels that are not known.
+        """
+        if not isinstance(labels, pd.Index):
+            labels = pd.Index(list(labels))
+        return self.labels.get_indexer(labels).astype(self.dtype, copy=False)
+
+    def decode(self, codes):
+        """
+        Returns:
+        - np.ndarray: The labels of `codes`.
+        """
+        return self.labels.to_numpy()[np.asarray(codes)]
+
+
+class ScaleVector:
+    """
+    Numerical scale of a set of labels (e.g. rating values, tenor coordinates), stored as a
+    float array aligned with a LabelEncoder.
+    """
+
+    def __init__(self, encoder, values, default=RAISE):
+        """
+        Parameters:
+        - encoder: LabelEncoder, The labels.
+        - values: array-like, One value per label, in code order.
+        - default: float, RAISE or KEEP_LABEL, What `convert` and `convert_many` return for
+                   labels outside the scale: a fixed value, a ValueError, or the label itself.
+        """
+        self.encoder = encoder
+        self.values = np.asarray(values, dtype=float)
+        if self.values.shape != (len(encoder),):
+            raise ValueError(f"Expected {len(encoder)} scale values, got shape {self.values.shape}.")
+        self.default = default
+
+    @classmethod
+    def from_mapping(cls, mapping, default=RAISE):
+        """
+        Build a scale from a label -> value mapping.
+        """
+        return cls(LabelEncoder(mapping.keys()), list(mapping.values()), default)
+
+    @property
+    def labels(self):
+        return self.encoder.labels
+
+    def with_values(self, values):
+        """
+        Return a scale over the same labels with new values, e.g. after an optimization.
+        """
+        return ScaleVector(self.encoder, values, self.default)
+
+    def to_dict(self):
+        return dict(zip(self.encoder.labels, self.values.tolist()))
+
+    def convert(self, label):
+        """
+        Convert one label.
+        """
+        return self.convert_many([label])[0]
+
+    def convert_many(self, labels, default=None):
+        """
+        Convert many labels at once.
+
+        Parameters:
+        - labels: iterable or pd.Index, Labels to convert.
+        - default: optional, Overrides the scale's default for unknown labels.
+
+        Returns:
+        - np.ndarray: Float values, or an object array holding the unknown labels themselves
+                      when the default is KEEP_LABEL and some labels are unknown.
+        """
+        default = self.default if default is None else default
+        if not isinstance(labels, pd.Index):
+            labels = pd.Index(list(labels))
+        codes = self.encoder.encode(labels)
+        unknown = codes < 0
+        result = self.values[codes] if len(self.values) else np.full(len(codes), np.nan)
+        if not unknown.any():
+            return result
+
+        if default is RAISE:
+            missing = labels.to_numpy(dtype=object)[unknown]
+            raise ValueError(f"Labels {list(missing)} not found in the scale.")
+        if default is KEEP_LABEL:
+            result = result.astype(object)
+            result[unknown] = labels.to_numpy(dtype=object)[unknown]
+            return result
+        result[unknown] = default
+        return result
+
+    def map_index(self, index, default=None):
+        """
+        Replace the labels of a pandas Index by their scale values, keeping its name.
+        """
+        return pd.Index(self.convert_many(index, default), name=index.name)
+
+
+def as_scale_vector(scale, default=RAISE):
+    """
+    Accept a ScaleVector or a label -> value mapping and return a ScaleVector.
+    """
+    if isinstance(scale, ScaleVector):
+        return scale
+    return ScaleVector.from_mapping(scale, default)
@@ -1,6 +1,15 @@
-import pandas as pd
+import queue
+import threading
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
+from bond_yield.data_processing.multi_file_loader import is_multi_file_source, load_multi_file_yields
+from bond_yield.data_processing.yield_cube import is_yield_cube, load_yield_cube, split_wide_columns
+from bond_yield.utils.date_frames import iter_date_frames
+from bond_yield.utils.profiling import count, span
+
 def load_bond_yields_single_dataframe(csv_path):
     """
     Load bond yields into a single DataFrame with the first column as the index (ratings)
@@ -19,26 +28,130 @@ def load_bond_yields_single_dataframe(csv_path):
     return df
 
 
-def load_bond_yields(csv_path):
-    df = pd.read_csv(csv_path, index_col=0)  # Assuming first column is the date
+def load_bond_yields(csv_path, start_date=None, end_date=None, dtype=np.float64):
+    """
+    Load historical bond yields into one rating x tenor DataFrame per date.
 
-    date_dataframes = {}
-    for date in df.index.unique():
-        data_for_date = []
-        for col in df.columns:
-            rating, tenor = col.split("::")
-            tenor_days = int(tenor)
-            yield_value = df.at[date, col]
-            data_for_date.append((rating, tenor_days, yield_value))
+    Parameters:
+    - csv_path: str or Path, Wide CSV with 'RATING::TENOR' columns, a cube directory
+                written by `csv_to_cube` (opened memory-mapped, only the requested dates are read),
+                or a directory or glob of daily files in the wide layout (read concurrently by
+                `load_multi_file_yields`).
+    - start_date: str, optional, First date to include (ISO format, inclusive).
+    - end_date: str, optional, Last date to include (ISO format, inclusive).
+    - dtype: numpy dtype, Type of the yields; np.float32 halves the memory of long histories.
 
-        # Create a DataFrame for the current date
-        date_df = pd.DataFrame(data_for_date, columns=['Rating', 'Tenor', 'Yield'])
-        date_df = date_df.pivot(index='Rating', columns='Tenor', values='Yield')
-        date_dataframes[date] = date_df
+    Returns:
+    - dict: Date -> DataFrame indexed by rating with tenors (in days) as columns.
+    """
+    if is_yield_cube(csv_path):
+        return load_yield_cube(csv_path, start_date, end_date).to_date_dataframes(dtype)
+    if is_multi_file_source(csv_path):
+        return load_multi_file_yields(csv_path, start_date=start_date, end_date=end_date, dtype=dtype)
 
-    return date_dataframes
+    return dict(iter_bond_yields(csv_path, start_date=start_date, end_date=end_date, dtype=dtype))
 
 
+def iter_bond_yields(csv_path, chunksize=256, start_date=None, end_date=None, prefetch_chunks=0,
+                     dtype=np.float64):
+    """
+    Lazily yield (date, DataFrame) pairs from a wide CSV or a cube directory.
+
+    The CSV is parsed `chunksize` rows at a time, so at most a few chunks are held in
+    memory regardless of the history length, and each date is handed on as soon as its
+    row has been parsed.
+
+    Parameters:
+    - csv_path: str or Path, Wide CSV with 'RATING::TENOR' columns, a cube directory, or a
+                directory or glob of daily files. Daily files are not read lazily: a date may
+                be spread over any of them, so every file is parsed and merged by
+                `load_multi_file_yields` before the first date is yielded (in date order).
+                Convert large drops with `multi_file_to_cube` to read them lazily.
+    - chunksize: int, Number of CSV rows parsed at a time.
+    - start_date: str, optional, First date to include (ISO format, inclusive).
+    - end_date: str, optional, Last date to include (ISO format, inclusive).
+    - prefetch_chunks: int, Number of chunks parsed ahead in a background thread so that
+                       reading overlaps with the consumer's work; 0 parses in the caller's thread.
+    - dtype: numpy dtype, Type of the yields, also used while parsing the CSV.
+
+    Yields:
+    - tuple: (date, DataFrame indexed by rating with tenors in days as columns).
+    """
+    if is_yield_cube(csv_path):
+        cube = load_yield_cube(csv_path, start_date, end_date)
+        for position, date in enumerate(cube.dates):
+            yield date, cube.frame_at(position, dtype)
+        return
+    if is_multi_file_source(csv_path):
+        yield from load_multi_file_yields(csv_path, start_date=start_date, end_date=end_date, dtype=dtype).items()
+        return
+
+    columns = pd.read_csv(csv_path, index_col=0, nrows=0).columns
+    ratings, tenors, rating_positions, tenor_positions = split_wide_columns(columns)
+    rating_index = pd.Index(ratings, name='Rating')
+    tenor_index = pd.Index(tenors, name='Tenor')
+
+    chunks = pd.read_csv(csv_path, index_col=0, chunksize=chunksize, dtype=dict.fromkeys(columns, dtype))
+    if prefetch_chunks > 0:
+        chunks = _prefetch(chunks, prefetch_chunks)
+
+    chunks = iter(chunks)
+    while True:
+        with span('load.read_chunk'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        count('load.rows', len(chunk))
+
+        dates = chunk.index.astype(str)
+        keep = np.ones(len(chunk), dtype=bool)
+        if start_date is not None:
+            keep &= dates >= str(start_date)
+        if end_date is not None:
+            keep &= dates <= str(end_date)
+
+        values = chunk.to_numpy(dtype=dtype)
+        for date, row in zip(chunk.index[keep], values[keep]):
+            matrix = np.full((len(ratings), len(tenors)), np.nan, dtype=dtype)
+            matrix[rating_positions, tenor_positions] = row
+            yield date, pd.DataFrame(matrix, index=rating_index, columns=tenor_index)
+
+
+def _prefetch(iterable, size):
+    """
+    Iterate over `iterable` in a background thread, keeping at most `size` items buffered.
+    """
+    buffer = queue.Queue(maxsize=size)
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                while not stop.is_set():
+                    try:
+                        buffer.put((item, None), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            buffer.put((done, None))
+        except BaseException as error:
+            buffer.put((done, error))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,360 @@
+import glob
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bond_yield.data_processing.encoding import LabelEncoder
+from bond_yield.data_processing.yield_cube import (CUBE_VALUES_FILE, YieldCube, _write_axes, is_yield_cube,
+                                                   split_wide_columns)
+from bond_yield.utils.profiling import count, span
+
+DUPLICATE_POLICIES = ('error', 'first', 'last')
+
+
+def is_multi_file_source(source):
+    """
+    Check whether `source` names several files: a glob pattern, a list of paths, or a
+    directory that is not a cube.
+    """
+    if isinstance(source, (list, tuple)):
+        return True
+    if glob.has_magic(str(source)):
+        return True
+    return Path(source).is_dir() and not is_yield_cube(source)
+
+
+def resolve_files(source, pattern='*.csv'):
+    """
+    List the files of a multi-file source in a deterministic (sorted) order.
+
+    Parameters:
+    - source: str, Path or list, Directory, glob pattern or explicit list of files.
+    - pattern: str, File pattern used when `source` is a directory.
+
+    Returns:
+    - list of Path: The files.
+    """
+    if isinstance(source, (list, tuple)):
+        files = [Path(path) for path in source]
+    elif glob.has_magic(str(source)):
+        files = sorted(Path(path) for path in glob.glob(str(source)))
+    else:
+        files = sorted(Path(source).glob(pattern))
+    if not files:
+        raise FileNotFoundError(f"No files found for {source}.")
+    return files
+
+
+class _Schema:
+    """
+    Rating and tenor axes shared by every file, with each distinct header validated only once.
+    """
+
+    def __init__(self, ratings, tenors):
+        self.ratings = list(ratings)
+        self.tenors = [int(tenor) for tenor in tenors]
+        self._rating_encoder = LabelEncoder(self.ratings)
+        self._tenor_encoder = LabelEncoder(self.tenors)
+        self._layouts = {}
+        self._lock = threading.Lock()
+
+    def layout(self, path, header):
+        """
+        Return (columns, rating_positions, tenor_positions) of a header line, validating it
+        against the axes the first time it is seen.
+        """
+        # Index lookups are not thread-safe, so each distinct header is parsed under the lock
+        with self._lock:
+            layout = self._layouts.get(header)
+            if layout is None:
+                layout = self._parse_header(path, header)
+                self._layouts[header] = layout
+        return layout
+
+    def _parse_header(self, path, header):
+        columns = _header_columns(path, header)
+        labels = [column.split('::') for column in columns]
+        rating_positions = self._rating_encoder.encode([rating for rating, _ in labels])
+        tenor_positions = self._tenor_encoder.encode([int(tenor) for _, tenor in labels])
+        unknown = [column for column, r, t in zip(columns, rating_positions, tenor_positions) if r < 0 or t < 0]
+        if unknown:
+            raise ValueError(f"{path}: columns {unknown[:5]} are not on the rating/tenor axes of the first file.")
+        if len(set(zip(rating_positions, tenor_positions))) != len(columns):
+            raise ValueError(f"{path}: duplicate rating/tenor columns.")
+        return columns, rating_positions, tenor_positions
+
+
+def _read_header(path):
+    with open(path, 'r') as file:
+        return file.readline()
+
+
+def _header_columns(path, header):
+    columns = [column.strip() for column in header.rstrip('\r\n').split(',')[1:]]
+    for column in columns:
+        label = column.split('::')
+        if len(label) != 2 or not label[1].isdigit():
+            raise ValueError(f"{path}: expected 'RATING::TENOR' columns after the date column, got '{column}'.")
+    return columns
+
+
+def read_schema(files, axes='union', max_workers=8):
+    """
+    Build the rating and tenor axes shared by the files from their headers.
+
+    Parameters:
+    - files: list of Path, Files in the wide layout.
+    - axes: str, 'first' takes the axes of the first file, and any other file quoting
+            a rating or tenor outside them is rejected; 'union' reads every header
+            (concurrently) and combines the axes, e.g. for vendors covering different ratings.
+    - max_workers: int, Number of threads reading headers.
+
+    Returns:
+    - _Schema: The axes, sorted like `load_bond_yields` (ratings lexically, tenors numerically).
+    """
+    if axes not in ('first', 'union'):
+        raise ValueError(f"Unknown axes mode '{axes}', expected 'first' or 'union'.")
+    if axes == 'first':
+        headers = {_read_header(files[0]): files[0]}
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            headers = {}
+            for path, header in zip(files, executor.map(_read_header, files)):
+                headers.setdefault(header, path)
+
+    columns = set()
+    for header, path in headers.items():
+        columns.update(_header_columns(path, header))
+    ratings, tenors, _, _ = split_wide_columns(sorted(columns))
+    return _Schema(ratings, tenors)
+
+
+def read_daily_file(path, schema, start_date=None, end_date=None, dtype=np.float64):
+    """
+    Parse one file in the wide 'RATING::TENOR' layout onto the schema's axes.
+
+    Parameters:
+    - path: Path, File with dates in the first column.
+    - schema: _Schema, Axes shared by all files (see `read_schema`).
+    - start_date: str, optional, First date to keep (inclusive).
+    - end_date: str, optional, Last date to keep (inclusive).
+    - dtype: numpy dtype, Type of the yields.
+
+    Returns:
+    - tuple: (dates as an array of str, values of shape (n_dates, n_ratings, n_tenors)).
+    """
+    with span('load.read_file'):
+        with open(path, 'r') as file:
+            header = file.readline()
+            columns, rating_positions, tenor_positions = schema.layout(path, header)
+            frame = pd.read_csv(file, header=None, index_col=0, names=['Date'] + columns,
+                                dtype=dict.fromkeys(columns, dtype))
+
+    dates = frame.index.astype(str).to_numpy()
+    keep = np.ones(len(dates), dtype=bool)
+    if start_date is not None:
+        keep &= dates >= str(start_date)
+    if end_date is not None:
+        keep &= dates <= str(end_date)
+
+    values = np.full((int(keep.sum()), len(schema.ratings), len(schema.tenors)), np.nan, dtype=dtype)
+    values[:, rating_positions, tenor_positions] = frame.to_numpy(dtype=dtype)[keep]
+    count('load.files')
+    count('load.rows', len(values))
+    return dates[keep], values
+
+
+def iter_files(source, max_workers=8, ordered=True, start_date=None, end_date=None, dtype=np.float64,
+               axes='union', schema=None):
+    """
+    Read the files of a multi-file source concurrently with a bounded thread pool.
+
+    At most `2 * max_workers` files are in flight, so memory stays bounded however many
+    files there are.
+
+    Parameters:
+    - source: str, Path or list, Directory, glob pattern or list of files (see `resolve_files`).
+    - max_workers: int, Number of reader threads.
+    - ordered: bool, Deliver files in sorted file order; otherwise as soon as each is parsed.
+    - start_date: str, optional, First date to keep (inclusive).
+    - end_date: str, optional, Last date to keep (inclusive).
+    - dtype: numpy dtype, Type of the yields.
+    - axes: str, See `read_schema`.
+    - schema: _Schema, optional, Axes to read onto, if already known.
+
+    Yields:
+    - tuple: (file position in the sorted order, path, dates, values) per file.
+    """
+    files = resolve_files(source)
+    schema = read_schema(files, axes, max_workers) if schema is None else schema
+    pending = deque()
+    next_file = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def submit(position):
+            future = executor.submit(read_daily_file, files[position], schema, start_date, end_date, dtype)
+            future.position = position
+            pending.append(future)
+
+        while next_file < len(files) and len(pending) < 2 * max_workers:
+            submit(next_file)
+            next_file += 1
+
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = min(done, key=lambda item: item.position)
+                pending.remove(future)
+            dates, values = future.result()
+            if next_file < len(files):
+                submit(next_file)
+                next_file += 1
+            yield future.position, files[future.position], dates, values
+
+
+def iter_multi_file_yields(source, max_workers=8, ordered=True, start_date=None, end_date=None,
+                           dtype=np.float64, axes='union'):
+    """
+    Lazily yield (date, DataFrame) pairs from a directory or glob of daily or vendor files.
+
+    Dates are yielded per file as the files are parsed; a date present in several files is
+    yielded once per file. Use `load_multi_file_yields` or `multi_file_to_cube` to merge them.
+
+    Parameters:
+    - See `iter_files`.
+
+    Yields:
+    - tuple: (date, DataFrame indexed by rating with tenors in days as columns).
+    """
+    files = resolve_files(source)
+    schema = read_schema(files, axes, max_workers)
+    rating_index = pd.Index(schema.ratings, name='Rating')
+    tenor_index = pd.Index(schema.tenors, name='Tenor')
+    for _, _, dates, values in iter_files(files, max_workers, ordered, start_date, end_date, dtype, schema=schema):
+        for date, matrix in zip(dates, values):
+            yield date, pd.DataFrame(matrix, index=rating_index, columns=tenor_index)
+
+
+def merge_quotes(rows, duplicates='error', date=None):
+    """
+    Merge several rating x tenor matrices of the same date cell by cell.
+
+    Parameters:
+    - rows: array of shape (k, n_ratings, n_tenors), In file order.
+    - duplicates: str, What to do when several rows quote the same cell: 'error' raises if the
+                  quotes differ, 'first' or 'last' keeps the quote of the first or last file.
+    - date: str, optional, Date used in error messages.
+
+    Returns:
+    - array of shape (n_ratings, n_tenors).
+    """
+    if duplicates not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unknown duplicates policy '{duplicates}', expected one of {DUPLICATE_POLICIES}.")
+    if len(rows) == 1:
+        return rows[0]
+
+    quoted = ~np.isnan(rows)
+    if duplicates == 'error':
+        spread = np.where(quoted, rows, -np.inf).max(axis=0) - np.where(quoted, rows, np.inf).min(axis=0)
+        if np.any((quoted.sum(axis=0) > 1) & (spread != 0)):
+            raise ValueError(f"Conflicting quotes for {date} in several files.")
+    if duplicates == 'last':
+        rows, quoted = rows[::-1], quoted[::-1]
+    source_row = np.argmax(quoted, axis=0)
+    return np.take_along_axis(rows, source_row[np.newaxis], axis=0)[0]
+
+
+def load_multi_file_yields(source, max_workers=8, start_date=None, end_date=None, duplicates='error',
+                           dtype=np.float64, axes='union'):
+    """
+    Load a directory or glob of daily or vendor files into the per-date dictionary of
+    `load_bond_yields`, merging dates found in several files.
+
+    Parameters:
+    - source: str, Path or list, Directory, glob pattern or list of files.
+    - max_workers: int, Number of reader threads.
+    - start_date: str, optional, First date to include (inclusive).
+    - end_date: str, optional, Last date to include (inclusive).
+    - duplicates: str, See `merge_quotes`.
+    - dtype: numpy dtype, Type of the yields.
+    - axes: str, See `read_schema`.
+
+    Returns:
+    - dict: Date -> DataFrame indexed by rating with tenors in days as columns, sorted by date.
+    """
+    files = resolve_files(source)
+    schema = read_schema(files, axes, max_workers)
+    quotes = {}
+    for position, _, dates, values in iter_files(files, max_workers, False, start_date, end_date, dtype,
+                                                  schema=schema):
+        for date, matrix in zip(dates, values):
+            quotes.setdefault(date, []).append((position, matrix))
+
+    rating_index = pd.Index(schema.ratings, name='Rating')
+    tenor_index = pd.Index(schema.tenors, name='Tenor')
+    result = {}
+    for date in sorted(quotes):
+        rows = np.stack([matrix for _, matrix in sorted(quotes[date], key=lambda item: item[0])])
+        result[date] = pd.DataFrame(merge_quotes(rows, duplicates, date), index=rating_index, columns=tenor_index)
+    return result
+
+
+def multi_file_to_cube(source, cube_path, max_workers=8, start_date=None, end_date=None, duplicates='error',
+                       dtype=np.float64, axes='union'):
+    """
+    Assemble a directory or glob of daily or vendor files into a memory-mapped cube directory.
+
+    Files are parsed concurrently and their rows streamed to disk in arrival order; the
+    rows are then sorted by date (and file order, for merging) while writing `yields.npy`,
+    so memory use does not grow with the number of files.
+
+    Parameters:
+    - source: str, Path or list, Directory, glob pattern or list of files.
+    - cube_path: str or Path, Output directory.
+    - max_workers: int, Number of reader threads.
+    - start_date: str, optional, First date to include (inclusive).
+    - end_date: str, optional, Last date to include (inclusive).
+    - duplicates: str, See `merge_quotes`.
+    - dtype: numpy dtype, Storage type of the yields.
+    - axes: str, See `read_schema`.
+
+    Returns:
+    - YieldCube: The written cube, opened memory-mapped.
+    """
+    files = resolve_files(source)
+    schema = read_schema(files, axes, max_workers)
+    cube_path = Path(cube_path)
+    cube_path.mkdir(parents=True, exist_ok=True)
+    raw_path = cube_path / (CUBE_VALUES_FILE + '.partial')
+
+    dates, positions = [], []
+    with open(raw_path, 'wb') as raw_file:
+        for position, _, file_dates, values in iter_files(files, max_workers, False, start_date, end_date,
+                                                          dtype, schema=schema):
+            raw_file.write(np.ascontiguousarray(values).tobytes())
+            dates.extend(file_dates)
+            positions.extend([position] * len(file_dates))
+
+    dates = np.asarray(dates, dtype=str)
+    order = np.lexsort((np.arange(len(dates)), np.asarray(positions), dates))
+    unique_dates, starts = np.unique(dates[order], return_index=True)
+    stops = np.append(starts[1:], len(order))
+
+    shape = (len(unique_dates), len(schema.ratings), len(schema.tenors))
+    raw = np.memmap(raw_path, dtype=dtype, mode='r', shape=(len(dates),) + shape[1:]) if len(dates) else None
+    cube_values = np.lib.format.open_memmap(cube_path / CUBE_VALUES_FILE, mode='w+', dtype=dtype, shape=shape)
+    with span('load.merge_files', dates=len(unique_dates)):
+        for i, date in enumerate(unique_dates):
+            cube_values[i] = merge_quotes(raw[order[starts[i]:stops[i]]], duplicates, date)
+    cube_values.flush()
+    del cube_values, raw
+    os.remove(raw_path)
+    _write_axes(cube_path, unique_dates, schema.ratings, schema.tenors)
+    return YieldCube.open(cube_path)
@@ -1,5 +1,11 @@
 from abc import ABC, abstractmethod
-import yaml
+
+import numpy as np
+import pandas as pd
+
+from bond_yield.data_processing.encoding import RAISE, LabelEncoder, ScaleVector, as_scale_vector
+from bond_yield.utils.date_frames import iter_date_frames
+from bond_yield.utils.profiling import span
 
 class BaseRatingConverter(ABC):
     def __init__(self):
@@ -18,6 +24,19 @@ class BaseRatingConverter(ABC):
         """
         pass
 
+    def convert_many(self, ratings):
+        """
+        Convert many ratings at once through a ScaleVector of `get_rating_scale()`; raises
+        ValueError if any rating is not in the scale.
+
+        Parameters:
+        - ratings (iterable or pd.Index): The ratings to convert.
+
+        Returns:
+        - np.ndarray: The numerical values, in the order of `ratings`.
+        """
+        return as_scale_vector(self.get_rating_scale(), default=RAISE).convert_many(ratings)
+
     def get_rating_scale(self):
         """
 
@@ -36,7 +55,8 @@ class SimpleRatingConverter(BaseRatingConverter):
         """
         super().__init__()
         if yaml_path:
-            # Load the rating map from a YAML file
+            # Load the rating map from a YAML file; yaml is only imported when a file is used
+            import yaml
             with open(yaml_path, 'r') as file:
                 self.rating_map = yaml.safe_load(file)
         elif rating_map:
@@ -44,6 +64,7 @@ class SimpleRatingConverter(BaseRatingConverter):
             self.rating_map = rating_map
         else:
             raise ValueError("A rating map must be provided either as a dictionary or a YAML file path.")
+        self.scale = ScaleVector.from_mapping(self.rating_map, default=RAISE)
 
     def convert(self, rating):
         """
@@ -60,14 +81,20 @@ class SimpleRatingConverter(BaseRatingConverter):
         else:
             raise ValueError(f"Rating '{rating}' not found in the rating map.")
 
-def get_rating_scale(self):
-    """
-    Retrieve the rating scale mapping used by the converter.
+    def convert_many(self, ratings):
+        """
+        Convert many ratings at once; raises ValueError if any rating is not in the map.
+        """
+        return self.scale.convert_many(ratings)
 
-    Returns:
-    dict: A dictionary mapping rating labels to numerical values.
-    """
-    return self.rating_map
+    def get_rating_scale(self):
+        """
+        Retrieve the rating scale mapping used by the converter.
+
+        Returns:
+        dict: A dictionary mapping rating labels to numerical values.
+        """
+        return self.rating_map
 
 class YieldBasedRatingConverter(BaseRatingConverter):
     def __init__(self, bond_yield_df):
@@ -80,7 +107,14 @@ class YieldBasedRatingConverter(BaseRatingConverter):
         """
         super().__init__()
         self.bond_yield_df = bond_yield_df
-        self.rating_scale = self.calculate_rating_scales()
+        self.scale = ScaleVector.from_mapping(self.calculate_rating_scales(), default=0)
+
+    @property
+    def rating_scale(self):
+        """
+        The average yield of each rating as a rating label -> value dict.
+        """
+        return self.scale.to_dict()
 
     def convert(self, rating):
         """
@@ -92,7 +126,13 @@ class YieldBasedRatingConverter(BaseRatingConverter):
         Returns:
         - float: The average yield for the given rating, or 0 if the rating is not found.
         """
-        return self.rating_scale.get(rating, 0)
+        return self.scale.convert(rating)
+
+    def convert_many(self, ratings):
+        """
+        Convert many ratings at once; ratings not in the DataFrame give 0.
+        """
+        return self.scale.convert_many(ratings)
 
     def calculate_rating_scales(self):
         """
@@ -101,7 +141,12 @@ class YieldBasedRatingConverter(BaseRatingConverter):
         Returns:
         dict: A dictionary mapping each rating to its average yield.
         """
-        return self.bond_yield_df.mean(axis=1).to_dict()
+        with span('rating.yield_scale', ratings=len(self.bond_yield_df.index)):
+            values = self.bond_yield_df.to_numpy(dtype=float)
+            quoted = ~np.isnan(values)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = np.where(quoted, values, 0).sum(axis=1) / quoted.sum(axis=1)
+            return dict(zip(self.bond_yield_df.index, means.tolist()))
 
     def get_rating_scale(self):
         """
@@ -111,4 +156,156 @@ class YieldBasedRatingConverter(BaseRatingConverter):
         Returns:
         dict: A dictionary mapping rating labels to average yields.
         """
-        return self.rating_scale
+        return self.scale.to_dict()
+
+
+ROLLING_METHODS = ('simple', 'exponential')
+
+
+def rolling_rating_scales(values, window=1, method='simple'):
+    """
+    Average yield of every rating on every date, over a trailing window of dates, in one pass.
+
+    Each date contributes the sum and the number of its quotes per rating; a window's scale is
+    the sum of its quotes divided by their number, so missing quotes are ignored and dates with
+    more quotes weigh more. With 'exponential' both are exponentially weighted moving sums with
+    alpha = 2 / (window + 1), computed by a first-order linear filter along the date axis.
+
+    Parameters:
+    - values: array of shape (n_dates, n_ratings, n_tenors), Yields with NaN for missing quotes.
+    - window: int, Dates in the simple window, or span of the exponential one; 1 gives per-date scales.
+    - method: str, 'simple' or 'exponential'.
+
+    Returns:
+    - np.ndarray of shape (n_dates, n_ratings): NaN where a rating has no quote in the window.
+    """
+    if method not in ROLLING_METHODS:
+        raise ValueError(f"Unknown rolling method '{method}', expected one of {ROLLING_METHODS}.")
+    if window < 1:
+        raise ValueError(f"Window must be at least 1 date, got {window}.")
+    values = np.asarray(values, dtype=float)
+    quoted = ~np.isnan(values)
+    sums = np.where(quoted, values, 0).sum(axis=2)
+    counts = quoted.sum(axis=2).astype(float)
+
+    with span('rating.rolling_scales', dates=values.shape[0], ratings=values.shape[1], method=method):
+        if method == 'simple':
+            # Trailing window sums as differences of cumulative sums
+            cumulative_sums = np.cumsum(np.vstack((np.zeros((1, sums.shape[1])), sums)), axis=0)
+            cumulative_counts = np.cumsum(np.vstack((np.zeros((1, counts.shape[1])), counts)), axis=0)
+            starts = np.maximum(np.arange(1, len(sums) + 1) - window, 0)
+            window_sums = cumulative_sums[1:] - cumulative_sums[starts]
+            window_counts = cumulative_counts[1:] - cumulative_counts[starts]
+        else:
+            # scipy.signal is slow to import, so it is only loaded for exponential scales
+            from scipy.signal import lfilter
+            alpha = 2 / (window + 1)
+            window_sums = lfilter([alpha], [1, alpha - 1], sums, axis=0)
+            window_counts = lfilter([alpha], [1, alpha - 1], counts, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+
+class RollingYieldRatingConverter(BaseRatingConverter):
+    def __init__(self, values, dates, ratings, window=1, method='simple'):
+        """
+        Yield-based rating scales of a whole history, smoothed over a trailing window of dates.
+
+        Parameters:
+        - values: array of shape (n_dates, n_ratings, n_tenors), Yields with NaN for missing quotes.
+        - dates: list, Date of each slice of `values`, in order.
+        - ratings: list, Rating of each row of `values`.
+        - window: int, See `rolling_rating_scales`.
+        - method: str, 'simple' or 'exponential'.
+
+        A rating without quotes in a window keeps its last scale, so `scales` is NaN only before
+        a rating's first quote.
+        """
+        super().__init__()
+        self.date_encoder = LabelEncoder(dates)
+        self.rating_encoder = LabelEncoder(ratings)
+        self.window = window
+        self.method = method
+        scales = rolling_rating_scales(values, window, method)
+        # Forward fill along the dates: each cell takes the scale of the last date that had one
+        last = np.maximum.accumulate(np.where(np.isnan(scales), 0, np.arange(len(scales))[:, np.newaxis]), axis=0)
+        self.scales = scales[last, np.arange(scales.shape[1])]
+
+    @classmethod
+    def from_cube(cls, cube, window=1, method='simple'):
+        """
+        Build the scales of every date of a YieldCube.
+        """
+        return cls(np.asarray(cube.values), cube.dates, cube.ratings, window, method)
+
+    @classmethod
+    def from_date_dataframes(cls, date_dataframes, window=1, method='simple'):
+        """
+        Build the scales of a per-date dict (or (date, DataFrame) pairs) such as `load_bond_yields` returns,
+        on the union of their ratings and tenors.
+        """
+        items = list(iter_date_frames(date_dataframes))
+        ratings = pd.Index([rating for _, df in items for rating in df.index]).unique()
+        tenors = pd.Index([tenor for _, df in items for tenor in df.columns]).unique()
+        if not items:
+            raise ValueError("No dates to build rating scales from.")
+        values = np.stack([df.reindex(index=ratings, columns=tenors).to_numpy(dtype=float) for _, df in items])
+        return cls(values, [date for date, _ in items], ratings, window, method)
+
+    @property
+    def dates(self):
+        return list(self.date_encoder.labels)
+
+    @property
+    def ratings(self):
+        return list(self.rating_encoder.labels)
+
+    def scale_at(self, date):
+        """
+        Returns:
+        - ScaleVector: The rating scale of `date`, 0 for ratings outside the history.
+        """
+        position = self.date_encoder.encode([date])[0]
+        if position < 0:
+            raise KeyError(f"No rating scale for date '{date}'.")
+        return ScaleVector(self.rating_encoder, self.scales[position], default=0)
+
+    def values_for(self, date, ratings):
+        """
+        Rating values of `date` aligned with `ratings` (e.g. a DataFrame's index); raises
+        ValueError for ratings that have not been quoted up to `date`.
+        """
+        values = self.scale_at(date).convert_many(ratings)
+        if np.isnan(values).any():
+            unquoted = list(pd.Index(list(ratings))[np.isnan(values)])
+            raise ValueError(f"No rating scale for ratings {unquoted} on '{date}': they have no quote up to that date.")
+        return values
+
+    def convert(self, rating):
+        """
+        Convert a rating with the scale of the last date.
+        """
+        return self.scale_at(self.dates[-1]).convert(rating)
+
+    def convert_many(self, ratings):
+        """
+        Convert many ratings with the scale of the last date; ratings outside the history give 0.
+        """
+        return self.scale_at(self.dates[-1]).convert_many(ratings)
+
+    def get_rating_scale(self):
+        """
+        Retrieve the scale of the last date.
+
+        Returns:
+        dict: A dictionary mapping rating labels to smoothed average yields.
+        """
+        return self.scale_at(self.dates[-1]).to_dict()
+
+    def to_frame(self):
+        """
+        Returns:
+        - DataFrame: Scales with one row per date and one column per rating.
+        """
+        return pd.DataFrame(self.scales, index=pd.Index(self.dates, name='Date'),
+                            columns=pd.Index(self.ratings, name='Rating'))
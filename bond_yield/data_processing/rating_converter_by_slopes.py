@@ -1,36 +1,33 @@
 
 from abc import ABC, abstractmethod
+from types import MappingProxyType
+
 import numpy as np
-import pandas as pd
-from scipy.optimize import minimize, Bounds
 
+from bond_yield.data_processing.encoding import ScaleVector
 from bond_yield.data_processing.rating_converter import BaseRatingConverter
+from bond_yield.utils.profiling import count, span
 
 class ObjectiveStrategy(ABC):
     def __init__(self, bond_yield_df=None):
         self.bond_yield_df = bond_yield_df
 
     def calculate_slope_difference(self, rating_values):
-        total_difference = 0
-        for j, tenor in enumerate(self.bond_yield_df.columns):
-            for i in range(len(rating_values) - 2):
-                if self.is_valid_data(i, j, rating_values):
-                    k_ij, k_i1j = self.compute_slopes(i, j, rating_values)
-                    total_difference += self.calculate(k_ij, k_i1j)
-        return total_difference
-
-    def is_valid_data(self, i, j, rating_values):
-        # Check if the required bond yield data points are non-NaN and the rating differences are non-zero
-        y_values = self.bond_yield_df.iloc[i:i+3, j]
-        r_values = rating_values[i:i+3]
-        return all(pd.notna(y_values)) and all(r_values[k+1] != r_values[k] for k in range(2))
-
-    def compute_slopes(self, i, j, rating_values):
-        y_i, y_i1, y_i2 = self.bond_yield_df.iloc[i:i+3, j]
-        r_i, r_i1, r_i2 = rating_values[i:i+3]
-        k_ij = (y_i1 - y_i) / (r_i1 - r_i)
-        k_i1j = (y_i2 - y_i1) / (r_i2 - r_i1)
-        return k_ij, k_i1j
+        # All (rating triple, tenor) pairs are scored at once: rows i, i+1, i+2 of the yield
+        # matrix give the two slopes k_ij and k_i1j of every tenor column j
+        rating_values = np.asarray(rating_values, dtype=float)
+        if len(rating_values) < 3:
+            return 0
+        yields = self.bond_yield_df.to_numpy(dtype=float)[:len(rating_values)]
+        steps = np.diff(rating_values)
+        valid = (~np.isnan(yields[:-2]) & ~np.isnan(yields[1:-1]) & ~np.isnan(yields[2:])
+                 & (steps[:-1] != 0)[:, None] & (steps[1:] != 0)[:, None])
+        if not valid.any():
+            return 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            k_ij = (yields[1:-1] - yields[:-2]) / steps[:-1, None]
+            k_i1j = (yields[2:] - yields[1:-1]) / steps[1:, None]
+        return self.calculate(k_ij[valid], k_i1j[valid]).sum()
 
     @abstractmethod
     def calculate(self, k_ij, k_i1j):
@@ -38,26 +35,40 @@ class ObjectiveStrategy(ABC):
 
 class AbsoluteDifferenceStrategy(ObjectiveStrategy):
     def calculate(self, k_ij, k_i1j):
-        return abs(k_ij - k_i1j)
+        return np.abs(k_ij - k_i1j)
 
 class SquaredDifferenceStrategy(ObjectiveStrategy):
     def calculate(self, k_ij, k_i1j):
         return (k_ij - k_i1j) ** 2
 
-
-from scipy.optimize import minimize, Bounds
-
 class SlopeMinimizingRatingConverter(BaseRatingConverter):
     def __init__(self, initial_ratings, strategy):
-        self.ratings = initial_ratings
+        self.scale = ScaleVector.from_mapping(initial_ratings, default=0)
         self.strategy = strategy
 
+    @property
+    def ratings(self):
+        """
+        The current rating scale as a read-only rating label -> value mapping; assign a new
+        mapping to `ratings` to change it.
+        """
+        return MappingProxyType(self.scale.to_dict())
+
+    @ratings.setter
+    def ratings(self, ratings):
+        self.scale = ScaleVector.from_mapping(ratings, default=0)
+
     def convert(self, rating):
-        return self.ratings.get(rating, 0)
+        return self.scale.convert(rating)
+
+    def convert_many(self, ratings):
+        return self.scale.convert_many(ratings)
 
     def optimize_ratings(self, bounds=None, constraints=None):
-        initial_values = list(self.ratings.values())
-        rating_labels = list(self.ratings.keys())
+        # scipy.optimize is slow to import, so it is only loaded once an optimization runs
+        from scipy.optimize import minimize
+
+        initial_values = self.scale.values
 
         options = {'method': 'SLSQP'}
         if bounds:
@@ -65,11 +76,12 @@ class SlopeMinimizingRatingConverter(BaseRatingConverter):
         if constraints:
             options['constraints'] = constraints
 
-        result = minimize(self.strategy.calculate_slope_difference, initial_values, **options)
+        with span('rating.optimize', ratings=len(initial_values)):
+            result = minimize(self.strategy.calculate_slope_difference, initial_values, **options)
+        count('rating.objective_evaluations', result.nfev)
 
         if result.success:
-            optimized_values = result.x
-            self.ratings = dict(zip(rating_labels, optimized_values))
+            self.scale = self.scale.with_values(result.x)
         else:
             print("Optimization failed:", result.message)
 
@@ -80,4 +92,4 @@ class SlopeMinimizingRatingConverter(BaseRatingConverter):
         Returns:
         dict: A dictionary mapping rating labels to their optimized numerical values.
         """
-        return self.ratings
+        return self.scale.to_dict()
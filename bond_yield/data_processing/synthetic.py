@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+from bond_yield.data_processing.yield_cube import YieldCube, write_wide_csv
+
+DEFAULT_RATINGS = ['AAA', 'AA', 'A', 'BBB', 'BB', 'B', 'CCC', 'CC', 'C', 'D']
+
+MISSING_PATTERNS = ('none', 'random', 'runs', 'illiquid')
+
+
+def make_rating_labels(n_ratings):
+    """
+    Rating labels from best to worst: the agency-style labels when there are at most ten,
+    otherwise zero-padded 'R001', 'R002', ... so that sorting keeps the credit order.
+    """
+    if n_ratings <= len(DEFAULT_RATINGS):
+        return DEFAULT_RATINGS[:n_ratings]
+    width = len(str(n_ratings))
+    return [f'R{i:0{width}d}' for i in range(1, n_ratings + 1)]
+
+
+def credit_rating_map(n_ratings):
+    """
+    Credit rank of each label of `make_rating_labels(n_ratings)`, 1 for the best: the ordinal
+    rating map of a synthetic cube, whose rating axis is sorted lexically rather than by credit.
+    """
+    return {rating: rank for rank, rating in enumerate(make_rating_labels(n_ratings), 1)}
+
+
+def make_tenors(n_tenors):
+    """
+    Tenors in days, one per year: 365, 730, ...
+    """
+    return [365 * year for year in range(1, n_tenors + 1)]
+
+
+def _nelson_siegel_loadings(tenor_years, decay):
+    x = tenor_years / decay
+    slope = (1 - np.exp(-x)) / x
+    return slope, slope - np.exp(-x)
+
+
+def _missing_mask(pattern, shape, missing_fraction, rng):
+    n_dates, n_ratings, n_tenors = shape
+    if pattern == 'none' or missing_fraction <= 0:
+        return np.zeros(shape, dtype=bool)
+    if pattern == 'random':
+        return rng.random(shape) < missing_fraction
+    if pattern == 'illiquid':
+        # Low-quality ratings and the ends of the curve are quoted less often
+        rating_weight = np.linspace(0.5, 1.5, n_ratings)[:, None]
+        tenor_weight = 1 + 0.5 * np.abs(np.linspace(-1, 1, n_tenors))[None, :]
+        probability = np.clip(missing_fraction * rating_weight * tenor_weight, 0, 1)
+        return rng.random(shape) < probability
+    if pattern == 'runs':
+        # Two-state Markov chain per cell: gaps persist for about five days on average
+        leave_gap = 0.2
+        enter_gap = leave_gap * missing_fraction / max(1 - missing_fraction, 1e-12)
+        draws = rng.random(shape)
+        mask = np.empty(shape, dtype=bool)
+        mask[0] = draws[0] < missing_fraction
+        for day in range(1, n_dates):
+            mask[day] = np.where(mask[day - 1], draws[day] >= leave_gap, draws[day] < enter_gap)
+        return mask
+    raise ValueError(f"Unknown missing pattern '{pattern}', expected one of {MISSING_PATTERNS}.")
+
+
+def generate_yield_cube(n_dates=250, n_ratings=10, n_tenors=10, start_date='2000-01-03', business_days=True,
+                        missing_pattern='random', missing_fraction=0.1, min_quotes_per_rating=3, noise=0.0005,
+                        seed=None, dtype=np.float64):
+    """
+    Generate a realistic synthetic yield history as an in-memory cube.
+
+    Each date's risk-free curve follows a Nelson-Siegel shape whose level, slope and curvature
+    factors evolve as random walks. Credit spreads grow with rating and with tenor and share a
+    common credit-cycle factor. After adding noise, yields are made non-decreasing in credit
+    quality (the order of `make_rating_labels`). The rating axis of the cube is then sorted
+    lexically, the way `load_bond_yields` orders ratings, so that a cube and its CSV round trip
+    line up. Everything is drawn in whole-array operations, so generation runs at millions of cells per second.
+
+    Parameters:
+    - n_dates: int, History length.
+    - n_ratings: int, Number of ratings.
+    - n_tenors: int, Number of yearly tenors.
+    - start_date: str, First date.
+    - business_days: bool, Use weekdays only for the date axis.
+    - missing_pattern: str, One of 'none', 'random', 'runs' (gaps that persist over consecutive
+                       dates) or 'illiquid' (more gaps for low ratings and the curve ends).
+    - missing_fraction: float, Approximate fraction of missing cells.
+    - min_quotes_per_rating: int, Quotes kept for every rating and date regardless of the pattern,
+                             so every date can be fitted.
+    - noise: float, Standard deviation of the idiosyncratic yield noise.
+    - seed: int, optional, Seed of the random generator.
+    - dtype: numpy dtype, Storage type of the yields.
+
+    Returns:
+    - YieldCube: Cube with NaN for missing quotes.
+    """
+    rng = np.random.default_rng(seed)
+    frequency = 'B' if business_days else 'D'
+    dates = pd.date_range(start=start_date, periods=n_dates, freq=frequency).strftime('%Y-%m-%d')
+    ratings = make_rating_labels(n_ratings)
+    tenors = make_tenors(n_tenors)
+    tenor_years = np.asarray(tenors, dtype=float) / 365
+
+    # Risk-free term structure: random-walk Nelson-Siegel factors
+    start = np.array([0.03, -0.01, 0.005])
+    factor_vol = np.array([0.0003, 0.0003, 0.0005])
+    factors = start + np.cumsum(rng.standard_normal((n_dates, 3)) * factor_vol, axis=0)
+    slope_loading, curvature_loading = _nelson_siegel_loadings(tenor_years, decay=2.0)
+    base_curve = (factors[:, [0]] + factors[:, [1]] * slope_loading + factors[:, [2]] * curvature_loading)
+
+    # Credit spreads: positive increments per notch, scaled by a common credit-cycle factor
+    # (from about 30bp for the best rating to about 25% for the worst, whatever the number of ratings)
+    quality = np.linspace(0, 1, n_ratings)
+    spread_curve = 0.003 + 0.25 * np.expm1(3 * quality) / np.expm1(3)
+    notch_spreads = np.cumsum(np.diff(spread_curve, prepend=0) * rng.uniform(0.8, 1.2, n_ratings))
+    credit_cycle = np.exp(np.cumsum(rng.standard_normal(n_dates) * 0.01))
+    spread_term = 1 + 0.3 * (1 - np.exp(-tenor_years / 3))
+    spreads = credit_cycle[:, None, None] * notch_spreads[None, :, None] * spread_term[None, None, :]
+
+    values = base_curve[:, None, :] + spreads
+    if noise > 0:
+        values += rng.standard_normal(values.shape) * noise
+    values = np.maximum.accumulate(values, axis=1)
+
+    mask = _missing_mask(missing_pattern, values.shape, missing_fraction, rng)
+    if min_quotes_per_rating > 0:
+        # Always keep the min_quotes_per_rating cells with the smallest random keys in each row
+        keys = rng.random(values.shape)
+        ranks = np.argsort(np.argsort(keys, axis=2), axis=2)
+        mask &= ranks >= min_quotes_per_rating
+    values[mask] = np.nan
+
+    order = np.argsort(ratings, kind='stable')
+    return YieldCube(values[:, order].astype(dtype, copy=False), dates, [ratings[i] for i in order], tenors)
+
+
+def write_synthetic_csv(csv_path, chunksize=1024, **kwargs):
+    """
+    Generate a history with `generate_yield_cube(**kwargs)` and write it in the wide CSV layout.
+
+    Returns:
+    - YieldCube: The generated cube.
+    """
+    cube = generate_yield_cube(**kwargs)
+    write_wide_csv(cube, csv_path, chunksize)
+    return cube
+
+
+def write_synthetic_cube(cube_path, **kwargs):
+    """
+    Generate a history with `generate_yield_cube(**kwargs)` and save it as a cube directory.
+
+    Returns:
+    - YieldCube: The written cube, opened memory-mapped.
+    """
+    generate_yield_cube(**kwargs).save(cube_path)
+    return YieldCube.open(cube_path)
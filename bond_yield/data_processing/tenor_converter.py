@@ -1,6 +1,10 @@
 from abc import ABC, abstractmethod
-import pandas as pd
-from scipy.optimize import minimize
+from types import MappingProxyType
+
+import numpy as np
+
+from bond_yield.data_processing.encoding import ScaleVector
+from bond_yield.utils.profiling import count, span
 
 class BaseTenorConverter(ABC):
     def __init__(self):
@@ -43,26 +47,21 @@ class TenorBasedObjectiveStrategy(ABC):
         self.bond_yield_df = bond_yield_df
 
     def calculate_slope_difference(self, tenor_values):
-        total_difference = 0
-        for i, rating in enumerate(self.bond_yield_df.index):
-            for j in range(len(tenor_values) - 2):
-                if self.is_valid_data(i, j, tenor_values):
-                    k_j, k_j1 = self.compute_slopes(i, j, tenor_values)
-                    total_difference += self.calculate(k_j, k_j1)
-        return total_difference
-
-    def is_valid_data(self, i, j, tenor_values):
-        # Check if the required bond yield data points are non-NaN and the tenor differences are non-zero
-        y_values = self.bond_yield_df.iloc[i, j:j+3]
-        t_values = tenor_values[j:j+3]
-        return all(pd.notna(y_values)) and all(t_values[k+1] != t_values[k] for k in range(2))
-
-    def compute_slopes(self, i, j, tenor_values):
-        y_j, y_j1, y_j2 = self.bond_yield_df.iloc[i, j:j+3]
-        t_j, t_j1, t_j2 = tenor_values[j:j+3]
-        k_j = (y_j1 - y_j) / (t_j1 - t_j)
-        k_j1 = (y_j2 - y_j1) / (t_j2 - t_j1)
-        return k_j, k_j1
+        # All (rating, tenor triple) pairs are scored at once: columns j, j+1, j+2 of the yield
+        # matrix give the two slopes k_j and k_j1 of every rating row
+        tenor_values = np.asarray(tenor_values, dtype=float)
+        if len(tenor_values) < 3:
+            return 0
+        yields = self.bond_yield_df.to_numpy(dtype=float)[:, :len(tenor_values)]
+        steps = np.diff(tenor_values)
+        valid = (~np.isnan(yields[:, :-2]) & ~np.isnan(yields[:, 1:-1]) & ~np.isnan(yields[:, 2:])
+                 & (steps[:-1] != 0) & (steps[1:] != 0))
+        if not valid.any():
+            return 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            k_j = (yields[:, 1:-1] - yields[:, :-2]) / steps[:-1]
+            k_j1 = (yields[:, 2:] - yields[:, 1:-1]) / steps[1:]
+        return self.calculate(k_j[valid], k_j1[valid]).sum()
 
     @abstractmethod
     def calculate(self, k_j, k_j1):
@@ -71,7 +70,7 @@ class TenorBasedObjectiveStrategy(ABC):
 # Implement the specific strategies for absolute and squared differences
 class TenorAbsoluteDifferenceStrategy(TenorBasedObjectiveStrategy):
     def calculate(self, k_j, k_j1):
-        return abs(k_j - k_j1)
+        return np.abs(k_j - k_j1)
 
 class TenorSquaredDifferenceStrategy(TenorBasedObjectiveStrategy):
     def calculate(self, k_j, k_j1):
@@ -79,15 +78,32 @@ class TenorSquaredDifferenceStrategy(TenorBasedObjectiveStrategy):
 
 class TenorMinimizingTenorConverter(BaseTenorConverter):
     def __init__(self, initial_tenor_values, strategy):
-        self.tenor_values = initial_tenor_values
+        self.scale = ScaleVector.from_mapping(initial_tenor_values, default=0)
         self.strategy = strategy
 
+    @property
+    def tenor_values(self):
+        """
+        The current tenor scale as a read-only tenor label -> value mapping; assign a new
+        mapping to `tenor_values` to change it.
+        """
+        return MappingProxyType(self.scale.to_dict())
+
+    @tenor_values.setter
+    def tenor_values(self, tenor_values):
+        self.scale = ScaleVector.from_mapping(tenor_values, default=0)
+
     def convert(self, tenor):
-        return self.tenor_values.get(tenor, 0)
+        return self.scale.convert(tenor)
+
+    def convert_many(self, tenors):
+        return self.scale.convert_many(tenors)
 
     def optimize_tenors(self, bounds=None, constraints=None):
-        initial_values = list(self.tenor_values.values())
-        tenor_labels = list(self.tenor_values.keys())
+        # scipy.optimize is slow to import, so it is only loaded once an optimization runs
+        from scipy.optimize import minimize
+
+        initial_values = self.scale.values
 
         options = {'method': 'SLSQP'}
         if bounds:
@@ -95,15 +111,14 @@ class TenorMinimizingTenorConverter(BaseTenorConverter):
         if constraints:
             options['constraints'] = constraints
 
-        result = minimize(self.strategy.calculate_slope_difference, initial_values, **options)
+        with span('tenor.optimize', tenors=len(initial_values)):
+            result = minimize(self.strategy.calculate_slope_difference, initial_values, **options)
+        count('tenor.objective_evaluations', result.nfev)
 
         if result.success:
-            optimized_values = result.x
-            self.tenor_values = dict(zip(tenor_labels, optimized_values))
+            self.scale = self.scale.with_values(result.x)
         else:
             print("Optimization failed:", result.message)
 
     def get_tenor_scale(self):
-        return self.tenor_values
-
-
+        return self.scale.to_dict()
@@ -0,0 +1,366 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bond_yield.data_processing.encoding import LabelEncoder, code_dtype
+
+CUBE_VALUES_FILE = 'yields.npy'
+CUBE_DATES_FILE = 'dates.npy'
+CUBE_AXES_FILE = 'axes.json'
+
+
+def split_wide_columns(columns):
+    """
+    Split wide-layout column labels of the form 'RATING::TENOR' into cube axes.
+
+    The axes are sorted the same way `load_bond_yields` orders its per-date
+    DataFrames (ratings lexically, tenors numerically).
+
+    Parameters:
+    - columns: iterable of str, Column labels of the wide CSV (without the date column).
+
+    Returns:
+    - tuple: (ratings, tenors, rating_positions, tenor_positions) where the positions
+             give, for every column, its index along the rating and tenor axes.
+    """
+    labels = [col.split("::") for col in columns]
+    column_ratings = [rating for rating, _ in labels]
+    column_tenors = [int(tenor) for _, tenor in labels]
+
+    ratings = sorted(set(column_ratings))
+    tenors = sorted(set(column_tenors))
+
+    rating_positions = LabelEncoder(ratings).encode(column_ratings)
+    tenor_positions = LabelEncoder(tenors).encode(column_tenors)
+    return ratings, tenors, rating_positions, tenor_positions
+
+
+class YieldCube:
+    """
+    Dense dates x ratings x tenors yield array with its axis labels.
+
+    A cube opened from disk keeps the yields memory-mapped, so opening it does not
+    depend on the history length and slicing a date range only touches those rows.
+    """
+
+    def __init__(self, values, dates, ratings, tenors):
+        """
+        Parameters:
+        - values: array-like, shape (n_dates, n_ratings, n_tenors), Yields with NaN for missing cells.
+        - dates: array-like of str, ISO-formatted dates in increasing order.
+        - ratings: list of str, Rating labels.
+        - tenors: list of int, Tenors in days.
+        """
+        self.values = values
+        self.dates = np.asarray(dates, dtype=str)
+        self.ratings = list(ratings)
+        self.tenors = [int(tenor) for tenor in tenors]
+
+        expected_shape = (len(self.dates), len(self.ratings), len(self.tenors))
+        if tuple(self.values.shape) != expected_shape:
+            raise ValueError(f"Yield array has shape {self.values.shape}, expected {expected_shape} from the axes.")
+
+    @classmethod
+    def open(cls, cube_path, mmap_mode='r'):
+        """
+        Open a cube directory written by `save` or `csv_to_cube`.
+
+        Parameters:
+        - cube_path: str or Path, Directory holding the cube files.
+        - mmap_mode: str or None, Passed to `np.load`; None reads the yields into memory.
+
+        Returns:
+        - YieldCube: The opened cube.
+        """
+        cube_path = Path(cube_path)
+        with open(cube_path / CUBE_AXES_FILE, 'r') as file:
+            axes = json.load(file)
+        values = np.load(cube_path / CUBE_VALUES_FILE, mmap_mode=mmap_mode)
+        dates = np.load(cube_path / CUBE_DATES_FILE)
+        return cls(values, dates, axes['ratings'], axes['tenors'])
+
+    def save(self, cube_path):
+        """
+        Write the cube to a directory as `yields.npy`, `dates.npy` and `axes.json`.
+
+        Parameters:
+        - cube_path: str or Path, Target directory, created if needed.
+        """
+        cube_path = Path(cube_path)
+        cube_path.mkdir(parents=True, exist_ok=True)
+        np.save(cube_path / CUBE_VALUES_FILE, np.asarray(self.values))
+        _write_axes(cube_path, self.dates, self.ratings, self.tenors)
+
+    @property
+    def shape(self):
+        return tuple(self.values.shape)
+
+    def date_positions(self, start_date=None, end_date=None):
+        """
+        Locate an inclusive date range in the date index.
+
+        Parameters:
+        - start_date: str, optional, First date to include (ISO format).
+        - end_date: str, optional, Last date to include (ISO format).
+
+        Returns:
+        - slice: Positions along the date axis covering the range.
+        """
+        start = 0 if start_date is None else int(np.searchsorted(self.dates, str(start_date), side='left'))
+        stop = len(self.dates) if end_date is None else int(np.searchsorted(self.dates, str(end_date), side='right'))
+        return slice(start, max(start, stop))
+
+    def date_slice(self, start_date=None, end_date=None):
+        """
+        Return the sub-cube for an inclusive date range without reading other dates.
+
+        Returns:
+        - YieldCube: A cube whose values are a view on this cube's values.
+        """
+        positions = self.date_positions(start_date, end_date)
+        return YieldCube(self.values[positions], self.dates[positions], self.ratings, self.tenors)
+
+    def frame_at(self, position, dtype=None):
+        """
+        Build the rating x tenor DataFrame of one date, in the `load_bond_yields` layout.
+
+        Parameters:
+        - position: int, Position along the date axis.
+        - dtype: numpy dtype, optional, Type of the values; defaults to the cube's storage type.
+
+        Returns:
+        - pd.DataFrame: Index 'Rating', columns 'Tenor'; the values are an in-memory copy.
+        """
+        return pd.DataFrame(np.array(self.values[position], dtype=dtype),
+                            index=pd.Index(self.ratings, name='Rating'),
+                            columns=pd.Index(self.tenors, name='Tenor'))
+
+    def to_date_dataframes(self, dtype=None):
+        """
+        Convert the cube into the per-date dictionary returned by `load_bond_yields`.
+
+        Parameters:
+        - dtype: numpy dtype, optional, Type of the values; defaults to the cube's storage type.
+
+        Returns:
+        - dict: Date string -> rating x tenor DataFrame.
+        """
+        return {date: self.frame_at(i, dtype) for i, date in enumerate(self.dates)}
+
+    def to_observations(self, dtype=np.float32, chunksize=1024):
+        """
+        Convert the quoted (non-NaN) cells into compact long-form arrays: small integer codes
+        for the date, rating and tenor of each quote plus its yield. Codes index into
+        `dates`, `ratings` and `tenors`.
+
+        Parameters:
+        - dtype: numpy dtype, Type of the yields.
+        - chunksize: int, Number of dates read from the (memory-mapped) values at a time.
+
+        Returns:
+        - dict: 'date_code', 'rating_code', 'tenor_code' and 'yield' arrays of equal length.
+        """
+        parts = {'date_code': [], 'rating_code': [], 'tenor_code': [], 'yield': []}
+        for start in range(0, len(self.dates), chunksize):
+            block = np.asarray(self.values[start:start + chunksize])
+            date_code, rating_code, tenor_code = np.nonzero(~np.isnan(block))
+            parts['date_code'].append((date_code + start).astype(code_dtype(len(self.dates))))
+            parts['rating_code'].append(rating_code.astype(code_dtype(len(self.ratings))))
+            parts['tenor_code'].append(tenor_code.astype(code_dtype(len(self.tenors))))
+            parts['yield'].append(block[date_code, rating_code, tenor_code].astype(dtype))
+        empty_types = {'date_code': code_dtype(len(self.dates)), 'rating_code': code_dtype(len(self.ratings)),
+                       'tenor_code': code_dtype(len(self.tenors)), 'yield': dtype}
+        return {name: np.concatenate(arrays) if arrays else np.empty(0, empty_types[name])
+                for name, arrays in parts.items()}
+
+    def to_wide_frame(self):
+        """
+        Convert the cube into the wide layout of the historical CSV ('RATING::TENOR' columns).
+
+        Returns:
+        - pd.DataFrame: One row per date.
+        """
+        columns = [f'{rating}::{tenor}' for rating in self.ratings for tenor in self.tenors]
+        values = np.asarray(self.values).reshape(len(self.dates), -1)
+        return pd.DataFrame(values, index=self.dates, columns=columns)
+
+
+def _write_axes(cube_path, dates, ratings, tenors):
+    np.save(cube_path / CUBE_DATES_FILE, np.asarray(dates, dtype=str))
+    with open(cube_path / CUBE_AXES_FILE, 'w') as file:
+        json.dump({'ratings': list(ratings), 'tenors': [int(tenor) for tenor in tenors]}, file)
+
+
+def _count_data_rows(csv_path):
+    with open(csv_path, 'r') as file:
+        return max(sum(1 for _ in file) - 1, 0)
+
+
+def csv_to_cube(csv_path, cube_path, chunksize=1024, dtype=np.float64):
+    """
+    Convert a wide historical CSV into a memory-mapped cube directory.
+
+    The CSV is read in row chunks that are written straight into the `.npy` file,
+    so memory use is bounded by the chunk size rather than the history length.
+
+    Parameters:
+    - csv_path: str or Path, Wide CSV with dates in the first column and 'RATING::TENOR' columns.
+    - cube_path: str or Path, Output directory.
+    - chunksize: int, Number of CSV rows parsed at a time.
+    - dtype: numpy dtype, Storage type of the yields.
+
+    Returns:
+    - YieldCube: The written cube, opened memory-mapped.
+    """
+    cube_path = Path(cube_path)
+    cube_path.mkdir(parents=True, exist_ok=True)
+
+    columns = pd.read_csv(csv_path, index_col=0, nrows=0).columns
+    ratings, tenors, rating_positions, tenor_positions = split_wide_columns(columns)
+    n_dates = _count_data_rows(csv_path)
+
+    values_path = cube_path / CUBE_VALUES_FILE
+    values = np.lib.format.open_memmap(values_path, mode='w+', dtype=dtype,
+                                       shape=(n_dates, len(ratings), len(tenors)))
+    values[:] = np.nan
+
+    dates = []
+    row = 0
+    for chunk in pd.read_csv(csv_path, index_col=0, chunksize=chunksize):
+        n_rows = len(chunk)
+        values[row:row + n_rows, rating_positions, tenor_positions] = chunk.to_numpy(dtype=dtype)
+        dates.extend(str(date) for date in chunk.index)
+        row += n_rows
+
+    dates = np.asarray(dates, dtype=str)
+    if len(np.unique(dates)) != len(dates):
+        raise ValueError(f"Duplicate dates found in {csv_path}.")
+
+    order = np.argsort(dates, kind='stable')
+    if np.any(order != np.arange(len(dates))):
+        # Keep the date axis sorted so that range lookups are binary searches
+        unsorted_path = cube_path / ('unsorted_' + CUBE_VALUES_FILE)
+        values.flush()
+        del values
+        os.replace(values_path, unsorted_path)
+        unsorted = np.load(unsorted_path, mmap_mode='r')
+        values = np.lib.format.open_memmap(values_path, mode='w+', dtype=dtype, shape=unsorted.shape)
+        for start in range(0, len(order), chunksize):
+            values[start:start + chunksize] = unsorted[order[start:start + chunksize]]
+        del unsorted
+        os.remove(unsorted_path)
+        dates = dates[order]
+
+    values.flush()
+    del values
+    _write_axes(cube_path, dates, ratings, tenors)
+    return YieldCube.open(cube_path)
+
+
+def cube_to_csv(cube_path, csv_path, chunksize=1024):
+    """
+    Write a cube directory back out in the wide historical CSV layout.
+
+    Parameters:
+    - cube_path: str or Path, Cube directory.
+    - csv_path: str or Path, Output CSV path.
+    - chunksize: int, Number of dates written at a time.
+    """
+    write_wide_csv(YieldCube.open(cube_path), csv_path, chunksize)
+
+
+def write_wide_csv(cube, csv_path, chunksize=1024):
+    """
+    Write a cube in the wide historical CSV layout, `chunksize` dates at a time.
+    """
+    starts = range(0, len(cube.dates), chunksize) if len(cube.dates) else [0]
+    for start in starts:
+        positions = slice(start, start + chunksize)
+        chunk = YieldCube(cube.values[positions], cube.dates[positions], cube.ratings, cube.tenors)
+        chunk.to_wide_frame().to_csv(csv_path, mode='w' if start == 0 else 'a', header=start == 0)
+
+
+def is_yield_cube(path):
+    """
+    Check whether a path points to a cube directory.
+    """
+    path = Path(path)
+    return path.is_dir() and (path / CUBE_AXES_FILE).exists()
+
+
+def load_yield_cube(cube_path, start_date=None, end_date=None):
+    """
+    Open a cube directory memory-mapped, optionally restricted to an inclusive date range.
+
+    Parameters:
+    - cube_path: str or Path, Cube directory.
+    - start_date: str, optional, First date to include.
+    - end_date: str, optional, Last date to include.
+
+    Returns:
+    - YieldCube: The (sliced) cube.
+    """
+    cube = YieldCube.open(cube_path)
+    if start_date is None and end_date is None:
+        return cube
+    return cube.date_slice(start_date, end_date)
+
+
+class CubeWriter:
+    """
+    Append dates to a cube directory one at a time without knowing the history length up front.
+
+    Rows are streamed to a temporary raw file and turned into `yields.npy` on `close`, so
+    memory use does not grow with the number of dates written.
+    """
+
+    def __init__(self, cube_path, ratings, tenors, dtype=np.float64):
+        """
+        Parameters:
+        - cube_path: str or Path, Output directory, created if needed.
+        - ratings: list of str, Rating labels of every appended matrix.
+        - tenors: list of int, Tenors in days of every appended matrix.
+        - dtype: numpy dtype, Storage type of the yields.
+        """
+        self.cube_path = Path(cube_path)
+        self.cube_path.mkdir(parents=True, exist_ok=True)
+        self.ratings = list(ratings)
+        self.tenors = [int(tenor) for tenor in tenors]
+        self.dtype = np.dtype(dtype)
+        self.dates = []
+        self._raw_path = self.cube_path / (CUBE_VALUES_FILE + '.partial')
+        self._raw_file = open(self._raw_path, 'wb')
+
+    def append(self, date, matrix):
+        """
+        Append the rating x tenor matrix of one date; dates must arrive in increasing order.
+        """
+        matrix = np.ascontiguousarray(matrix, dtype=self.dtype)
+        if matrix.shape != (len(self.ratings), len(self.tenors)):
+            raise ValueError(f"Matrix for {date} has shape {matrix.shape}, expected {(len(self.ratings), len(self.tenors))}.")
+        if self.dates and str(date) <= self.dates[-1]:
+            raise ValueError(f"Dates must be appended in increasing order, got {date} after {self.dates[-1]}.")
+        self._raw_file.write(matrix.tobytes())
+        self.dates.append(str(date))
+
+    def close(self, chunksize=1024):
+        """
+        Finalize the cube files.
+
+        Returns:
+        - YieldCube: The written cube, opened memory-mapped.
+        """
+        self._raw_file.close()
+        shape = (len(self.dates), len(self.ratings), len(self.tenors))
+        raw = np.memmap(self._raw_path, dtype=self.dtype, mode='r', shape=shape) if shape[0] else np.empty(shape, self.dtype)
+        values = np.lib.format.open_memmap(self.cube_path / CUBE_VALUES_FILE, mode='w+', dtype=self.dtype, shape=shape)
+        for start in range(0, shape[0], chunksize):
+            values[start:start + chunksize] = raw[start:start + chunksize]
+        values.flush()
+        del values, raw
+        os.remove(self._raw_path)
+        _write_axes(self.cube_path, self.dates, self.ratings, self.tenors)
+        return YieldCube.open(self.cube_path)
@@ -44,3 +44,21 @@ class BaseInterpolator(ABC):
           Predicted target values.
         """
         pass
+
+    def interpolate_with_derivatives(self, X, order=1):
+        """
+        Predict values together with their derivatives with respect to the sample coordinates.
+
+        Parameters:
+        - X: array-like, shape (n_samples, n_features)
+          Samples at which to evaluate the fitted model.
+        - order: int, 0 for values only, 1 to add the gradient, 2 to add the Hessian.
+
+        Returns:
+        - tuple: values of shape (n_samples,), then the gradient of shape
+          (n_samples, n_features) if order >= 1 and the Hessian of shape
+          (n_samples, n_features, n_features) if order >= 2.
+        """
+        if order == 0:
+            return (np.asarray(self.interpolate(X), dtype=float).reshape(-1),)
+        raise NotImplementedError(f"{type(self).__name__} does not provide analytic derivatives.")
@@ -0,0 +1,146 @@
+from bond_yield.data_processing.encoding import KEEP_LABEL
+from bond_yield.interpolators.interpolate_bond_yields import MatrixInterpolator
+from bond_yield.utils.date_frames import iter_date_frames
+from bond_yield.utils.surface_store import hash_config, hash_surface_input
+
+
+def describe_object(obj):
+    """
+    Describe a configured object by its class and its scalar attributes.
+
+    Parameters:
+    - obj: object, An interpolator, converter or strategy instance.
+
+    Returns:
+    - dict: JSON-serialisable description used in configuration hashes.
+    """
+    cls = type(obj)
+    params = {
+        name: value for name, value in sorted(vars(obj).items())
+        if isinstance(value, (bool, int, float, str))
+    }
+    return {'class': f'{cls.__module__}.{cls.__qualname__}', 'params': params}
+
+
+class IncrementalSurfaceBuilder:
+    """
+    Build filled surfaces date by date, reusing everything already in a `SurfaceStore`.
+
+    A date is refitted only when its input quotes or the configuration changed since it
+    was last stored, so a daily run only pays for the newly arrived date.
+    """
+
+    def __init__(self, interpolator_factory, store, rating_converter=None, tenor_converter=None, config=None):
+        """
+        Parameters:
+        - interpolator_factory: callable, Returns a fresh BaseInterpolator (e.g. the class itself).
+        - store: SurfaceStore, Where fitted surfaces and scales are persisted.
+        - rating_converter: SlopeMinimizingRatingConverter, optional, Optimizes the rating scale of
+          every date before fitting. Each date starts from the converter's initial ratings, so a
+          date's result does not depend on which other dates were processed in the same run.
+        - tenor_converter: TenorMinimizingTenorConverter, optional, Optimizes the tenor scale likewise.
+        - config: dict, optional, Extra settings that should invalidate stored surfaces when changed.
+        """
+        self.interpolator_factory = interpolator_factory
+        self.store = store
+        self.rating_converter = rating_converter
+        self.tenor_converter = tenor_converter
+        self.extra_config = config or {}
+
+        self.initial_ratings = dict(rating_converter.ratings) if rating_converter is not None else None
+        self.initial_tenors = dict(tenor_converter.tenor_values) if tenor_converter is not None else None
+        self.config = self.build_config()
+        self.config_hash = hash_config(self.config)
+        self.last_run = None
+
+    def build_config(self):
+        """
+        Collect everything that determines a fitted surface besides the input quotes.
+        """
+        config = {
+            'interpolator': describe_object(self.interpolator_factory()),
+            'extra': self.extra_config,
+        }
+        if self.rating_converter is not None:
+            config['rating_converter'] = describe_object(self.rating_converter)
+            config['rating_strategy'] = type(self.rating_converter.strategy).__name__
+            config['initial_ratings'] = self.initial_ratings
+        if self.tenor_converter is not None:
+            config['tenor_converter'] = describe_object(self.tenor_converter)
+            config['tenor_strategy'] = type(self.tenor_converter.strategy).__name__
+            config['initial_tenors'] = {str(tenor): value for tenor, value in self.initial_tenors.items()}
+        return config
+
+    def build_surface(self, df):
+        """
+        Optimize the scales of one date (if converters are configured) and fill its surface.
+
+        Returns:
+        - tuple: (filled DataFrame, rating scale or None, tenor scale or None).
+        """
+        df = df.copy()
+        ratings = list(df.index)
+        tenors = list(df.columns)
+        rating_scale = None
+        tenor_scale = None
+
+        if self.rating_converter is not None:
+            self.rating_converter.ratings = dict(self.initial_ratings)
+            self.rating_converter.strategy.bond_yield_df = df
+            self.rating_converter.optimize_ratings()
+            rating_scale = self.rating_converter.get_rating_scale()
+
+        if self.tenor_converter is not None:
+            self.tenor_converter.tenor_values = dict(self.initial_tenors)
+            self.tenor_converter.strategy.bond_yield_df = df
+            self.tenor_converter.optimize_tenors()
+            tenor_scale = self.tenor_converter.get_tenor_scale()
+
+        if rating_scale is not None:
+            df.index = self.rating_converter.scale.map_index(df.index, default=KEEP_LABEL)
+        if tenor_scale is not None:
+            df.columns = self.tenor_converter.scale.map_index(df.columns, default=KEEP_LABEL)
+
+        surface = MatrixInterpolator(self.interpolator_factory()).fit_interpolate(df)
+        # The fit works on scale values; the surface keeps the original labels
+        surface.index = ratings
+        surface.columns = tenors
+        return surface, rating_scale, tenor_scale
+
+    def run(self, date_dataframes):
+        """
+        Return the filled surface of every date, fitting only new or changed dates.
+
+        Parameters:
+        - date_dataframes: dict of date -> DataFrame, or an iterable of (date, DataFrame) pairs.
+
+        Returns:
+        - dict: Date -> filled DataFrame. `last_run` records which dates were new, changed,
+                unchanged or served from another date's identical input.
+        """
+        index = self.store.read_index(self.config_hash)
+        summary = {'new': [], 'changed': [], 'unchanged': [], 'reused': []}
+        surfaces = {}
+
+        for date, df in iter_date_frames(date_dataframes):
+            date_key = str(date)
+            key = hash_surface_input(df, self.config)
+            previous_key = index.get(date_key)
+
+            if key in self.store:
+                summary['unchanged' if previous_key == key else 'reused'].append(date)
+            else:
+                surface, rating_scale, tenor_scale = self.build_surface(df)
+                self.store.put(key, surface, rating_scale, tenor_scale)
+                summary['new' if previous_key is None else 'changed'].append(date)
+
+            # The store keeps labels as strings; the key covers the input's labels, so they line up
+            surface = self.store.get(key)['surface']
+            surface.index = df.index
+            surface.columns = df.columns
+            surfaces[date] = surface
+            index[date_key] = key
+
+        self.store.write_index(self.config_hash, index)
+        self.last_run = summary
+        return surfaces
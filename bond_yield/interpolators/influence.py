@@ -0,0 +1,203 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+from bond_yield.utils.profiling import count, span
+
+DEFAULT_CACHE_ENTRIES = 64
+
+
+class SurfaceInfluence:
+    """
+    Linear map from the observed quotes of one date to its filled TPS surface.
+
+    For a fixed geometry (rating and tenor coordinates, mask of observed cells) and lambda,
+    `MatrixInterpolator(ThinPlateSplineInterpolator(lambda_val)).fit_interpolate` keeps the
+    observed quotes and fills every missing cell with a fixed linear combination of them.
+    The matrix of that map gives the sensitivity of every surface cell to every quote, and
+    fills any number of shocked quote vectors with one matrix multiplication.
+    """
+
+    def __init__(self, ratings, tenors, rating_values, tenor_values, observed, lambda_val=0.1):
+        """
+        Parameters:
+        - ratings: list, Rating labels of the surface rows.
+        - tenors: list, Tenor labels of the surface columns.
+        - rating_values: array-like, Numerical coordinate of each rating.
+        - tenor_values: array-like, Numerical coordinate of each tenor.
+        - observed: bool array of shape (len(ratings), len(tenors)), Cells holding a quote.
+        - lambda_val: float, Regularization of the thin plate spline.
+        """
+        self.ratings = list(ratings)
+        self.tenors = list(tenors)
+        self.observed = np.asarray(observed, dtype=bool)
+        if self.observed.shape != (len(self.ratings), len(self.tenors)):
+            raise ValueError(f"Mask has shape {self.observed.shape}, expected {(len(self.ratings), len(self.tenors))}.")
+        self.lambda_val = lambda_val
+
+        rating_values = np.asarray(rating_values, dtype=float)
+        tenor_values = np.asarray(tenor_values, dtype=float)
+        # Quotes are ordered row by row, like the training points of MatrixInterpolator
+        self.quote_rows, self.quote_cols = np.nonzero(self.observed)
+        missing_rows, missing_cols = np.nonzero(~self.observed)
+        X_train = np.column_stack((rating_values[self.quote_rows], tenor_values[self.quote_cols]))
+        X_missing = np.column_stack((rating_values[missing_rows], tenor_values[missing_cols]))
+
+        n_cells = self.observed.size
+        self.matrix = np.zeros((n_cells, len(X_train)))
+        self.matrix[self.quote_rows * len(self.tenors) + self.quote_cols, np.arange(len(X_train))] = 1.0
+        if len(X_missing):
+            interpolator = ThinPlateSplineInterpolator(lambda_val)
+            self.matrix[missing_rows * len(self.tenors) + missing_cols] = interpolator.influence_matrix(X_train,
+                                                                                                       X_missing)
+
+    @classmethod
+    def from_frame(cls, df, lambda_val=0.1, rating_scale='yield', rating_map=None):
+        """
+        Build the influence of one date's DataFrame on the rating scale used by the batch builder.
+
+        The map is linear for fixed rating coordinates; with the 'yield' or 'slope' scales the
+        coordinates are derived from the quotes of `df` and held fixed.
+
+        Parameters:
+        - df: DataFrame, Yields indexed by rating labels with tenors in days as columns.
+        - lambda_val: float, Regularization of the thin plate spline.
+        - rating_scale: str, See `bond_yield.batch.build_rating_scale`.
+        - rating_map: dict, optional, Rating label -> value.
+        """
+        from bond_yield.batch import build_rating_scale
+        from bond_yield.data_processing.encoding import as_scale_vector
+
+        scale = build_rating_scale(df, rating_scale, rating_map)
+        return cls(df.index, df.columns, as_scale_vector(scale).convert_many(df.index),
+                   df.columns.to_numpy(dtype=float), df.notna().to_numpy(), lambda_val)
+
+    @property
+    def n_quotes(self):
+        return len(self.quote_rows)
+
+    def quotes(self, df):
+        """
+        Extract the observed quotes of a DataFrame with this geometry, in the order of the matrix columns.
+        """
+        values = df.to_numpy(dtype=float)
+        if not np.array_equal(~np.isnan(values), self.observed):
+            raise ValueError("The DataFrame's observed cells differ from the influence matrix's mask.")
+        return values[self.quote_rows, self.quote_cols]
+
+    def apply(self, quotes):
+        """
+        Fill surfaces from quote vectors with one matrix multiplication.
+
+        Parameters:
+        - quotes: array of shape (n_quotes,) or (n_scenarios, n_quotes).
+
+        Returns:
+        - array of shape (n_ratings, n_tenors) or (n_scenarios, n_ratings, n_tenors).
+        """
+        quotes = np.asarray(quotes, dtype=float)
+        if quotes.shape[-1] != self.n_quotes:
+            raise ValueError(f"Expected {self.n_quotes} quotes per scenario, got {quotes.shape[-1]}.")
+        with span('influence.apply', scenarios=1 if quotes.ndim == 1 else len(quotes)):
+            surfaces = quotes @ self.matrix.T
+        return surfaces.reshape(quotes.shape[:-1] + self.observed.shape)
+
+    def fill(self, df):
+        """
+        Fill a DataFrame with this geometry; same result as the TPS MatrixInterpolator, without a fit.
+        """
+        return pd.DataFrame(self.apply(self.quotes(df)), index=df.index, columns=df.columns)
+
+    def sensitivities(self):
+        """
+        Returns:
+        - DataFrame: d(surface cell) / d(quote), one row per (rating, tenor) surface cell and
+                     one column per (rating, tenor) quote.
+        """
+        cells = pd.MultiIndex.from_product([self.ratings, self.tenors], names=['Rating', 'Tenor'])
+        quotes = pd.MultiIndex.from_arrays([np.asarray(self.ratings, dtype=object)[self.quote_rows],
+                                            np.asarray(self.tenors, dtype=object)[self.quote_cols]],
+                                           names=['Rating', 'Tenor'])
+        return pd.DataFrame(self.matrix, index=cells, columns=quotes)
+
+
+class InfluenceCache:
+    """
+    Least-recently-used cache of influence matrices keyed by geometry and lambda, so that
+    dates sharing a mask (the usual case) reuse one matrix.
+
+    With the 'ordinal' scale the rating coordinates only depend on the labels, so the key is
+    the labels and the mask, and a hit costs no rating-scale computation. The 'yield' and
+    'slope' scales are derived from the quotes: their coordinates are part of the key, so any
+    change of the quotes is a miss and there is no reuse across value changes. Their scales
+    are memoized per input (labels and values), so looking up the same DataFrame again does
+    not rerun the scale computation (an optimization for 'slope').
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES, lambda_val=0.1, rating_scale='yield', rating_map=None):
+        """
+        Parameters:
+        - max_entries: int, Number of matrices (and of memoized data-dependent scales) kept.
+        - lambda_val: float, Regularization of the thin plate spline.
+        - rating_scale: str, See `bond_yield.batch.build_rating_scale`.
+        - rating_map: dict, optional, Rating label -> value.
+        """
+        self.max_entries = max_entries
+        self.lambda_val = lambda_val
+        self.rating_scale = rating_scale
+        self.rating_map = rating_map
+        self.entries = OrderedDict()
+        self.scales = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def rating_values(self, df):
+        """
+        Rating coordinates of a DataFrame's rows on this cache's scale.
+        """
+        from bond_yield.batch import build_rating_scale
+        from bond_yield.data_processing.encoding import as_scale_vector
+
+        if self.rating_scale == 'ordinal':
+            return as_scale_vector(build_rating_scale(df, self.rating_scale, self.rating_map)).convert_many(df.index)
+        key = (tuple(df.index), tuple(df.columns), df.to_numpy(dtype=float).tobytes())
+        values = self.scales.get(key)
+        if values is None:
+            values = as_scale_vector(build_rating_scale(df, self.rating_scale, self.rating_map)).convert_many(df.index)
+            self.scales[key] = values
+            while len(self.scales) > self.max_entries:
+                self.scales.popitem(last=False)
+        else:
+            self.scales.move_to_end(key)
+        return values
+
+    def get(self, df):
+        """
+        Return the influence of a DataFrame's geometry, building it on first use.
+        """
+        observed = df.notna().to_numpy()
+        key = (tuple(df.index), tuple(df.columns), np.packbits(observed).tobytes(), observed.shape, self.lambda_val)
+        rating_values = None
+        if self.rating_scale != 'ordinal':
+            rating_values = self.rating_values(df)
+            key += (rating_values.tobytes(),)
+
+        influence = self.entries.get(key)
+        if influence is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            count('influence.cache_hits')
+            return influence
+
+        self.misses += 1
+        count('influence.cache_misses')
+        if rating_values is None:
+            rating_values = self.rating_values(df)
+        influence = SurfaceInfluence(df.index, df.columns, rating_values, df.columns.to_numpy(dtype=float),
+                                     observed, self.lambda_val)
+        self.entries[key] = influence
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return influence
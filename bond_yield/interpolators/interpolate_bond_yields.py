@@ -1,6 +1,6 @@
-from pathlib import Path
-import pandas as pd
 import numpy as np
+from bond_yield.utils.date_frames import iter_date_frames
+from bond_yield.utils.profiling import count, span
 from bond_yield.interpolators.baseInterpolator import BaseInterpolator
 from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
 
@@ -9,41 +9,91 @@ class MatrixInterpolator:
         assert issubclass(type(interpolator), BaseInterpolator), "Interpolator must be a subclass of BaseInterpolator"
         self.interpolator = interpolator
 
-    def fit_interpolate(self, df):
+    def fit_interpolate(self, df, rating_values=None):
         """
         Fit the interpolator to available data and interpolate missing values only.
 
         Parameters:
         - df: DataFrame, DataFrame where index is rating and columns are tenors.
+        - rating_values: array-like, optional, Numerical coordinate of each row of `df` (e.g. one
+                         row of `RollingYieldRatingConverter.scales`). By default the index itself
+                         holds the coordinates; with `rating_values` the index keeps its labels.
 
         Returns:
         - df_filled: DataFrame, DataFrame with missing values filled, original data retained.
         """
-        df.index = df.index.astype(str)
-        df.columns = df.columns.astype(str)
-
-        mask = ~df.isna()  # Mask of available (non-NaN) data
-
-        # Prepare data for fitting
-        X_train = np.array([(i, j) for i in df.index for j in df.columns if mask.at[i, j]])
-        y_train = np.array([df.at[i, j] for i in df.index for j in df.columns if mask.at[i, j]])
+        with span('matrix.prepare'):
+            if rating_values is None:
+                df.index = df.index.astype(str)
+                ratings = df.index.to_numpy(dtype=str)
+            else:
+                ratings = np.asarray(rating_values, dtype=float)
+                if ratings.shape != (len(df.index),):
+                    raise ValueError(f"Expected {len(df.index)} rating values, got shape {ratings.shape}.")
+            df.columns = df.columns.astype(str)
+
+            values = df.to_numpy(dtype=float)
+            observed = ~np.isnan(values)  # Mask of available (non-NaN) data
+            # Numerical rating coordinates need numerical tenors to stack with
+            tenors = df.columns.to_numpy(dtype=str if rating_values is None else float)
+
+            # Prepare data for fitting, row by row as (rating, tenor) label pairs
+            rows, cols = np.nonzero(observed)
+            X_train = np.column_stack((ratings[rows], tenors[cols]))
+            y_train = values[rows, cols]
+
+            # Prepare to predict only the missing values
+            missing_rows, missing_cols = np.nonzero(~observed)
+            X_pred = np.column_stack((ratings[missing_rows], tenors[missing_cols]))
+        count('matrix.observed_points', len(X_train))
+        count('matrix.missing_points', len(X_pred))
 
         # Fit the interpolator to the available data
-        self.interpolator.fit(X_train, y_train)
-
-        # Prepare to predict only the missing values
-        X_pred = np.array([(i, j) for i in df.index for j in df.columns if not mask.at[i, j]])
+        with span('matrix.fit', points=len(X_train)):
+            self.interpolator.fit(X_train, y_train)
 
         if len(X_pred) > 0:  # Check if there are any missing values to predict
-            predictions = self.interpolator.interpolate(X_pred)
+            with span('matrix.interpolate', points=len(X_pred)):
+                predictions = self.interpolator.interpolate(X_pred)
 
-            # Fill only the missing values in the DataFrame
-            for (i, j), pred in zip(X_pred, predictions):
-                df.at[i, j] = pred
+            # Fill only the missing values in the DataFrame, keeping its dtype (e.g. float32 histories)
+            with span('matrix.write_back'):
+                values[missing_rows, missing_cols] = np.asarray(predictions, dtype=float).ravel()
+                df.iloc[:, :] = values.astype(np.result_type(*df.dtypes), copy=False)
 
         return df
 
+    def fit_interpolate_many(self, date_dataframes, rating_values=None):
+        """
+        Fill the missing values of every date, consuming the input lazily.
+
+        Parameters:
+        - date_dataframes: dict of date -> DataFrame, or an iterable of (date, DataFrame)
+                           pairs such as the generator returned by `iter_bond_yields`.
+        - rating_values: optional, Rating coordinates of every date: an object with
+                         `values_for(date, ratings)` such as `RollingYieldRatingConverter`, a
+                         callable (date, ratings) -> values, or an array of shape
+                         (n_dates, n_ratings) whose rows are aligned with each DataFrame's index.
+                         The first two look every rating up by label, so dates may miss ratings
+                         or order them differently.
+
+        Yields:
+        - tuple: (date, DataFrame with missing values filled).
+        """
+        if rating_values is None or callable(rating_values):
+            lookup = rating_values
+        elif hasattr(rating_values, 'values_for'):
+            lookup = rating_values.values_for
+        else:
+            rows = iter(rating_values)
+            lookup = lambda date, ratings: next(rows)
+        for date, df in iter_date_frames(date_dataframes):
+            yield date, self.fit_interpolate(df, None if lookup is None else lookup(date, df.index))
+
 if __name__ == "__main__":
+    from pathlib import Path
+    import pandas as pd
+
     # Load the DataFrame
     csv_url = Path('../tests/single_date_yield.csv')
     df = pd.read_csv(csv_url, index_col=0)
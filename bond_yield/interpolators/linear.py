@@ -1,6 +1,6 @@
 import numpy as np
-from scipy.interpolate import interp1d
 from bond_yield.interpolators.baseInterpolator import BaseInterpolator
+from bond_yield.utils.profiling import span
 
 
 class LinearInterpolator(BaseInterpolator):
@@ -19,19 +19,23 @@ class LinearInterpolator(BaseInterpolator):
         - y: array-like, shape (n_samples,)
           Target values.
         """
-        # Ensure data is sorted by the second coordinate for each unique first coordinate
-        unique_coords = np.unique(X[:, 0])
-        self.interpolators = {}
+        # scipy.interpolate is slow to import, so it is only loaded once a fit runs
+        from scipy.interpolate import interp1d
 
-        for coord in unique_coords:
-            indices = np.where(X[:, 0] == coord)
-            sorted_indices = np.argsort(X[indices][:, 1])
-            x_vals = X[indices][:, 1][sorted_indices]
-            y_vals = y[indices][sorted_indices]
+        with span('linear.fit', points=len(y)):
+            # Ensure data is sorted by the second coordinate for each unique first coordinate
+            unique_coords = np.unique(X[:, 0])
+            self.interpolators = {}
 
-            # Create linear interpolator with flat extrapolation
-            self.interpolators[coord] = interp1d(x_vals, y_vals, kind='linear', bounds_error=False,
-                                                 fill_value="extrapolate")
+            for coord in unique_coords:
+                indices = np.where(X[:, 0] == coord)
+                sorted_indices = np.argsort(X[indices][:, 1])
+                x_vals = X[indices][:, 1][sorted_indices]
+                y_vals = y[indices][sorted_indices]
+
+                # Create linear interpolator with flat extrapolation
+                self.interpolators[coord] = interp1d(x_vals, y_vals, kind='linear', bounds_error=False,
+                                                     fill_value="extrapolate")
 
     def interpolate(self, X):
         """
@@ -45,13 +49,50 @@ class LinearInterpolator(BaseInterpolator):
         - y: array, shape (n_samples,)
           Predicted target values.
         """
-        y_pred = np.zeros(X.shape[0])
+        with span('linear.interpolate', points=len(X)):
+            y_pred = np.zeros(X.shape[0])
 
-        for i, (x1, x2) in enumerate(X):
-            if x1 in self.interpolators:
-                y_pred[i] = self.interpolators[x1](x2)
-            else:
-                # Handle case where x1 is not in the interpolators (e.g., use nearest or zero)
-                y_pred[i] = 0  # This could be replaced with more sophisticated handling
+            for i, (x1, x2) in enumerate(X):
+                if x1 in self.interpolators:
+                    y_pred[i] = self.interpolators[x1](x2)
+                else:
+                    # Handle case where x1 is not in the interpolators (e.g., use nearest or zero)
+                    y_pred[i] = 0  # This could be replaced with more sophisticated handling
 
         return y_pred
+
+    def interpolate_with_derivatives(self, X, order=1):
+        """
+        Predict values and their derivatives, one rating at a time.
+
+        Each rating is a separate piecewise-linear curve in the tenor, so the tenor derivative
+        is the slope of the segment used for the value (the left segment at a knot, the end
+        segments when extrapolating) and the second tenor derivative is 0. The surface is not
+        defined between ratings, so derivatives with respect to the rating are NaN.
+
+        Parameters:
+        - X: 2D array-like, shape (n_samples, 2)
+          Samples (rating, tenor) at which to evaluate.
+        - order: int, 0 for values only, 1 to add the gradient, 2 to add the Hessian.
+
+        Returns:
+        - tuple: values of shape (n_samples,), then the gradient of shape (n_samples, 2) if
+          order >= 1 and the Hessian of shape (n_samples, 2, 2) if order >= 2.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        values = np.zeros(len(X))
+        slopes = np.zeros(len(X))
+        with span('linear.derivatives', points=len(X), order=order):
+            for coord, curve in self.interpolators.items():
+                rows = np.flatnonzero(X[:, 0] == coord)
+                if not len(rows):
+                    continue
+                # Same segment choice as interp1d
+                upper = np.clip(np.searchsorted(curve.x, X[rows, 1]), 1, len(curve.x) - 1)
+                slope = (curve.y[upper] - curve.y[upper - 1]) / (curve.x[upper] - curve.x[upper - 1])
+                values[rows] = curve.y[upper - 1] + slope * (X[rows, 1] - curve.x[upper - 1])
+                slopes[rows] = slope
+        gradient = np.column_stack((np.full(len(X), np.nan), slopes))
+        hessian = np.zeros((len(X), 2, 2))
+        hessian[:, 0, :] = hessian[:, :, 0] = np.nan
+        return (values, gradient, hessian)[:order + 1]
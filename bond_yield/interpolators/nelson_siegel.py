@@ -0,0 +1,271 @@
+import numpy as np
+import pandas as pd
+
+from bond_yield.interpolators.baseInterpolator import BaseInterpolator
+from bond_yield.utils.date_frames import iter_date_frames
+from bond_yield.utils.profiling import span
+
+# Decay parameters tried by default, in years
+DEFAULT_DECAYS = np.geomspace(0.25, 15.0, 12)
+# Ridge added to the normal equations, relative to their largest diagonal entry
+_RIDGE = 1e-10
+
+
+def nelson_siegel_loadings(tenors, decays):
+    """
+    Loadings of the Nelson-Siegel(-Svensson) factors at the given tenors.
+
+    Parameters:
+    - tenors: array of shape (n,), Tenors in the unit of the decays.
+    - decays: sequence of one (Nelson-Siegel) or two (Svensson) decay parameters.
+
+    Returns:
+    - array of shape (n, 2 + len(decays)): level, slope, curvature and, with a second decay,
+      the second curvature loading. Tenor 0 takes the limits 1 and 0.
+    """
+    tenors = np.asarray(tenors, dtype=float)
+    columns = [np.ones_like(tenors)]
+    for k, decay in enumerate(decays):
+        scaled = tenors / decay
+        decayed = np.exp(-scaled)
+        slope = np.divide(1 - decayed, scaled, out=np.ones_like(scaled), where=scaled > 0)
+        if k == 0:
+            columns.append(slope)
+        columns.append(slope - decayed)
+    return np.column_stack(columns)
+
+
+def decay_grid(decays=None, svensson=True):
+    """
+    Candidate decay tuples: every decay for Nelson-Siegel, every pair of distinct decays for Svensson.
+    """
+    decays = np.sort(np.asarray(DEFAULT_DECAYS if decays is None else decays, dtype=float))
+    if not svensson:
+        return [(decay,) for decay in decays]
+    return [(first, second) for i, first in enumerate(decays) for second in decays[i + 1:]]
+
+
+def _smoothing_matrices(rating_values):
+    """
+    Second divided differences of the coefficients along the rating coordinates of every date.
+
+    The differences are scaled by the squared mean gap between the ratings of the date, so that
+    equally spaced ratings get the plain [1, -2, 1] stencil whatever the unit of the coordinates.
+    Gaps that are not positive (tied or missing coordinates) count as the mean gap.
+
+    Returns:
+    - array of shape (n_dates, n_ratings, n_ratings): D^T D in the original rating order.
+    """
+    n_dates, n_ratings = rating_values.shape
+    if n_ratings < 3:
+        return np.zeros((n_dates, n_ratings, n_ratings))
+    order = np.argsort(rating_values, axis=1, kind='stable')
+    gaps = np.diff(np.take_along_axis(rating_values, order, axis=1), axis=1)
+    usable = np.isfinite(gaps) & (gaps > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_gap = np.where(usable, gaps, 0).sum(axis=1) / usable.sum(axis=1)
+    mean_gap = np.where(np.isfinite(mean_gap), mean_gap, 1.0)
+    gaps = np.where(usable, gaps, mean_gap[:, np.newaxis])
+
+    # f'' ~ 2 / (h0 + h1) * ((f2 - f1) / h1 - (f1 - f0) / h0), times the squared mean gap
+    left, right = gaps[:, :-1], gaps[:, 1:]
+    factor = 2 * mean_gap[:, np.newaxis] ** 2 / (left + right)
+    second = np.zeros((n_dates, n_ratings - 2, n_ratings))
+    positions = np.arange(n_ratings - 2)
+    second[:, positions, positions] = factor / left
+    second[:, positions, positions + 1] = -factor * (1 / left + 1 / right)
+    second[:, positions, positions + 2] = factor / right
+    sorted_penalty = np.einsum('dkr,dks->drs', second, second)
+    rank = np.argsort(order, axis=1)
+    dates = np.arange(n_dates)[:, np.newaxis, np.newaxis]
+    return sorted_penalty[dates, rank[:, :, np.newaxis], rank[:, np.newaxis, :]]
+
+
+def fit_nelson_siegel(tenors, yields, rating_values, decays, smoothing):
+    """
+    Fit one Nelson-Siegel(-Svensson) curve per rating and date, with the coefficients of
+    neighbouring ratings pulled together, for every candidate decay at once.
+
+    For a fixed decay tuple the loadings are fixed and the coefficients of all ratings of a
+    date solve one penalized least-squares problem: the quotes of each rating plus
+    `smoothing` times the squared second divided differences of the coefficients along the
+    rating coordinates, so coefficients linear in the rating coordinate are not penalized. The problems of all dates are solved as one batch per decay tuple, and each date
+    keeps the decay tuple with the lowest penalized objective.
+
+    Parameters:
+    - tenors: array of shape (n_tenors,), In the unit of the decays.
+    - yields: array of shape (n_dates, n_ratings, n_tenors), NaN where no quote exists.
+    - rating_values: array of shape (n_dates, n_ratings), Rating coordinates, used for their order and spacing.
+    - decays: list of tuples, Candidate decay tuples, all of the same length.
+    - smoothing: float, Weight of the second differences relative to one quote (see `_smoothing_matrices`).
+
+    Returns:
+    - tuple: coefficients of shape (n_dates, n_ratings, n_factors), index of the chosen decay
+      tuple per date and the penalized objective per date.
+    """
+    yields = np.asarray(yields, dtype=float)
+    n_dates, n_ratings, n_tenors = yields.shape
+    n_factors = 2 + len(decays[0])
+    observed = ~np.isnan(yields)
+    quotes = np.where(observed, yields, 0.0)
+    weights = observed.astype(float)
+    penalty = smoothing * _smoothing_matrices(np.asarray(rating_values, dtype=float))
+    # (rating, factor) x (rating, factor) layout of the stacked coefficients of a date
+    rating_eye = np.eye(n_ratings)[np.newaxis, :, np.newaxis, :, np.newaxis]
+    penalty_blocks = (penalty[:, :, np.newaxis, :, np.newaxis]
+                      * np.eye(n_factors)[np.newaxis, np.newaxis, :, np.newaxis, :])
+
+    best_coefficients = np.zeros((n_dates, n_ratings, n_factors))
+    best_decay = np.zeros(n_dates, dtype=int)
+    best_objective = np.full(n_dates, np.inf)
+    size = n_ratings * n_factors
+    for g, decay in enumerate(decays):
+        loadings = nelson_siegel_loadings(tenors, decay)
+        gram = np.einsum('drt,tp,tq->drpq', weights, loadings, loadings)
+        system = (gram[:, :, :, np.newaxis, :] * rating_eye + penalty_blocks).reshape(n_dates, size, size)
+        scale = np.abs(system).max(axis=(1, 2), initial=1.0)
+        system += (_RIDGE * scale)[:, np.newaxis, np.newaxis] * np.eye(size)
+        rhs = np.einsum('drt,tp->drp', quotes, loadings).reshape(n_dates, size, 1)
+        coefficients = np.linalg.solve(system, rhs).reshape(n_dates, n_ratings, n_factors)
+
+        residuals = (quotes - coefficients @ loadings.T) * weights
+        roughness = np.einsum('drs,drp,dsp->d', penalty, coefficients, coefficients)
+        objective = (residuals ** 2).sum(axis=(1, 2)) + roughness
+        better = objective < best_objective
+        best_coefficients[better] = coefficients[better]
+        best_decay[better] = g
+        best_objective[better] = objective[better]
+    return best_coefficients, best_decay, best_objective
+
+
+class NelsonSiegelSvenssonInterpolator(BaseInterpolator):
+    """
+    Parametric term structure per rating: y(t) = b0 + b1 L1(t) + b2 L2(t) [+ b3 L3(t)] with the
+    Nelson-Siegel(-Svensson) loadings. The decay parameters are shared by all ratings of a date
+    and chosen from a grid, so the coefficients are linear least-squares solutions, and the
+    coefficients of neighbouring ratings are smoothed so that the spreads between ratings stay
+    regular. Between the fitted ratings the coefficients are interpolated linearly along the
+    rating coordinate, and outside them extrapolated linearly from the two nearest ratings.
+    """
+
+    def __init__(self, svensson=True, decays=None, smoothing=0.1, tenor_unit=365.0):
+        """
+        Parameters:
+        - svensson: bool, Whether to add the second curvature factor (Svensson) to Nelson-Siegel.
+        - decays: array-like, optional, Candidate decay parameters in years (`DEFAULT_DECAYS` by default).
+        - smoothing: float, Weight of the second differences of the coefficients across ratings,
+                     relative to one quote.
+        - tenor_unit: float, Tenor units per year (365 for tenors in days).
+        """
+        super().__init__()
+        self.svensson = bool(svensson)
+        self.decays = DEFAULT_DECAYS if decays is None else np.asarray(decays, dtype=float)
+        self.smoothing = smoothing
+        self.tenor_unit = tenor_unit
+        self.ratings = None  # Fitted rating coordinates, sorted
+        self.coefficients = None  # Coefficients per fitted rating
+        self.decay = None  # Chosen decay parameters, in years
+        self.history = None  # Parameters per (date, rating) of the last `fit_history`
+
+    def fit(self, X, y):
+        """
+        Fit the curves of every rating of one date.
+
+        Parameters:
+        - X: array-like, shape (n_samples, 2), (rating value, tenor) of each quote.
+        - y: array-like, shape (n_samples,), Yields.
+        """
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float).ravel()
+        ratings, rows = np.unique(X[:, 0], return_inverse=True)
+        tenors, cols = np.unique(X[:, 1], return_inverse=True)
+        yields = np.full((1, len(ratings), len(tenors)), np.nan)
+        yields[0, rows, cols] = y
+
+        grid = decay_grid(self.decays, self.svensson)
+        with span('nss.fit', points=len(y), decays=len(grid)):
+            coefficients, chosen, _ = fit_nelson_siegel(tenors / self.tenor_unit, yields, ratings[np.newaxis],
+                                                        grid, self.smoothing)
+        self.ratings = ratings
+        self.coefficients = coefficients[0]
+        self.decay = grid[chosen[0]]
+        return self
+
+    def interpolate(self, X):
+        """
+        Evaluate the fitted curves at (rating value, tenor) points.
+
+        Returns:
+        - array of shape (n_samples,).
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if len(self.ratings) == 1:
+            coefficients = np.repeat(self.coefficients, len(X), axis=0)
+        else:
+            # Segment of each point, the first or last one for points outside the fitted ratings
+            upper = np.clip(np.searchsorted(self.ratings, X[:, 0]), 1, len(self.ratings) - 1)
+            lower = upper - 1
+            weight = (X[:, 0] - self.ratings[lower]) / (self.ratings[upper] - self.ratings[lower])
+            coefficients = (self.coefficients[lower]
+                            + weight[:, np.newaxis] * (self.coefficients[upper] - self.coefficients[lower]))
+        loadings = nelson_siegel_loadings(X[:, 1] / self.tenor_unit, self.decay)
+        return (coefficients * loadings).sum(axis=1)
+
+    def fit_history(self, date_dataframes, rating_values=None):
+        """
+        Fit every date of a history in one batch and fill the missing quotes.
+
+        All dates are stacked into one dates x ratings x tenors array (over the union of their
+        ratings and tenors), and each candidate decay tuple is solved for all ratings of all
+        dates with one batched linear solve.
+
+        Parameters:
+        - date_dataframes: dict of date -> DataFrame, or an iterable of (date, DataFrame) pairs,
+                           indexed by rating labels with tenors in days as columns.
+        - rating_values: array of shape (n_dates, n_ratings) or (n_ratings,), optional, Rating
+                         coordinates aligned with the stacked ratings (those of the first date,
+                         then any new ones in order of appearance), such as
+                         `RollingYieldRatingConverter.scales`; each rating's average yield on
+                         each date by default.
+
+        Returns:
+        - dict: Date -> DataFrame with the original quotes and the missing cells filled. The
+                fitted parameters are kept in `history`, a DataFrame indexed by (date, rating)
+                with the coefficients and decay parameters.
+        """
+        frames = list(iter_date_frames(date_dataframes))
+        if not frames:
+            return {}
+        ratings = list(dict.fromkeys(rating for _, df in frames for rating in df.index))
+        tenors = sorted({tenor for _, df in frames for tenor in df.columns}, key=float)
+        yields = np.stack([df.reindex(index=ratings, columns=tenors).to_numpy(dtype=float) for _, df in frames])
+        if rating_values is None:
+            # Average yield of each rating on each date, like the batch builder's 'yield' scale
+            quoted = ~np.isnan(yields)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                rating_values = np.where(quoted, yields, 0).sum(axis=2) / quoted.sum(axis=2)
+        rating_values = np.broadcast_to(np.asarray(rating_values, dtype=float), yields.shape[:2])
+
+        grid = decay_grid(self.decays, self.svensson)
+        tenor_values = np.asarray(tenors, dtype=float) / self.tenor_unit
+        with span('nss.fit_history', dates=len(frames), ratings=len(ratings), decays=len(grid)):
+            coefficients, chosen, _ = fit_nelson_siegel(tenor_values, yields, rating_values, grid, self.smoothing)
+            decays = np.array(grid)[chosen]
+            fitted = np.stack([coefficients[d] @ nelson_siegel_loadings(tenor_values, grid[g]).T
+                               for d, g in enumerate(chosen)])
+        filled = np.where(np.isnan(yields), fitted, yields)
+
+        dates = [date for date, _ in frames]
+        columns = [f'beta{k}' for k in range(coefficients.shape[2])] + [f'tau{k + 1}' for k in range(decays.shape[1])]
+        parameters = np.concatenate((coefficients, np.repeat(decays[:, np.newaxis, :], len(ratings), axis=1)), axis=2)
+        self.history = pd.DataFrame(parameters.reshape(-1, len(columns)), columns=columns,
+                                    index=pd.MultiIndex.from_product([dates, ratings], names=['Date', 'Rating']))
+
+        surfaces = {}
+        for position, (date, df) in enumerate(frames):
+            surface = pd.DataFrame(filled[position], index=ratings, columns=tenors).reindex(index=df.index,
+                                                                                           columns=df.columns)
+            surface.index.name = df.index.name
+            surface.columns.name = df.columns.name
+            surfaces[date] = surface
+        return surfaces
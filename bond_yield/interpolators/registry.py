@@ -0,0 +1,71 @@
+import importlib
+
+# Name -> interpolator class, or a 'module:Class' path imported on first use so that
+# listing the available interpolators does not import their dependencies.
+_REGISTRY = {
+    'tps': 'bond_yield.interpolators.thin_plate_spline:ThinPlateSplineInterpolator',
+    'linear': 'bond_yield.interpolators.linear:LinearInterpolator',
+    'spatiotemporal': 'bond_yield.interpolators.spatio_temporal:SpatioTemporalInterpolator',
+    'nss': 'bond_yield.interpolators.nelson_siegel:NelsonSiegelSvenssonInterpolator',
+}
+
+
+def register_interpolator(name, interpolator_class=None):
+    """
+    Register an interpolator class under `name`, either directly or as a class decorator:
+
+        @register_interpolator('my_spline')
+        class MySplineInterpolator(BaseInterpolator):
+            ...
+
+    Parameters:
+    - name: str, Name used by the batch builder, the CLI and the tournament.
+    - interpolator_class: BaseInterpolator subclass or 'module:Class' path, optional.
+
+    Returns:
+    - The registered class, or a decorator when `interpolator_class` is omitted.
+    """
+    if interpolator_class is None:
+        def decorator(cls):
+            register_interpolator(name, cls)
+            return cls
+        return decorator
+
+    existing = _REGISTRY.get(name)
+    if existing is not None and _class_path(existing) != _class_path(interpolator_class):
+        raise ValueError(f"An interpolator is already registered as '{name}'.")
+    _REGISTRY[name] = interpolator_class
+    return interpolator_class
+
+
+def _class_path(entry):
+    return entry if isinstance(entry, str) else f'{entry.__module__}:{entry.__qualname__}'
+
+
+def get_interpolator(name):
+    """
+    Return the interpolator class registered under `name`.
+    """
+    if name not in _REGISTRY:
+        raise ValueError(f"Unknown interpolator '{name}', expected one of {available_interpolators()}.")
+    entry = _REGISTRY[name]
+    if isinstance(entry, str):
+        module_name, class_name = entry.split(':')
+        entry = getattr(importlib.import_module(module_name), class_name)
+        _REGISTRY[name] = entry
+    return entry
+
+
+def make_interpolator(name, **params):
+    """
+    Build a new instance of the interpolator registered under `name`.
+    """
+    return get_interpolator(name)(**params)
+
+
+def available_interpolators():
+    """
+    Returns:
+    - list of str: Registered interpolator names, sorted.
+    """
+    return sorted(_REGISTRY)
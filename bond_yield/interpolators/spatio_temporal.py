@@ -0,0 +1,297 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from bond_yield.interpolators.baseInterpolator import BaseInterpolator
+from bond_yield.utils.date_frames import iter_date_frames
+from bond_yield.utils.profiling import count, span
+
+# Query points evaluated at a time, which bounds the temporary kernel rows
+_BLOCK_ROWS = 1024
+
+
+def rbf_kernel(a, b, length):
+    """
+    Squared-exponential kernel between two sets of 1-D coordinates.
+
+    Returns:
+    - array of shape (len(a), len(b)).
+    """
+    distance = (np.asarray(a, dtype=float)[:, np.newaxis] - np.asarray(b, dtype=float)[np.newaxis, :]) / length
+    return np.exp(-0.5 * distance ** 2)
+
+
+def kron_matvec(factors, grid):
+    """
+    Multiplies (A_0 kron A_1 kron A_2) by a (T, R, N) grid without forming the Kronecker product.
+
+    Parameters:
+    - factors: tuple of three matrices of shapes (T', T), (R', R) and (N', N).
+    - grid: array of shape (T, R, N).
+
+    Returns:
+    - array of shape (T', R', N').
+    """
+    time_factor, rating_factor, tenor_factor = factors
+    n_dates, n_ratings, n_tenors = grid.shape
+    out = (time_factor @ grid.reshape(n_dates, -1)).reshape(-1, n_ratings, n_tenors)
+    out = rating_factor @ out
+    return out @ tenor_factor.T
+
+
+class SpatioTemporalInterpolator(BaseInterpolator):
+    """
+    Kernel interpolator over (date, rating, tenor) with a separable kernel
+    k = k_time * k_rating * k_tenor, so that a quote missing for several dates borrows
+    from the neighbouring dates as well as from the neighbouring cells.
+
+    The points are placed on the grid spanned by their distinct coordinates, whose kernel
+    matrix is the Kronecker product K_t kron K_r kron K_n. A fully observed grid is solved
+    exactly through the eigendecompositions of the three small factors; a grid with missing
+    cells is solved by conjugate gradients whose matrix-vector products use the Kronecker
+    structure, preconditioned by the full-grid solve. Either way the cost grows with
+    T^3 + R^3 + N^3 and T * R * N * (T + R + N) instead of (T * R * N)^3.
+
+    Points with two columns (rating, tenor) are treated as a single date, so the interpolator
+    also works wherever a per-date BaseInterpolator is expected.
+    """
+
+    def __init__(self, lambda_val=1e-3, time_length=5.0, rating_length=None, tenor_length=None, tol=1e-8,
+                 max_iter=1000):
+        """
+        Parameters:
+        - lambda_val: float, Noise-to-signal ratio added to the kernel diagonal (smoothing).
+        - time_length: float, Length scale along the date axis, in dates.
+        - rating_length: float, optional, Length scale along the rating axis; defaults to twice
+                         the mean spacing of the fitted ratings.
+        - tenor_length: float, optional, Length scale along the tenor axis; defaults to twice
+                        the mean spacing of the fitted tenors.
+        - tol: float, Relative residual at which conjugate gradients stop.
+        - max_iter: int, Maximum number of conjugate gradient iterations.
+        """
+        super().__init__()
+        self.lambda_val = lambda_val
+        self.time_length = time_length
+        self.rating_length = rating_length
+        self.tenor_length = tenor_length
+        self.tol = tol
+        self.max_iter = max_iter
+        self.axes = None  # Distinct (date, rating, tenor) coordinates of the fitted grid
+        self.lengths = None  # Length scale of each axis
+        self.coef = None  # Affine trend in rating and tenor
+        self.alpha = None  # Kernel weights on the grid, zero at missing cells
+        self.iterations = None  # Conjugate gradient iterations of the last fit, 0 for a full grid
+        self.relative_residual = None  # Relative residual of the last fit's solve, 0 for a full grid
+
+    @staticmethod
+    def _as_points(X):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if X.shape[1] == 2:
+            X = np.column_stack((np.zeros(len(X)), X))
+        if X.shape[1] != 3:
+            raise ValueError(f"Expected points with 2 (rating, tenor) or 3 (date, rating, tenor) columns, got {X.shape[1]}.")
+        return X
+
+    @staticmethod
+    def _default_length(axis):
+        return 2 * float(np.mean(np.diff(axis))) if len(axis) > 1 else 1.0
+
+    def _trend(self, X):
+        return np.column_stack((np.ones(len(X)), X[:, 1], X[:, 2])) @ self.coef
+
+    def fit(self, X, y):
+        """
+        Fits the interpolator to points (date, rating, tenor) or (rating, tenor) and their values.
+        """
+        X = self._as_points(X)
+        y = np.asarray(y, dtype=float).ravel()
+        self.axes = [np.unique(X[:, k]) for k in range(3)]
+        codes = tuple(np.searchsorted(axis, X[:, k]) for k, axis in enumerate(self.axes))
+        shape = tuple(len(axis) for axis in self.axes)
+        cells = np.ravel_multi_index(codes, shape)
+        if len(np.unique(cells)) != len(cells):
+            raise ValueError("Each (date, rating, tenor) point must appear only once.")
+
+        self.lengths = (self.time_length,
+                        self.rating_length or self._default_length(self.axes[1]),
+                        self.tenor_length or self._default_length(self.axes[2]))
+
+        # The kernel models deviations from an affine trend in rating and tenor
+        self.coef = np.linalg.lstsq(np.column_stack((np.ones(len(X)), X[:, 1], X[:, 2])), y, rcond=None)[0]
+        residual = y - self._trend(X)
+
+        with span('spatiotemporal.fit', points=len(y), grid=int(np.prod(shape))):
+            self._factors = [rbf_kernel(axis, axis, length) for axis, length in zip(self.axes, self.lengths)]
+            self._eigen = [np.linalg.eigh(factor) for factor in self._factors]
+            eigenvalues = [np.clip(values, 0, None) for values, _ in self._eigen]
+            self._spectrum = (eigenvalues[0][:, None, None] * eigenvalues[1][None, :, None]
+                              * eigenvalues[2][None, None, :] + self.lambda_val)
+
+            if len(cells) == np.prod(shape):
+                grid = np.empty(shape)
+                grid.ravel()[cells] = residual
+                self.alpha = self._full_grid_solve(grid)
+                self.iterations = 0
+                self.relative_residual = 0.0
+            else:
+                self.alpha = self._masked_solve(cells, residual, shape)
+        return self
+
+    def _full_grid_solve(self, grid):
+        """
+        Solves (K + lambda I) alpha = grid through the eigendecompositions of the factors.
+        """
+        vectors = [vectors for _, vectors in self._eigen]
+        rotated = kron_matvec([vectors_i.T for vectors_i in vectors], grid)
+        return kron_matvec(vectors, rotated / self._spectrum)
+
+    def _masked_solve(self, cells, residual, shape):
+        """
+        Solves (P K P^T + lambda I) a = residual on the observed cells by preconditioned
+        conjugate gradients, with P (K + lambda I)^-1 P^T as preconditioner.
+        """
+        def scatter(values):
+            grid = np.zeros(shape)
+            grid.ravel()[cells] = values
+            return grid
+
+        def matvec(values):
+            return kron_matvec(self._factors, scatter(values)).ravel()[cells] + self.lambda_val * values
+
+        def precondition(values):
+            return self._full_grid_solve(scatter(values)).ravel()[cells]
+
+        a = np.zeros_like(residual)
+        r = residual.copy()
+        z = precondition(r)
+        p = z.copy()
+        rz = r @ z
+        target = self.tol * np.linalg.norm(residual)
+        iterations = 0
+        while np.linalg.norm(r) > target and iterations < self.max_iter:
+            Ap = matvec(p)
+            step = rz / (p @ Ap)
+            a += step * p
+            r -= step * Ap
+            z = precondition(r)
+            rz_next = r @ z
+            p = z + (rz_next / rz) * p
+            rz = rz_next
+            iterations += 1
+        count('spatiotemporal.cg_iterations', iterations)
+        self.iterations = iterations
+        self.relative_residual = float(np.linalg.norm(r) / max(np.linalg.norm(residual), 1e-300))
+        if np.linalg.norm(r) > target:
+            count('spatiotemporal.cg_not_converged')
+            warnings.warn(f"Conjugate gradients stopped after {iterations} iterations with relative residual "
+                          f"{self.relative_residual:.2e} (tol {self.tol:.0e}).", RuntimeWarning, stacklevel=3)
+        return scatter(a)
+
+    def interpolate_product(self, dates, ratings, tenors):
+        """
+        Evaluates the fitted surface on the product grid of date, rating and tenor coordinates,
+        with one kernel matrix per axis instead of one kernel row per point.
+
+        Returns:
+        - array of shape (len(dates), len(ratings), len(tenors)).
+        """
+        coordinates = [np.asarray(axis_values, dtype=float) for axis_values in (dates, ratings, tenors)]
+        with span('spatiotemporal.interpolate_product'):
+            factors = [rbf_kernel(values, axis, length)
+                       for values, axis, length in zip(coordinates, self.axes, self.lengths)]
+            surface = kron_matvec(factors, self.alpha)
+            rating_grid, tenor_grid = np.meshgrid(coordinates[1], coordinates[2], indexing='ij')
+            trend = self.coef[0] + self.coef[1] * rating_grid + self.coef[2] * tenor_grid
+        return surface + trend[np.newaxis]
+
+    def interpolate_grid(self):
+        """
+        Evaluates the fitted surface on every cell of the fitted grid.
+
+        Returns:
+        - array of shape (n_dates, n_ratings, n_tenors).
+        """
+        return self.interpolate_product(*self.axes)
+
+    def interpolate(self, X):
+        """
+        Interpolates the values at points (date, rating, tenor) or (rating, tenor).
+
+        Returns:
+        - array of shape (n_samples,).
+        """
+        X = self._as_points(X)
+        n_dates, n_ratings, n_tenors = self.alpha.shape
+        weights = self.alpha.reshape(n_dates, -1)
+        out = np.empty(len(X))
+        with span('spatiotemporal.interpolate', points=len(X)):
+            for start in range(0, len(X), _BLOCK_ROWS):
+                block = X[start:start + _BLOCK_ROWS]
+                k_time, k_rating, k_tenor = (rbf_kernel(block[:, k], self.axes[k], self.lengths[k]) for k in range(3))
+                partial = (k_time @ weights).reshape(len(block), n_ratings, n_tenors)
+                partial = np.einsum('prn,pr->pn', partial, k_rating)
+                out[start:start + _BLOCK_ROWS] = np.einsum('pn,pn->p', partial, k_tenor)
+            out += self._trend(X)
+        return out
+
+    def fit_interpolate(self, date_dataframes, window=20, overlap=5, rating_map=None):
+        """
+        Fill the missing values of every date, fitting consecutive windows of dates jointly.
+
+        Each block of `window` dates is fitted together with up to `overlap` dates on each side,
+        so the first and last dates of a block still see their neighbours. Dates are placed at
+        their position in the history (one unit per date). Observed quotes are kept as they are.
+
+        Parameters:
+        - date_dataframes: dict of date -> DataFrame, or an iterable of (date, DataFrame) pairs
+                           such as the one returned by `iter_bond_yields`, in date order.
+        - window: int, Dates filled per fit.
+        - overlap: int, Context dates added on each side of a window.
+        - rating_map: dict, optional, Rating label -> value; defaults to the average yield of
+                      each rating over the fitted dates, like the batch builder's 'yield' scale.
+
+        Yields:
+        - tuple: (date, DataFrame with missing values filled).
+        """
+        if window < 1 or overlap < 0:
+            raise ValueError(f"Expected window >= 1 and overlap >= 0, got window={window}, overlap={overlap}.")
+        buffer = []
+        lead = 0  # Context dates at the start of the buffer that were already yielded
+        for item in iter_date_frames(date_dataframes):
+            buffer.append(item)
+            if len(buffer) == lead + window + overlap:
+                yield from self._fill_block(buffer, lead, lead + window, rating_map)
+                keep_from = max(0, lead + window - overlap)
+                buffer = buffer[keep_from:]
+                lead = lead + window - keep_from
+        if len(buffer) > lead:
+            yield from self._fill_block(buffer, lead, len(buffer), rating_map)
+
+    def _fill_block(self, items, start, stop, rating_map):
+        ratings = pd.Index([rating for _, df in items for rating in df.index]).unique()
+        tenors = pd.Index(sorted({tenor for _, df in items for tenor in df.columns}))
+        values = np.stack([df.reindex(index=ratings, columns=tenors).to_numpy(dtype=float) for _, df in items])
+        if rating_map is None:
+            quoted = ~np.isnan(values)
+            if not quoted.any(axis=(0, 2)).all():
+                unquoted = list(ratings[~quoted.any(axis=(0, 2))])
+                raise ValueError(f"No yield scale value could be derived for ratings {unquoted}.")
+            rating_values = np.where(quoted, values, 0).sum(axis=(0, 2)) / quoted.sum(axis=(0, 2))
+        else:
+            from bond_yield.data_processing.encoding import as_scale_vector
+            rating_values = as_scale_vector(rating_map).convert_many(ratings)
+        tenor_values = tenors.to_numpy(dtype=float)
+
+        dates, rows, cols = np.nonzero(~np.isnan(values))
+        X = np.column_stack((dates, rating_values[rows], tenor_values[cols]))
+        count('spatiotemporal.windows')
+        with span('spatiotemporal.window', dates=len(items), points=len(X)):
+            self.fit(X, values[dates, rows, cols])
+            # Evaluated on the whole window, including dates or cells that had no quote at all
+            surface = self.interpolate_product(np.arange(len(items)), rating_values, tenor_values)
+
+        for position in range(start, stop):
+            date, df = items[position]
+            grid = pd.DataFrame(surface[position], index=ratings, columns=tenors)
+            yield date, df.fillna(grid.reindex(index=df.index, columns=df.columns))
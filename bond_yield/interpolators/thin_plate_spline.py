@@ -1,20 +1,40 @@
 import numpy as np
 from .baseInterpolator import BaseInterpolator
+from bond_yield.utils.profiling import count, span
+
+# Rows of kernel evaluated at a time, which bounds the temporary distance arrays
+_BLOCK_ROWS = 1024
+# Offset inside the logarithm of the Green's function, which avoids log(0)
+_LOG_OFFSET = 1e-10
+# Estimated condition number times eps above which a single-precision factorization cannot be
+# refined to float64 accuracy (tenors in days with a small lambda are far above it)
+_SINGLE_PRECISION_LIMIT = 1e3
+# Largest rounding error of single-precision evaluation, relative to the largest fitted value
+_EVALUATION_TOLERANCE = 1e-7
+
 
 class ThinPlateSplineInterpolator(BaseInterpolator):
     """ This is an interpolator for 2-D array only"""
-    def __init__(self, lambda_val=0.1):
+    def __init__(self, lambda_val=0.1, dtype=np.float64, refine_steps=3):
         """
         Initializes the ThinPlateSplineInterpolator with a regularization parameter.
 
         Parameters:
         - lambda_val: Regularization parameter for smoothing.
+        - dtype: Storage type of the kernel and evaluation matrices. With np.float32 the kernel is
+                 factorized in single precision and the solution refined in double precision, which
+                 halves the memory of the n x n matrices while keeping float64 accuracy.
+        - refine_steps: Maximum number of iterative refinement steps of the single-precision solve.
         """
         self.lambda_val = lambda_val
+        self.dtype = np.dtype(dtype)
+        self.refine_steps = refine_steps
         self.w = None  # Non-affine coefficients
         self.b = None  # Affine coefficients
         self.X_training = None  # Training points
         self.N = None  # Matrix for affine part
+        self.evaluation_dtype = self.dtype  # Type of the kernel blocks used by interpolate
+        self.refined = None  # Whether the last mixed-precision solve converged without fallback
 
     def compute_green_function(self, xr, xc):
         """
@@ -25,15 +45,33 @@ class ThinPlateSplineInterpolator(BaseInterpolator):
         #return 1 / np.pi * r ** 2 * np.log(r + 1e-10)
         return  r ** 2 * np.log(r + 1e-10)
 
-    def construct_M(self, points):
+    def green_matrix(self, rows, cols, dtype=None):
+        """
+        Evaluates the Green's function between every row point and every column point.
+
+        Parameters:
+        - rows: array of shape (n, d).
+        - cols: array of shape (m, d).
+        - dtype: Type of the result, defaults to the interpolator's dtype.
+
+        Returns:
+        - array of shape (n, m).
+        """
+        dtype = self.dtype if dtype is None else np.dtype(dtype)
+        rows = np.asarray(rows, dtype=dtype)
+        cols = np.asarray(cols, dtype=dtype)
+        r = np.sqrt(((rows[:, np.newaxis, :] - cols[np.newaxis, :, :]) ** 2).sum(axis=2))
+        return r ** 2 * np.log(r + dtype.type(_LOG_OFFSET))
+
+    def construct_M(self, points, dtype=None):
         """
         Constructs the matrix M from the input points using the Green's function.
         """
+        dtype = self.dtype if dtype is None else np.dtype(dtype)
         n = points.shape[0]
-        M = np.zeros((n, n))
-        for i in range(n):
-            for j in range(n):
-                M[i, j] = self.compute_green_function(points[i, np.newaxis], points[j, np.newaxis])
+        M = np.empty((n, n), dtype=dtype)
+        for start in range(0, n, _BLOCK_ROWS):
+            M[start:start + _BLOCK_ROWS] = self.green_matrix(points[start:start + _BLOCK_ROWS], points, dtype)
         return M
 
     def construct_N(self, points):
@@ -49,28 +87,195 @@ class ThinPlateSplineInterpolator(BaseInterpolator):
         """
         self.X_training = X.astype(float)
         y = Y.astype(float).reshape(-1, 1)
-        M = self.construct_M(self.X_training)
-        N = self.construct_N(self.X_training)
+        solve_dtype = self.dtype
+        if solve_dtype != np.float64 and self.condition_estimate(self.X_training) * np.finfo(solve_dtype).eps > \
+                _SINGLE_PRECISION_LIMIT:
+            # Refinement would fail and fall back anyway, after holding both kernels
+            count('tps.precision_skipped')
+            solve_dtype = np.dtype(np.float64)
+            self.refined = False
+        with span('tps.kernel_assembly', points=len(y)):
+            M = self.construct_M(self.X_training, solve_dtype)
+            N = self.construct_N(self.X_training)
         self.N = N
 
         # Apply regularization
-        M_lambda_I = M + self.lambda_val * np.eye(M.shape[0])
+        M[np.diag_indices_from(M)] += self.lambda_val
+        kernel_max = float(np.abs(M).max(initial=0.0))
 
         # Solve for b and then for a
-        b = np.linalg.inv(N.T @ np.linalg.inv(M_lambda_I) @ N) @ N.T @ np.linalg.inv(M_lambda_I) @ y
-        w = np.linalg.inv(M_lambda_I) @ (y - N @ b)
+        with span('tps.solve', points=len(y), dtype=solve_dtype.name):
+            if solve_dtype == np.float64:
+                w, b = self._solve_float64(M, N, y)
+            else:
+                w, b = self._solve_mixed_precision(M, N, y)
 
         self.w = w
         self.b = b
+        # Evaluating with a single-precision kernel costs up to eps * max|M| * sum|w|; keep
+        # float64 evaluation when that rounding would be visible in the yields.
+        self.evaluation_dtype = solve_dtype
+        if solve_dtype != np.float64:
+            rounding = np.finfo(self.dtype).eps * kernel_max * np.abs(w).sum()
+            if rounding > _EVALUATION_TOLERANCE * max(np.abs(y).max(initial=0.0), 1e-12):
+                self.evaluation_dtype = np.dtype(np.float64)
+
+    def condition_estimate(self, points):
+        """
+        Rough condition number of the regularized kernel, from the largest kernel entry (at the
+        diameter of the points), the number of points and lambda, without building the kernel.
+        """
+        diameter = float(np.linalg.norm(np.ptp(points, axis=0))) if len(points) else 0.0
+        kernel_max = diameter ** 2 * np.log(diameter + _LOG_OFFSET)
+        return len(points) * max(kernel_max, 1.0) / self.lambda_val
+
+    def _solve_float64(self, M, N, y):
+        solution = np.linalg.solve(M, np.hstack((y, N)))
+        M_inv_y, M_inv_N = solution[:, :1], solution[:, 1:]
+        b = np.linalg.solve(N.T @ M_inv_N, N.T @ M_inv_y)
+        return M_inv_y - M_inv_N @ b, b
+
+    def _solve_mixed_precision(self, M, N, y):
+        """
+        Solves the bordered system [[M + lambda I, N], [N^T, 0]] [w; b] = [y; 0] with a
+        single-precision LU factorization and double-precision iterative refinement.
+        The residuals use the kernel recomputed in float64 one block of rows at a time,
+        so no n x n float64 matrix is held unless refinement fails to converge: the
+        single-precision factors are only useful while the kernel's condition number is
+        well below 1 / eps(float32), so otherwise the system is re-solved in float64.
+        """
+        from scipy.linalg import lu_factor, lu_solve
+
+        scale = np.abs(M).sum(axis=1, dtype=float).max() + np.abs(N).sum(axis=1).max()
+        factors = lu_factor(M, overwrite_a=True, check_finite=False)
+        M_inv_N = lu_solve(factors, N.astype(self.dtype), check_finite=False).astype(float)
+        schur = N.T @ M_inv_N
+
+        def approximate_solve(r_w, r_b):
+            M_inv_r = lu_solve(factors, r_w.astype(self.dtype), check_finite=False).astype(float)
+            b = np.linalg.solve(schur, N.T @ M_inv_r - r_b)
+            return M_inv_r - M_inv_N @ b, b
+
+        w, b = approximate_solve(y, np.zeros((N.shape[1], 1)))
+        for _ in range(self.refine_steps + 1):
+            r_w = y - self._kernel_matvec(w) - self.lambda_val * w - N @ b
+            r_b = -N.T @ w
+            # Normwise backward error of the current solution
+            error = max(np.abs(r_w).max(), np.abs(r_b).max()) / (
+                scale * max(np.abs(w).max(), np.abs(b).max()) + np.abs(y).max())
+            if error <= 64 * np.finfo(float).eps:
+                self.refined = True
+                return w, b
+            d_w, d_b = approximate_solve(r_w, r_b)
+            w += d_w
+            b += d_b
+
+        count('tps.precision_fallbacks')
+        self.refined = False
+        M = self.construct_M(self.X_training, np.float64)
+        M[np.diag_indices_from(M)] += self.lambda_val
+        return self._solve_float64(M, N, y)
+
+    def _kernel_matvec(self, v):
+        """
+        Multiplies the float64 kernel of the training points by v without storing it.
+        """
+        out = np.empty((self.X_training.shape[0], v.shape[1]))
+        for start in range(0, len(out), _BLOCK_ROWS):
+            block = self.green_matrix(self.X_training[start:start + _BLOCK_ROWS], self.X_training, np.float64)
+            out[start:start + _BLOCK_ROWS] = block @ v
+        return out
+
+    def influence_matrix(self, X_train, X_eval):
+        """
+        Computes the matrix S such that fitting on (X_train, y) and interpolating at X_eval
+        gives S @ y for every y: the smoothing spline is linear in the fitted values.
+
+        With A = M + lambda I, the fit solves b = (N^T A^-1 N)^-1 N^T A^-1 y = B y and
+        w = A^-1 (y - N b) = W y, so S = G(X_eval, X_train) W + N(X_eval) B.
+
+        Parameters:
+        - X_train: array of shape (n, 2), Points the spline would be fitted on.
+        - X_eval: array of shape (m, 2), Points it would be evaluated at.
+
+        Returns:
+        - array of shape (m, n).
+        """
+        X_train = np.asarray(X_train, dtype=float)
+        X_eval = np.atleast_2d(np.asarray(X_eval, dtype=float))
+        n = X_train.shape[0]
+        with span('tps.influence', points=n, outputs=len(X_eval)):
+            A = self.construct_M(X_train, np.float64)
+            A[np.diag_indices_from(A)] += self.lambda_val
+            N = self.construct_N(X_train)
+            solution = np.linalg.solve(A, np.hstack((np.eye(n), N)))
+            A_inv, A_inv_N = solution[:, :n], solution[:, n:]
+            # A is symmetric, so (A^-1 N)^T = N^T A^-1
+            B = np.linalg.solve(N.T @ A_inv_N, A_inv_N.T)
+            W = A_inv - A_inv_N @ B
+
+            S = self.construct_N(X_eval) @ B
+            for start in range(0, X_eval.shape[0], _BLOCK_ROWS):
+                S[start:start + _BLOCK_ROWS] += self.green_matrix(X_eval[start:start + _BLOCK_ROWS], X_train,
+                                                                  np.float64) @ W
+        return S
 
     def interpolate(self, X):
         """
         Interpolates the value at a new point x using the fitted model.
         """
         X = np.atleast_2d(X).astype(float)
-        green_values = np.array([self.compute_green_function(x_i, self.X_training) for x_i in X])
-        non_affine_part = green_values @ self.w
-        extended_X = np.hstack((np.ones((X.shape[0], 1)),X))
-        affine_part = extended_X @ self.b
+        with span('tps.interpolate', points=len(X)):
+            non_affine_part = np.empty((X.shape[0], self.w.shape[1]))
+            w = self.w.astype(self.evaluation_dtype)
+            for start in range(0, X.shape[0], _BLOCK_ROWS):
+                green_values = self.green_matrix(X[start:start + _BLOCK_ROWS], self.X_training,
+                                                 self.evaluation_dtype)
+                non_affine_part[start:start + _BLOCK_ROWS] = green_values @ w
+            extended_X = np.hstack((np.ones((X.shape[0], 1)),X))
+            affine_part = extended_X @ self.b
         return non_affine_part + affine_part
 
+    def interpolate_with_derivatives(self, X, order=1):
+        """
+        Evaluates the fitted surface and its analytic gradient and Hessian at new points.
+
+        The distances to the training points are computed once per block of rows and shared by
+        the value, gradient and Hessian terms. With G(r) = r^2 log(r + e) and d = x - x_k:
+        dG/dx = psi(r) d and d2G/dx2 = psi(r) I + chi(r) d d^T, where psi(r) = 2 log(r + e) + r / (r + e)
+        and chi(r) = (2 / (r + e) + e / (r + e)^2) / r. The affine part adds b to the gradient.
+        The second derivatives of a thin plate spline grow like log(r) near its centers, so the
+        Hessian at a training point only reflects the offset e of the logarithm.
+
+        Parameters:
+        - X: array of shape (m, 2), Points (rating value, tenor) at which to evaluate.
+        - order: int, 0 for values only, 1 to add the gradient, 2 to add the Hessian.
+
+        Returns:
+        - tuple: values of shape (m,), then the gradient of shape (m, 2) if order >= 1 and the
+          Hessian of shape (m, 2, 2) if order >= 2, all in float64.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        m, d = X.shape
+        w = self.w[:, 0].astype(float)
+        b = self.b[:, 0]
+        values = X @ b[1:] + b[0]
+        gradient = np.tile(b[1:], (m, 1)) if order >= 1 else None
+        hessian = np.zeros((m, d, d)) if order >= 2 else None
+        with span('tps.derivatives', points=m, order=order):
+            for start in range(0, m, _BLOCK_ROWS):
+                rows = slice(start, start + _BLOCK_ROWS)
+                delta = X[rows, np.newaxis, :] - self.X_training[np.newaxis, :, :]
+                r = np.sqrt((delta ** 2).sum(axis=2))
+                shifted = r + _LOG_OFFSET
+                log = np.log(shifted)
+                values[rows] += (r ** 2 * log) @ w
+                if order >= 1:
+                    psi_w = (2 * log + r / shifted) * w
+                    gradient[rows] += np.einsum('bn,bnk->bk', psi_w, delta)
+                if order >= 2:
+                    hessian[rows] += psi_w.sum(axis=1)[:, np.newaxis, np.newaxis] * np.eye(d)
+                    # chi d d^T stays bounded as r -> 0 and vanishes with d at the centers
+                    chi = np.divide(2 / shifted + _LOG_OFFSET / shifted ** 2, r, out=np.zeros_like(r), where=r > 0)
+                    hessian[rows] += np.einsum('bn,bnk,bnl->bkl', chi * w, delta, delta)
+        return (values, gradient, hessian)[:order + 1]
@@ -0,0 +1,362 @@
+import argparse
+import asyncio
+import sys
+import time
+from collections import deque
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from bond_yield.batch import build_surface, make_interpolator_factory
+from bond_yield.interpolators.influence import InfluenceCache
+from bond_yield.service import lookup_points
+from bond_yield.utils.date_frames import iter_date_frames
+from bond_yield.utils.profiling import count, span
+
+DEFAULT_LATENCY_BUDGET = 0.05
+TICK_COLUMNS = ['time', 'date', 'rating', 'tenor', 'yield']
+
+
+class SurfaceSnapshot:
+    """
+    One published version of a date's filled surface. Snapshots are never modified once
+    published; a refit publishes a new one.
+    """
+
+    def __init__(self, date, version, surface, ticks, published_at):
+        """
+        Parameters:
+        - date: Date of the surface.
+        - version: int, Number of refits of the date published before this one.
+        - surface: DataFrame, Filled surface indexed by rating labels with tenors as columns.
+        - ticks: int, Ticks received for the date up to this version.
+        - published_at: float, `time.perf_counter()` at publication.
+        """
+        self.date = date
+        self.version = version
+        self.surface = surface
+        self.ticks = ticks
+        self.published_at = published_at
+
+
+def read_ticks(path):
+    """
+    Read a recorded tick file: a CSV with the columns time (seconds since the start of the
+    recording), date, rating, tenor (in days) and yield. An empty yield withdraws the quote.
+
+    Returns:
+    - DataFrame: Ticks in the order of their time.
+    """
+    ticks = pd.read_csv(path, dtype={'date': str, 'rating': str})
+    missing = [column for column in TICK_COLUMNS if column not in ticks.columns]
+    if missing:
+        raise ValueError(f"Tick file {path} lacks the columns {missing}.")
+    return ticks[TICK_COLUMNS].sort_values('time', kind='stable').reset_index(drop=True)
+
+
+class LiveSurfaceIngestor:
+    """
+    Keep the filled surfaces of a few dates current while single quotes change.
+
+    Ticks are only recorded when they arrive. A background task refits each date touched
+    since its last publication once per batch, waiting as long as the latency budget allows
+    (the budget minus the expected refit time, counted from the oldest unpublished tick), so a
+    burst of ticks on the same quotes costs one refit and only its last values are used.
+    With the TPS interpolator the refit is a lookup of the date's influence matrix, which only
+    changes when quotes appear or disappear (or, with the 'yield' and 'slope' scales, when the
+    rating coordinates move), followed by one matrix-vector product. Each refit publishes a new
+    `SurfaceSnapshot` in a single assignment, so readers see either the old or the new surface.
+    """
+
+    def __init__(self, date_dataframes, interpolator='tps', interpolator_params=None, rating_scale='yield',
+                 rating_map=None, latency_budget=DEFAULT_LATENCY_BUDGET, latency_window=1000):
+        """
+        Parameters:
+        - date_dataframes: dict of date -> DataFrame, or an iterable of (date, DataFrame) pairs,
+                           Quotes the surfaces start from.
+        - interpolator: str, Name registered in `bond_yield.interpolators.registry`.
+        - interpolator_params: dict, optional, Keyword arguments for the interpolator.
+        - rating_scale: str, See `bond_yield.batch.build_rating_scale`.
+        - rating_map: dict, optional, Rating label -> value.
+        - latency_budget: float, Seconds allowed between a tick and the publication including it.
+        - latency_window: int, Number of recent publication latencies kept for percentiles.
+        """
+        self.frames = {date: df.astype(float) for date, df in iter_date_frames(date_dataframes)}
+        self.rating_scale = rating_scale
+        self.rating_map = rating_map
+        self.latency_budget = latency_budget
+        self.influence = None
+        if interpolator == 'tps':
+            params = dict(interpolator_params or {})
+            if set(params) <= {'lambda_val'}:
+                self.influence = InfluenceCache(lambda_val=params.get('lambda_val', 0.1), rating_scale=rating_scale,
+                                                rating_map=rating_map)
+        self.factory = make_interpolator_factory(interpolator, interpolator_params)
+
+        self.snapshots = {}
+        self.errors = {}
+        self.latencies = deque(maxlen=latency_window)
+        self.ticks = 0
+        self.coalesced = 0
+        self.refits = 0
+        self.reused = 0
+        self.rebuilt = 0
+        self._date_ticks = {}
+        self._pending = {}
+        self._oldest = None
+        self._refit_seconds = 0.0
+        self._wake = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._published = asyncio.Condition()
+        self._task = None
+
+    async def start(self):
+        """
+        Publish version 0 of every initial date and start refitting in the background.
+        """
+        loop = asyncio.get_running_loop()
+        for date in list(self.frames):
+            surface, _ = await loop.run_in_executor(None, self._fit, date)
+            await self._publish(date, surface, time.perf_counter())
+        self._idle.set()
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def stop(self):
+        """
+        Publish the pending ticks and stop the background task.
+        """
+        if self._task is None:
+            return
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def submit(self, date, rating, tenor, value):
+        """
+        Record one quote update; `value` None or NaN withdraws the quote. Returns immediately.
+        """
+        updates = self._pending.setdefault(date, {})
+        if (rating, tenor) in updates:
+            self.coalesced += 1
+        updates[(rating, tenor)] = np.nan if value is None else float(value)
+        self.ticks += 1
+        self._date_ticks[date] = self._date_ticks.get(date, 0) + 1
+        if self._oldest is None:
+            self._oldest = time.perf_counter()
+        self._idle.clear()
+        self._wake.set()
+
+    async def flush(self):
+        """
+        Wait until every tick submitted so far is published.
+        """
+        await self._idle.wait()
+
+    def snapshot(self, date):
+        """
+        Return the latest published snapshot of `date`.
+        """
+        snapshot = self.snapshots.get(date)
+        if snapshot is None:
+            raise KeyError(f"No surface for date {date}.")
+        return snapshot
+
+    async def wait_for_version(self, date, version):
+        """
+        Wait until `date` has a snapshot of at least `version` and return it.
+        """
+        async with self._published:
+            await self._published.wait_for(lambda: date in self.snapshots and self.snapshots[date].version >= version)
+            return self.snapshots[date]
+
+    def lookup(self, date, ratings, tenors):
+        """
+        Evaluate the latest snapshot of `date` at many points; see `bond_yield.service.lookup_points`.
+        """
+        return lookup_points(self.snapshot(date).surface, ratings, tenors)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wake.wait()
+            # Let the burst coalesce for as long as the budget leaves after the expected refits
+            delay = (self._oldest + self.latency_budget - len(self._pending) * self._refit_seconds
+                     - time.perf_counter())
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._wake.clear()
+            pending, oldest = self._pending, self._oldest
+            self._pending, self._oldest = {}, None
+
+            try:
+                for date, updates in pending.items():
+                    started = time.perf_counter()
+                    try:
+                        refit = await loop.run_in_executor(None, partial(self._apply, date, updates))
+                    except Exception as error:
+                        # One bad date must not stop the refits of the others
+                        count('live.failures')
+                        self.errors[date] = f'{type(error).__name__}: {error}'
+                        continue
+                    elapsed = time.perf_counter() - started
+                    self._refit_seconds = elapsed if not self.refits else 0.8 * self._refit_seconds + 0.2 * elapsed
+                    self.refits += 1
+                    if refit is not None:
+                        surface, reused = refit
+                        if reused:
+                            self.reused += 1
+                            count('live.reused_factorizations')
+                        else:
+                            self.rebuilt += 1
+                        await self._publish(date, surface, oldest)
+            finally:
+                # Waiters of flush() are released even if this task stops
+                if not self._pending:
+                    self._idle.set()
+
+    def _apply(self, date, updates):
+        """
+        Apply the coalesced updates of one date and refit it.
+
+        Returns:
+        - tuple: See `_fit`, or None when the updates left every quote unchanged.
+        """
+        df = self.frames.get(date)
+        if df is None:
+            df = pd.DataFrame(dtype=float)
+            df.index.name = 'Rating'
+        before = df
+        ratings = [rating for rating, _ in updates if rating not in df.index]
+        tenors = [tenor for _, tenor in updates if tenor not in df.columns]
+        if ratings or tenors:
+            # Same axis order as the loaders: ratings lexically, tenors numerically
+            df = df.reindex(index=pd.Index(sorted(set(df.index) | set(ratings)), name=df.index.name),
+                            columns=pd.Index(sorted(set(df.columns) | set(tenors)), name=df.columns.name))
+        else:
+            df = df.copy()
+        rows = df.index.get_indexer([rating for rating, _ in updates])
+        cols = df.columns.get_indexer([tenor for _, tenor in updates])
+        values = df.to_numpy()
+        values[rows, cols] = list(updates.values())
+        df.iloc[:, :] = values
+        if df.shape == before.shape and np.array_equal(values, before.to_numpy(), equal_nan=True):
+            return None
+        self.frames[date] = df
+        return self._fit(date)
+
+    def _fit(self, date):
+        """
+        Returns:
+        - tuple: (filled surface, whether an influence matrix was reused).
+        """
+        df = self.frames[date]
+        with span('live.refit', quotes=int(df.notna().to_numpy().sum())):
+            if self.influence is None:
+                return build_surface(df, self.factory, self.rating_scale, self.rating_map), False
+            misses = self.influence.misses
+            surface = self.influence.get(df).fill(df)
+        return surface, self.influence.misses == misses
+
+    async def _publish(self, date, surface, oldest):
+        previous = self.snapshots.get(date)
+        published_at = time.perf_counter()
+        snapshot = SurfaceSnapshot(date, 0 if previous is None else previous.version + 1, surface,
+                                   self._date_ticks.get(date, 0), published_at)
+        async with self._published:
+            self.snapshots[date] = snapshot
+            self.errors.pop(date, None)
+            self._published.notify_all()
+        if previous is not None:
+            self.latencies.append(published_at - oldest)
+        count('live.published')
+
+    def metrics(self):
+        latencies = np.array(self.latencies) * 1000
+        return {
+            'ticks': self.ticks,
+            'coalesced': self.coalesced,
+            'refits': self.refits,
+            'reused_factorizations': self.reused,
+            'rebuilt': self.rebuilt,
+            'versions': {str(date): snapshot.version for date, snapshot in self.snapshots.items()},
+            'errors': dict(self.errors),
+            'latency_ms': {
+                'count': len(latencies),
+                'p50': float(np.percentile(latencies, 50)) if len(latencies) else None,
+                'p99': float(np.percentile(latencies, 99)) if len(latencies) else None,
+                'max': float(latencies.max()) if len(latencies) else None,
+            },
+        }
+
+
+async def replay_ticks(ingestor, ticks, speed=None):
+    """
+    Feed recorded ticks to a started ingestor and wait until they are all published.
+
+    Parameters:
+    - ingestor: LiveSurfaceIngestor.
+    - ticks: DataFrame, As returned by `read_ticks`.
+    - speed: float, optional, Replay this many times faster than recorded; None sends the ticks
+             as fast as possible, yielding to the event loop between ticks.
+    """
+    started = time.perf_counter()
+    for at, date, rating, tenor, value in ticks[TICK_COLUMNS].itertuples(index=False, name=None):
+        if speed:
+            delay = at / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)
+        ingestor.submit(date, rating, int(tenor), None if pd.isna(value) else value)
+    await ingestor.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a recorded tick file through the live surface ingestor.')
+    parser.add_argument('source', help='Wide historical CSV or cube directory with the starting quotes.')
+    parser.add_argument('ticks', help='Tick CSV with the columns time, date, rating, tenor and yield.')
+    parser.add_argument('--speed', type=float, help='Replay this many times faster than recorded '
+                                                    '(default: as fast as possible).')
+    parser.add_argument('--latency-budget', type=float, default=DEFAULT_LATENCY_BUDGET)
+    parser.add_argument('--lambda', dest='lambda_val', type=float, default=0.1)
+    parser.add_argument('--rating-scale', default='yield', choices=('ordinal', 'yield', 'slope'))
+    parser.add_argument('--rating-map', help='YAML file mapping rating labels to values.')
+    args = parser.parse_args(argv)
+
+    from bond_yield.batch import load_rating_map
+    from bond_yield.data_processing.loader import load_bond_yields
+
+    ticks = read_ticks(args.ticks)
+    dates = sorted(ticks['date'].unique())
+    history = load_bond_yields(args.source, start_date=dates[0], end_date=dates[-1])
+
+    async def replay():
+        async with LiveSurfaceIngestor(history, interpolator_params={'lambda_val': args.lambda_val},
+                                       rating_scale=args.rating_scale,
+                                       rating_map=load_rating_map(args.rating_map) if args.rating_map else None,
+                                       latency_budget=args.latency_budget) as ingestor:
+            await replay_ticks(ingestor, ticks, args.speed)
+            return ingestor.metrics()
+
+    metrics = asyncio.run(replay())
+    latency = metrics['latency_ms']
+    print(f"{metrics['ticks']} ticks, {metrics['coalesced']} coalesced, {metrics['refits']} refits "
+          f"({metrics['reused_factorizations']} reusing a factorization), publication latency "
+          f"p50 {latency['p50'] or 0:.1f} ms, p99 {latency['p99'] or 0:.1f} ms")
+    return 1 if metrics['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from bond_yield.batch import build_surface, make_interpolator_factory
+from bond_yield.data_processing.loader import iter_bond_yields, load_bond_yields
+from bond_yield.data_processing.multi_file_loader import is_multi_file_source
+from bond_yield.data_processing.yield_cube import YieldCube, is_yield_cube
+from bond_yield.utils.profiling import count, span
+
+DEFAULT_CACHE_BYTES = 256 * 2 ** 20
+
+
+class SurfaceCache:
+    """
+    Least-recently-used cache of filled surfaces, bounded by their memory footprint.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        """
+        Parameters:
+        - max_bytes: int, Total size of the cached surfaces above which the oldest are evicted.
+        """
+        self.max_bytes = max_bytes
+        self.surfaces = OrderedDict()
+        self.sizes = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, date):
+        surface = self.surfaces.get(date)
+        if surface is None:
+            self.misses += 1
+            return None
+        self.surfaces.move_to_end(date)
+        self.hits += 1
+        return surface
+
+    def put(self, date, surface):
+        if date in self.surfaces:
+            self.current_bytes -= self.sizes.pop(date)
+            del self.surfaces[date]
+        size = int(surface.memory_usage(deep=True).sum())
+        self.surfaces[date] = surface
+        self.sizes[date] = size
+        self.current_bytes += size
+        # Always keep the newest surface, even if it alone exceeds the budget
+        while self.current_bytes > self.max_bytes and len(self.surfaces) > 1:
+            oldest, _ = self.surfaces.popitem(last=False)
+            self.current_bytes -= self.sizes.pop(oldest)
+            self.evictions += 1
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'evictions': self.evictions,
+            'dates': len(self.surfaces),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+        }
+
+
+def make_surface_loader(source, interpolator='tps', interpolator_params=None, rating_scale='yield',
+                        rating_map=None):
+    """
+    Build a callable that fits the filled surface of one date from a CSV or cube source.
+
+    A cube is opened once, memory-mapped, and each call only reads the requested date. A
+    directory or glob of daily files is parsed and merged once, here, and kept in memory, since
+    any file may hold quotes of a date. A CSV has to be scanned for the date on every call, so
+    cubes are preferred for serving.
+
+    Returns:
+    - callable: date -> filled DataFrame indexed by rating labels with tenors in days as columns.
+    """
+    factory = make_interpolator_factory(interpolator, interpolator_params)
+    cube = YieldCube.open(source) if is_yield_cube(source) else None
+    history = load_bond_yields(source) if cube is None and is_multi_file_source(source) else None
+
+    def load(date):
+        if cube is not None:
+            positions = cube.date_positions(date, date)
+            if positions.stop - positions.start != 1:
+                raise KeyError(f"No data for date {date}.")
+            df = cube.frame_at(positions.start)
+        elif history is not None:
+            if date not in history:
+                raise KeyError(f"No data for date {date}.")
+            df = history[date].copy()
+        else:
+            frames = list(iter_bond_yields(source, start_date=date, end_date=date))
+            if len(frames) != 1:
+                raise KeyError(f"No data for date {date}.")
+            df = frames[0][1]
+        return build_surface(df, factory, rating_scale, rating_map)
+
+    return load
+
+
+def lookup_points(surface, ratings, tenors):
+    """
+    Evaluate a filled surface at many (rating, tenor) points at once.
+
+    Tenors on the grid are read directly; tenors between grid points are linearly interpolated
+    along the rating's curve and tenors outside the grid take the nearest end value.
+
+    Parameters:
+    - surface: DataFrame, Filled surface indexed by rating labels with numeric tenors as columns.
+    - ratings: sequence of rating labels.
+    - tenors: sequence of tenors in the surface's column units.
+
+    Returns:
+    - np.ndarray: Yields, one per point.
+    """
+    rows = surface.index.get_indexer(list(ratings))
+    if np.any(rows < 0):
+        unknown = sorted({str(rating) for rating, row in zip(ratings, rows) if row < 0})
+        raise KeyError(f"Unknown ratings {unknown}.")
+
+    grid = surface.columns.to_numpy(dtype=float)
+    values = surface.to_numpy(dtype=float)
+    tenors = np.clip(np.asarray(tenors, dtype=float), grid[0], grid[-1])
+
+    if len(grid) == 1:
+        return values[rows, 0]
+    right = np.clip(np.searchsorted(grid, tenors, side='left'), 1, len(grid) - 1)
+    left = right - 1
+    span = grid[right] - grid[left]
+    weight = np.divide(tenors - grid[left], span, out=np.zeros_like(tenors), where=span > 0)
+    return values[rows, left] * (1 - weight) + values[rows, right] * weight
+
+
+class SurfaceQueryService:
+    """
+    Answer batched (date, rating, tenor) yield queries from cached, lazily fitted surfaces.
+    """
+
+    def __init__(self, loader, max_cache_bytes=DEFAULT_CACHE_BYTES, latency_window=1000):
+        """
+        Parameters:
+        - loader: callable, date -> filled surface DataFrame (e.g. from `make_surface_loader`).
+        - max_cache_bytes: int, Memory cap of the surface cache.
+        - latency_window: int, Number of recent request latencies kept for percentiles.
+        """
+        self.loader = loader
+        self.cache = SurfaceCache(max_cache_bytes)
+        self.latencies = deque(maxlen=latency_window)
+        self.requests = 0
+        self.errors = 0
+        self.points = 0
+        self.surfaces_loaded = 0
+        self._pending = {}
+
+    async def get_surface(self, date):
+        """
+        Return the surface of `date`, fitting it in a worker thread on a cache miss. Concurrent
+        requests for the same missing date share one fit.
+        """
+        surface = self.cache.get(date)
+        if surface is not None:
+            return surface
+
+        pending = self._pending.get(date)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            count('service.surface_loads')
+            pending = loop.run_in_executor(None, partial(self.loader, date))
+            self._pending[date] = pending
+            try:
+                surface = await pending
+            finally:
+                del self._pending[date]
+            self.cache.put(date, surface)
+            self.surfaces_loaded += 1
+            return surface
+        return await asyncio.shield(pending)
+
+    async def query(self, queries):
+        """
+        Evaluate a batch of points, grouped by date so each surface is looked up once.
+
+        Parameters:
+        - queries: list of dict, Each with 'date', 'rating' and 'tenor'.
+
+        Returns:
+        - list of float: Yields in the order of `queries`.
+        """
+        if not isinstance(queries, list):
+            raise ValueError("Expected 'queries' to be a list.")
+        for position, query in enumerate(queries):
+            if not isinstance(query, dict) or any(query.get(key) is None for key in ('date', 'rating', 'tenor')):
+                raise ValueError(f"Query {position} needs a date, a rating and a tenor.")
+        frame = pd.DataFrame(queries, columns=['date', 'rating', 'tenor'])
+        results = np.full(len(frame), np.nan)
+        for date, group in frame.groupby('date', sort=False):
+            surface = await self.get_surface(date)
+            with span('service.lookup', points=len(group)):
+                results[group.index.to_numpy()] = lookup_points(surface, group['rating'].tolist(),
+                                                                group['tenor'].to_numpy(dtype=float))
+        self.points += len(frame)
+        return results.tolist()
+
+    def metrics(self):
+        latencies = np.array(self.latencies) * 1000
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'points': self.points,
+            'surfaces_loaded': self.surfaces_loaded,
+            'latency_ms': {
+                'count': len(latencies),
+                'mean': float(latencies.mean()) if len(latencies) else None,
+                'p50': float(np.percentile(latencies, 50)) if len(latencies) else None,
+                'p99': float(np.percentile(latencies, 99)) if len(latencies) else None,
+                'max': float(latencies.max()) if len(latencies) else None,
+            },
+            'cache': self.cache.metrics(),
+        }
+
+    async def handle(self, method, path, body):
+        """
+        Route one HTTP request.
+
+        Returns:
+        - tuple: (status code, JSON-serialisable response body).
+        """
+        started = time.perf_counter()
+        self.requests += 1
+        try:
+            if method == 'POST' and path == '/query':
+                payload = json.loads(body or b'{}')
+                if not isinstance(payload, dict):
+                    raise ValueError("Expected a JSON object with 'queries'.")
+                return 200, {'yields': await self.query(payload.get('queries', []))}
+            if method == 'GET' and path == '/metrics':
+                return 200, self.metrics()
+            if method == 'GET' and path == '/health':
+                return 200, {'status': 'ok'}
+            self.errors += 1
+            return 404, {'error': f'No route for {method} {path}.'}
+        except np.linalg.LinAlgError as error:
+            # A subclass of ValueError, but a surface that cannot be fitted is not the client's fault
+            self.errors += 1
+            return 500, {'error': f'{type(error).__name__}: {error}'}
+        except (KeyError, ValueError) as error:
+            self.errors += 1
+            return 400, {'error': str(error)}
+        except Exception as error:
+            # Any other failure (e.g. a surface that cannot be fitted) still gets a response
+            self.errors += 1
+            return 500, {'error': f'{type(error).__name__}: {error}'}
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serve HTTP/1.1 requests on one connection until the client closes it. A request that
+        cannot be parsed gets a 400 response and the connection is closed.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, headers = await self._read_head(request_line, reader)
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError(f"Negative Content-Length {length}.")
+                except ValueError as error:
+                    self.requests += 1
+                    self.errors += 1
+                    await self._respond(writer, 400, {'error': f'Malformed request: {error}'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length)
+
+                status, response = await self.handle(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_head(request_line, reader):
+        """
+        Parse the request line and headers; raises ValueError if they are malformed.
+        """
+        parts = request_line.decode('latin-1').rstrip('\r\n').split(' ')
+        if len(parts) != 3:
+            raise ValueError(f"Expected 'METHOD PATH VERSION', got {request_line!r}.")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, separator, value = line.decode('latin-1').partition(':')
+            if not separator:
+                raise ValueError(f"Header line without ':', got {line!r}.")
+            headers[name.strip().lower()] = value.strip()
+        return parts[0], parts[1], headers
+
+    @staticmethod
+    async def _respond(writer, status, response, keep_alive):
+        payload = json.dumps(response).encode('utf-8')
+        writer.write(f'HTTP/1.1 {status} {_REASONS.get(status, "")}\r\n'
+                     f'Content-Type: application/json\r\n'
+                     f'Content-Length: {len(payload)}\r\n'
+                     f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1')
+                     + payload)
+        await writer.drain()
+
+    async def start(self, host='127.0.0.1', port=8765, unix_path=None):
+        """
+        Start listening on a TCP port on localhost, or on a Unix socket if `unix_path` is given.
+
+        Returns:
+        - asyncio.Server: The running server; use `server.sockets[0].getsockname()` for the bound port.
+        """
+        if unix_path is not None:
+            return await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+        return await asyncio.start_server(self.handle_connection, host=host, port=port)
+
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}
+
+
+async def request(method, path, payload=None, host='127.0.0.1', port=8765, unix_path=None):
+    """
+    Minimal client: send one request to a running service and return (status, decoded JSON).
+    """
+    if unix_path is not None:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n'
+                 f'Connection: close\r\n\r\n'.encode('latin-1') + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, value = line.decode('latin-1').split(':', 1)
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    response = json.loads(await reader.readexactly(length))
+    writer.close()
+    return status, response
+
+
+async def serve_forever(service, host='127.0.0.1', port=8765, unix_path=None):
+    server = await service.start(host, port, unix_path)
+    async with server:
+        await server.serve_forever()
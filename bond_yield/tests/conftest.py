@@ -0,0 +1,11 @@
+import pytest
+from bond_yield.interpolators import registry
+
+
+@pytest.fixture
+def clean_registry(monkeypatch):
+    """
+    Give the test a copy of the interpolator registry, so that test registrations are dropped afterwards.
+    """
+    monkeypatch.setattr(registry, '_REGISTRY', dict(registry._REGISTRY))
+    return registry
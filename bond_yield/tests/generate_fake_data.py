@@ -33,12 +33,13 @@ def generate_fake_bond_yields(start_date, end_date):
     return df
 
 
-# Generate the fake bond yields data
-df_bond_yields = generate_fake_bond_yields('20230101', '20230130')
+if __name__ == "__main__":
+    # Generate the fake bond yields data
+    df_bond_yields = generate_fake_bond_yields('20230101', '20230130')
 
-# Specify the file path (adjust the path as needed for your project structure)
-file_path = './sample_historical_bond_yields.csv'
-# Save the DataFrame to a CSV file
-df_bond_yields.to_csv(file_path)
+    # Specify the file path (adjust the path as needed for your project structure)
+    file_path = './sample_historical_bond_yields.csv'
+    # Save the DataFrame to a CSV file
+    df_bond_yields.to_csv(file_path)
 
-print(f'Sample historical bond yields data has been saved to {file_path}')
+    print(f'Sample historical bond yields data has been saved to {file_path}')
@@ -0,0 +1,88 @@
+import builtins
+import io
+import pathlib
+import numpy as np
+import pandas as pd
+import pytest
+from bond_yield import batch
+from bond_yield.batch import _SurfaceWriter, build_rating_scale, build_surface, load_rating_map, run_batch
+from bond_yield.cli import main
+from bond_yield.data_processing.loader import load_bond_yields
+from bond_yield.data_processing.synthetic import generate_yield_cube, make_rating_labels
+from bond_yield.data_processing.yield_cube import YieldCube
+from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+
+TESTS_DIR = pathlib.Path(__file__).parent
+CSV_PATH = TESTS_DIR / 'sample_historical_bond_yields.csv'
+
+
+def test_run_batch_writes_wide_csv(tmp_path):
+    output = tmp_path / 'surfaces.csv'
+    summary = run_batch(CSV_PATH, output, end_date='2023-01-03', chunk_size=2, stream=io.StringIO())
+
+    assert summary['dates'] == 3
+    assert summary['failures'] == {}
+
+    written = load_bond_yields(output)
+    source = load_bond_yields(CSV_PATH, end_date='2023-01-03')
+    assert list(written.keys()) == list(source.keys())
+    expected = build_surface(source['2023-01-02'], ThinPlateSplineInterpolator)
+    np.testing.assert_allclose(written['2023-01-02'].to_numpy(), expected.to_numpy())
+
+
+def test_run_batch_opens_the_csv_once(tmp_path, monkeypatch):
+    output = tmp_path / 'surfaces.csv'
+    opened = []
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(path)
+        return builtins.open(path, *args, **kwargs)
+
+    monkeypatch.setattr(batch, 'open', counting_open, raising=False)
+    summary = run_batch(CSV_PATH, output, end_date='2023-01-03', chunk_size=1, stream=io.StringIO())
+    assert summary['dates'] == 3
+    assert opened == [output]
+    assert list(load_bond_yields(output).keys()) == ['2023-01-01', '2023-01-02', '2023-01-03']
+
+
+def test_writer_rejects_surfaces_on_another_grid(tmp_path):
+    surface = pd.DataFrame([[0.01, 0.02], [0.03, 0.04]], index=['A', 'AA'], columns=[365, 730])
+    for output_format, output in (('csv', tmp_path / 'surfaces.csv'), ('cube', tmp_path / 'cube')):
+        writer = _SurfaceWriter(output, output_format)
+        writer.write_many([('2023-01-01', surface)])
+        with pytest.raises(ValueError, match='2023-01-02'):
+            writer.write_many([('2023-01-02', surface.rename(index={'AA': 'AAA'}))])
+        with pytest.raises(ValueError, match='2023-01-03'):
+            writer.write_many([('2023-01-03', surface[[730, 365]])])
+        writer.close()
+
+
+def test_default_rating_scale_follows_credit_quality():
+    cube = generate_yield_cube(n_dates=3, n_ratings=8, n_tenors=6, missing_fraction=0.2, seed=5)
+    for date, df in cube.to_date_dataframes().items():
+        # The loaders' lexical order is not the credit order
+        assert list(df.index) != make_rating_labels(8)
+        scale = build_rating_scale(df)
+        assert np.all(np.diff([scale[rating] for rating in make_rating_labels(8)]) > 0)
+    with pytest.raises(ValueError, match='rating map'):
+        build_rating_scale(df, 'ordinal')
+
+
+def test_run_batch_with_workers_writes_cube(tmp_path):
+    rating_map = load_rating_map(TESTS_DIR / 'rating_scores.yaml')
+    summary = run_batch(CSV_PATH, tmp_path / 'cube', start_date='2023-01-10', end_date='2023-01-14',
+                        interpolator='linear', rating_map=rating_map, workers=2, chunk_size=2,
+                        output_format='cube', progress=False, stream=io.StringIO())
+
+    assert summary['dates'] == 5
+    cube = YieldCube.open(tmp_path / 'cube')
+    assert list(cube.dates) == ['2023-01-10', '2023-01-11', '2023-01-12', '2023-01-13', '2023-01-14']
+    assert not np.isnan(np.asarray(cube.values)).any()
+
+
+def test_cli_build(tmp_path):
+    output = tmp_path / 'surfaces.csv'
+    exit_code = main(['build', str(CSV_PATH), str(output), '--end', '2023-01-02', '--rating-scale', 'yield',
+                      '--interpolator-param', 'lambda_val=0.05', '--quiet'])
+    assert exit_code == 0
+    assert len(pd.read_csv(output, index_col=0)) == 2
@@ -0,0 +1,42 @@
+import json
+import numpy as np
+from bond_yield.analysis.benchmark import compare_results, load_results, make_history, run_suite, save_results, main
+
+
+def test_run_suite_records_time_and_memory(tmp_path):
+    results = run_suite(names=['tps_fit', 'linear_interpolate', 'load_bond_yields_cube'], repeat=1, progress=False,
+                        grid_sizes=[3, 4], history_lengths=[5], cv_dates=[2])
+
+    names = [record['name'] for record in results['results']]
+    assert names == ['tps_fit', 'tps_fit', 'linear_interpolate', 'linear_interpolate', 'load_bond_yields_cube']
+    for record in results['results']:
+        assert record['wall_seconds'] >= 0
+        assert record['peak_memory_bytes'] > 0
+
+    path = tmp_path / 'results.json'
+    save_results(results, path)
+    assert load_results(path) == json.loads(path.read_text())
+
+
+def test_history_ratings_follow_credit_order():
+    for df in make_history(3, 6, 5, missing_fraction=0.0).values():
+        assert list(df.index) == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+        assert np.all(np.diff(df.to_numpy(), axis=0) >= 0)
+
+
+def test_compare_results_flags_regressions():
+    baseline = {'results': [{'name': 'tps_fit', 'params': {'n_ratings': 3}, 'wall_seconds': 1.0, 'peak_memory_bytes': 100},
+                            {'name': 'linear_fit', 'params': {'n_ratings': 3}, 'wall_seconds': 1.0, 'peak_memory_bytes': 100}]}
+    candidate = {'results': [{'name': 'tps_fit', 'params': {'n_ratings': 3}, 'wall_seconds': 2.0, 'peak_memory_bytes': 100},
+                             {'name': 'linear_fit', 'params': {'n_ratings': 3}, 'wall_seconds': 1.05, 'peak_memory_bytes': 90}]}
+
+    rows = {row['name']: row for row in compare_results(baseline, candidate, threshold=1.2)}
+    assert rows['tps_fit']['regression']
+    assert rows['tps_fit']['time_ratio'] == 2.0
+    assert not rows['linear_fit']['regression']
+
+
+def test_benchmark_cli_run_and_compare(tmp_path):
+    output = tmp_path / 'run.json'
+    assert main(['run', str(output), '--only', 'linear_fit', '--grid-sizes', '3', '--repeat', '1']) == 0
+    assert main(['compare', str(output), str(output), '--threshold', '100']) == 0
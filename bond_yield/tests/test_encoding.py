@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bond_yield.analysis.splits import grid_observations
+from bond_yield.data_processing.encoding import KEEP_LABEL, LabelEncoder, ScaleVector
+from bond_yield.data_processing.rating_converter import (BaseRatingConverter, SimpleRatingConverter,
+                                                         YieldBasedRatingConverter)
+
+
+def test_label_encoder_round_trip():
+    encoder = LabelEncoder(['AAA', 'AA', 'A'])
+    codes = encoder.encode(pd.Index(['A', 'AAA', 'BBB']))
+    np.testing.assert_array_equal(codes, [2, 0, -1])
+    assert codes.dtype == np.int8
+    np.testing.assert_array_equal(encoder.decode([1, 2]), ['AA', 'A'])
+
+    with pytest.raises(ValueError, match='unique'):
+        LabelEncoder(['AAA', 'AAA'])
+
+
+def test_scale_vector_defaults():
+    scale = ScaleVector.from_mapping({'AAA': 1, 'AA': 2}, default=0)
+    np.testing.assert_array_equal(scale.convert_many(['AA', 'B', 'AAA']), [2.0, 0.0, 1.0])
+    assert list(scale.convert_many(['AA', 'B'], default=KEEP_LABEL)) == [2.0, 'B']
+
+    index = scale.map_index(pd.Index(['AAA', 'AA'], name='Rating'))
+    assert index.name == 'Rating' and list(index) == [1.0, 2.0]
+    assert scale.with_values([5, 6]).to_dict() == {'AAA': 5.0, 'AA': 6.0}
+
+
+def test_converters_convert_many():
+    converter = SimpleRatingConverter(rating_map={'AAA': 1, 'AA': 2})
+    np.testing.assert_array_equal(converter.convert_many(pd.Index(['AA', 'AAA'])), [2.0, 1.0])
+    assert converter.get_rating_scale() == {'AAA': 1, 'AA': 2}
+    with pytest.raises(ValueError, match='BBB'):
+        converter.convert_many(['AAA', 'BBB'])
+
+    df = pd.DataFrame({365: [0.01, np.nan], 720: [0.03, 0.04]}, index=['AAA', 'AA'])
+    yield_converter = YieldBasedRatingConverter(df)
+    np.testing.assert_allclose(yield_converter.convert_many(['AA', 'AAA', 'B']), [0.04, 0.02, 0.0])
+    assert yield_converter.rating_scale == yield_converter.get_rating_scale() == {'AAA': 0.02, 'AA': 0.04}
+
+
+def test_base_convert_many_uses_the_rating_scale():
+    class MappedConverter(BaseRatingConverter):
+        def convert(self, rating):
+            raise AssertionError("convert_many should not convert rating by rating")
+
+        def get_rating_scale(self):
+            return {'AAA': 1, 'AA': 2}
+
+    converter = MappedConverter()
+    np.testing.assert_array_equal(converter.convert_many(pd.Index(['AA', 'AAA'])), [2.0, 1.0])
+    with pytest.raises(ValueError, match='BBB'):
+        converter.convert_many(['BBB'])
+
+
+def test_grid_observations_order():
+    df = pd.DataFrame({365: [1.0, 2.0], 720: [3.0, 4.0]}, index=[10.0, 20.0])
+    X, y = grid_observations(df)
+    np.testing.assert_array_equal(X, [[10, 365], [20, 365], [10, 720], [20, 720]])
+    np.testing.assert_array_equal(y, [1.0, 2.0, 3.0, 4.0])
@@ -0,0 +1,52 @@
+import json
+import subprocess
+import sys
+
+# Cold-start budget for importing the interpolators in a fresh interpreter. numpy alone
+# takes roughly 0.15s, so this leaves room for slow machines but not for pandas/scipy.
+IMPORT_BUDGET_SECONDS = 1.0
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'modules': sorted(sys.modules)}}))
+"""
+
+
+def measure_cold_import(*modules):
+    script = IMPORT_SCRIPT.format(imports='\n'.join(f'import {module}' for module in modules))
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def loaded(result, package):
+    return any(module == package or module.startswith(package + '.') for module in result['modules'])
+
+
+def test_interpolators_cold_start_within_budget():
+    result = measure_cold_import(
+        'bond_yield.interpolators',
+        'bond_yield.interpolators.baseInterpolator',
+        'bond_yield.interpolators.thin_plate_spline',
+        'bond_yield.interpolators.linear',
+        'bond_yield.interpolators.interpolate_bond_yields',
+    )
+    for package in ('pandas', 'scipy', 'sklearn', 'yaml'):
+        assert not loaded(result, package), f"{package} should not be imported by the interpolators"
+    assert result['elapsed'] < IMPORT_BUDGET_SECONDS, f"Cold import took {result['elapsed']:.3f}s"
+
+
+def test_analysis_and_converters_defer_heavy_imports():
+    result = measure_cold_import(
+        'bond_yield.analysis.cross_validation',
+        'bond_yield.analysis.cross_validator',
+        'bond_yield.analysis.cross_validator_slope_rating_slope',
+        'bond_yield.data_processing.rating_converter',
+        'bond_yield.data_processing.rating_converter_by_slopes',
+        'bond_yield.data_processing.tenor_converter',
+    )
+    assert not loaded(result, 'sklearn')
+    assert not loaded(result, 'yaml')
+    assert not loaded(result, 'scipy.optimize')
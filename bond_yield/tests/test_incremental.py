@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from bond_yield.interpolators.incremental import IncrementalSurfaceBuilder
+from bond_yield.interpolators.interpolate_bond_yields import MatrixInterpolator
+from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+from bond_yield.utils.surface_store import SurfaceStore
+
+
+def create_history(n_dates):
+    rng = np.random.default_rng(0)
+    history = {}
+    for day in range(n_dates):
+        values = 0.02 + 0.01 * rng.random((3, 4))
+        values[rng.integers(0, 3), rng.integers(0, 4)] = np.nan
+        history[f'2023-01-{day + 1:02d}'] = pd.DataFrame(values, index=[1, 2, 3], columns=[365, 730, 1095, 1460])
+    return history
+
+
+def test_only_new_and_changed_dates_are_refitted(tmp_path):
+    store = SurfaceStore(tmp_path / 'store')
+    history = create_history(4)
+
+    builder = IncrementalSurfaceBuilder(ThinPlateSplineInterpolator, store)
+    first = builder.run({date: df.copy() for date, df in history.items()})
+    assert sorted(builder.last_run['new']) == sorted(history.keys())
+
+    history['2023-01-02'].iloc[0, 0] = 0.05
+    history['2023-01-05'] = create_history(5)['2023-01-05']
+
+    builder = IncrementalSurfaceBuilder(ThinPlateSplineInterpolator, store)
+    second = builder.run({date: df.copy() for date, df in history.items()})
+    assert builder.last_run['new'] == ['2023-01-05']
+    assert builder.last_run['changed'] == ['2023-01-02']
+    assert sorted(builder.last_run['unchanged']) == ['2023-01-01', '2023-01-03', '2023-01-04']
+
+    pd.testing.assert_frame_equal(first['2023-01-03'], second['2023-01-03'])
+    expected = MatrixInterpolator(ThinPlateSplineInterpolator()).fit_interpolate(history['2023-01-05'].copy())
+    np.testing.assert_allclose(second['2023-01-05'].to_numpy(), expected.to_numpy())
+
+
+def test_configuration_change_invalidates_store(tmp_path):
+    store = SurfaceStore(tmp_path / 'store')
+    history = create_history(2)
+
+    IncrementalSurfaceBuilder(ThinPlateSplineInterpolator, store).run(history)
+
+    builder = IncrementalSurfaceBuilder(lambda: ThinPlateSplineInterpolator(lambda_val=0.5), store)
+    builder.run(history)
+    assert sorted(builder.last_run['new']) == sorted(history.keys())
+
+
+def test_surfaces_keep_rating_and_tenor_labels(tmp_path):
+    from bond_yield.data_processing.rating_converter_by_slopes import (AbsoluteDifferenceStrategy,
+                                                                      SlopeMinimizingRatingConverter)
+
+    history = create_history(2)
+    for df in history.values():
+        df.index = ['AAA', 'AA', 'A']
+    converter = SlopeMinimizingRatingConverter({'AAA': 1.0, 'AA': 2.0, 'A': 3.0},
+                                               AbsoluteDifferenceStrategy(history['2023-01-01']))
+    builder = IncrementalSurfaceBuilder(ThinPlateSplineInterpolator, SurfaceStore(tmp_path / 'store'),
+                                        rating_converter=converter)
+    surfaces = builder.run({date: df.copy() for date, df in history.items()})
+
+    for date, df in history.items():
+        assert list(surfaces[date].index) == ['AAA', 'AA', 'A']
+        assert list(surfaces[date].columns) == [365, 730, 1095, 1460]
+        assert not surfaces[date].isna().any().any()
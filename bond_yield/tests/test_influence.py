@@ -0,0 +1,88 @@
+import pathlib
+import numpy as np
+import pandas as pd
+from bond_yield.batch import build_surface, load_rating_map
+from bond_yield.data_processing.loader import load_bond_yields
+from bond_yield.interpolators.influence import InfluenceCache, SurfaceInfluence
+from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+
+CSV_PATH = pathlib.Path(__file__).parent / 'sample_historical_bond_yields.csv'
+# Credit ranks 1..n in the order of the rating map
+RATING_MAP = {rating: float(rank) for rank, rating in
+              enumerate(load_rating_map(pathlib.Path(__file__).parent / 'rating_scores.yaml'), 1)}
+
+
+def _first_date():
+    history = load_bond_yields(str(CSV_PATH))
+    df = next(iter(history.values())).copy()
+    # Leave a few cells to fill
+    df.iloc[[1, 4, 7], [2, 5, 8]] = np.nan
+    return df
+
+
+def test_influence_matrix_matches_fit():
+    rng = np.random.default_rng(0)
+    X_train = rng.random((20, 2)) * 10
+    X_eval = rng.random((7, 2)) * 10
+    y = rng.random(20)
+
+    interpolator = ThinPlateSplineInterpolator(lambda_val=0.05)
+    interpolator.fit(X_train, y)
+    S = interpolator.influence_matrix(X_train, X_eval)
+    np.testing.assert_allclose(S @ y, interpolator.interpolate(X_eval).ravel(), rtol=1e-8, atol=1e-10)
+
+
+def test_fill_and_scenarios_match_refits():
+    df = _first_date()
+    factory = lambda: ThinPlateSplineInterpolator(lambda_val=0.1)
+    influence = SurfaceInfluence.from_frame(df, lambda_val=0.1, rating_scale='ordinal', rating_map=RATING_MAP)
+
+    expected = build_surface(df, factory, 'ordinal', RATING_MAP)
+    np.testing.assert_allclose(influence.fill(df).to_numpy(), expected.to_numpy(), rtol=1e-6, atol=1e-9)
+
+    # Bumping one quote moves the surface by that quote's sensitivity column
+    quotes = influence.quotes(df)
+    shocks = np.zeros((2, influence.n_quotes))
+    shocks[1, 0] = 1e-4
+    surfaces = influence.apply(quotes + shocks)
+    np.testing.assert_allclose((surfaces[1] - surfaces[0]).ravel(),
+                               1e-4 * influence.sensitivities().iloc[:, 0].to_numpy(), atol=1e-12)
+
+    bumped = df.copy()
+    rating, tenor = influence.sensitivities().columns[0]
+    bumped.loc[rating, tenor] += 1e-4
+    np.testing.assert_allclose(surfaces[1], build_surface(bumped, factory, 'ordinal', RATING_MAP).to_numpy(), rtol=1e-6, atol=1e-9)
+
+
+def test_cache_reuses_matrices_for_the_same_mask():
+    df = _first_date()
+    cache = InfluenceCache(max_entries=2, rating_scale='ordinal', rating_map=RATING_MAP)
+    first = cache.get(df)
+    assert cache.get(df * 1.01) is first
+
+    masked = df.copy()
+    masked.iloc[0, 0] = np.nan
+    assert cache.get(masked) is not first
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_hits_skip_rating_scale_computation(monkeypatch):
+    import bond_yield.batch as batch
+
+    calls = []
+    build_rating_scale = batch.build_rating_scale
+    monkeypatch.setattr(batch, 'build_rating_scale', lambda *args: calls.append(args[1]) or build_rating_scale(*args))
+    df = _first_date()
+
+    ordinal = InfluenceCache(rating_scale='ordinal', rating_map=RATING_MAP)
+    ordinal.get(df)
+    ordinal.get(df * 1.01)
+    assert calls == ['ordinal'] and ordinal.hits == 1
+
+    # Data-dependent scales are memoized per input, but new values are a miss
+    calls.clear()
+    by_yield = InfluenceCache(rating_scale='yield')
+    first = by_yield.get(df)
+    assert by_yield.get(df.copy()) is first
+    assert by_yield.get(df * 1.01) is not first
+    assert calls == ['yield', 'yield'] and (by_yield.hits, by_yield.misses) == (1, 2)
@@ -1,5 +1,9 @@
+import warnings
 import numpy as np
 import pandas as pd
+from bond_yield.data_processing.loader import load_bond_yields
+from bond_yield.data_processing.rating_converter import SimpleRatingConverter
+from bond_yield.data_processing.synthetic import make_rating_labels, write_synthetic_csv
 from bond_yield.interpolators.interpolate_bond_yields import MatrixInterpolator
 from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
 
@@ -36,3 +40,36 @@ def test_interpolate_missing_values():
 
     # Check that no cell in the result DataFrame is NaN
     assert not result_df.isnull().values.any(), "Resulting DataFrame should not contain NaNs"
+
+def test_fit_interpolate_many_consumes_generator():
+    data = {
+        365: [np.nan, 0.022, 0.025],
+        720: [0.023, np.nan, 0.027],
+        1080: [0.026, 0.028, np.nan]
+    }
+    frames = ((date, pd.DataFrame(data, index=[1, 2, 3])) for date in ['2023-01-01', '2023-01-02'])
+
+    matrix_interpolator = MatrixInterpolator(ThinPlateSplineInterpolator())
+    results = matrix_interpolator.fit_interpolate_many(frames)
+
+    dates = []
+    for date, result_df in results:
+        assert not result_df.isnull().values.any()
+        dates.append(date)
+    assert dates == ['2023-01-01', '2023-01-02']
+
+
+def test_float32_history_stays_float32_when_filled(tmp_path):
+    write_synthetic_csv(tmp_path / 'history.csv', n_dates=4, n_ratings=5, n_tenors=6, missing_fraction=0.2, seed=4)
+    history = load_bond_yields(tmp_path / 'history.csv', dtype=np.float32)
+    assert any(df.isna().any().any() for df in history.values())
+    converter = SimpleRatingConverter({rating: float(position) for position, rating in enumerate(make_rating_labels(5))})
+    matrix_interpolator = MatrixInterpolator(ThinPlateSplineInterpolator(dtype=np.float32))
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        filled = dict(matrix_interpolator.fit_interpolate_many(
+            history, rating_values=lambda date, ratings: converter.convert_many(ratings)))
+
+    for df in filled.values():
+        assert (df.dtypes == np.float32).all()
+        assert not df.isna().any().any()
@@ -0,0 +1,89 @@
+import asyncio
+import pathlib
+import numpy as np
+from bond_yield.batch import build_surface, load_rating_map
+from bond_yield.data_processing.loader import load_bond_yields
+from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+from bond_yield.live import LiveSurfaceIngestor, read_ticks, replay_ticks
+
+TESTS_DIR = pathlib.Path(__file__).parent
+CSV_PATH = TESTS_DIR / 'sample_historical_bond_yields.csv'
+TICKS_PATH = TESTS_DIR / 'sample_ticks.csv'
+RATING_MAP = load_rating_map(TESTS_DIR / 'rating_scores.yaml')
+
+
+def _expected_frames(history, ticks):
+    frames = {date: df.copy() for date, df in history.items()}
+    for _, date, rating, tenor, value in ticks.itertuples(index=False, name=None):
+        frames[date].loc[rating, tenor] = value
+    return frames
+
+
+def test_burst_is_coalesced_into_one_refit_per_date():
+    history = load_bond_yields(CSV_PATH, start_date='2023-01-02', end_date='2023-01-03')
+    ticks = read_ticks(TICKS_PATH)
+
+    async def scenario():
+        async with LiveSurfaceIngestor(history, latency_budget=0.5) as ingestor:
+            initial = ingestor.snapshot('2023-01-02')
+            await replay_ticks(ingestor, ticks)
+            return initial, ingestor
+
+    initial, ingestor = asyncio.run(scenario())
+    metrics = ingestor.metrics()
+    assert metrics['ticks'] == len(ticks)
+    assert metrics['refits'] == 2 and metrics['coalesced'] == 6
+    assert metrics['versions'] == {'2023-01-02': 1, '2023-01-03': 1}
+    # Published snapshots are never modified
+    assert initial.version == 0
+    np.testing.assert_allclose(initial.surface.to_numpy(),
+                               build_surface(history['2023-01-02'], ThinPlateSplineInterpolator).to_numpy())
+    for date, df in _expected_frames(history, ticks).items():
+        expected = build_surface(df, ThinPlateSplineInterpolator)
+        np.testing.assert_allclose(ingestor.snapshot(date).surface.to_numpy(), expected.to_numpy(), atol=1e-10)
+
+
+def test_timed_replay_reuses_factorization_while_only_values_change():
+    history = load_bond_yields(CSV_PATH, start_date='2023-01-02', end_date='2023-01-03')
+    ticks = read_ticks(TICKS_PATH)
+
+    async def scenario():
+        # The ordinal scale only depends on the labels, so value-only ticks keep the factorization
+        async with LiveSurfaceIngestor(history, rating_scale='ordinal', rating_map=RATING_MAP,
+                                       latency_budget=0.02) as ingestor:
+            waiter = asyncio.create_task(ingestor.wait_for_version('2023-01-02', 2))
+            await replay_ticks(ingestor, ticks, speed=1.0)
+            seen = await waiter
+            return seen, ingestor
+
+    seen, ingestor = asyncio.run(scenario())
+    metrics = ingestor.metrics()
+    assert seen.version >= 2
+    assert metrics['versions']['2023-01-02'] >= 4
+    assert metrics['reused_factorizations'] >= 2
+    assert metrics['latency_ms']['count'] == metrics['refits']
+
+    expected = build_surface(_expected_frames(history, ticks)['2023-01-02'], ThinPlateSplineInterpolator,
+                             'ordinal', RATING_MAP)
+    np.testing.assert_allclose(ingestor.snapshot('2023-01-02').surface.to_numpy(), expected.to_numpy(), atol=1e-10)
+    values = ingestor.lookup('2023-01-02', ['A', 'AA'], [365, 730])
+    np.testing.assert_allclose(values, [0.037, 0.11], atol=1e-10)
+
+
+def test_failed_refits_are_recorded_and_new_ratings_keep_loader_order():
+    history = load_bond_yields(CSV_PATH, start_date='2023-01-02', end_date='2023-01-02')
+    df = history['2023-01-02'].drop(index='BB')
+
+    async def scenario():
+        async with LiveSurfaceIngestor({'2023-01-02': df}) as ingestor:
+            # A tenor that does not compare with the others fails the refit without stopping the ingestor
+            ingestor.submit('2023-01-02', 'AAA', '730d', 0.05)
+            await asyncio.wait_for(ingestor.flush(), 5)
+            assert 'TypeError' in ingestor.errors['2023-01-02']
+            ingestor.submit('2023-01-02', 'BB', 365, 0.05)
+            await asyncio.wait_for(ingestor.flush(), 5)
+            return ingestor.snapshot('2023-01-02')
+
+    snapshot = asyncio.run(scenario())
+    assert list(snapshot.surface.index) == sorted(df.index.tolist() + ['BB'])
+    assert snapshot.version == 1
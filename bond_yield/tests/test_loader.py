@@ -2,7 +2,11 @@
 
 # tests/test_loader.py
 import pathlib
-from bond_yield.data_processing.loader import load_bond_yields
+import types
+import numpy as np
+import pandas as pd
+from bond_yield.data_processing.loader import load_bond_yields, iter_bond_yields
+from bond_yield.data_processing.yield_cube import csv_to_cube
 
 
 def test_load_bond_yields():
@@ -18,5 +22,63 @@ def test_load_bond_yields():
     print(df_bond_yields)
 
 
+def _pivoted_sample(csv_path):
+    """
+    Per-date frames of the sample CSV built independently of the loader, by pivoting each
+    row's (rating, tenor, yield) triples.
+    """
+    wide = pd.read_csv(csv_path, index_col=0)
+    labels = [column.split('::') for column in wide.columns]
+    expected = {}
+    for date, row in wide.iterrows():
+        long = pd.DataFrame({'Rating': [rating for rating, _ in labels],
+                             'Tenor': [int(tenor) for _, tenor in labels],
+                             'Yield': row.to_numpy()})
+        expected[date] = long.pivot(index='Rating', columns='Tenor', values='Yield')
+    return expected
+
+
+def test_iter_bond_yields_matches_pivoted_csv():
+    csv_path = pathlib.Path(__file__).parent / 'sample_historical_bond_yields.csv'
+    expected = _pivoted_sample(csv_path)
+    assert expected['2023-01-01'].loc['AAA', 365] == 0.2388299453302599
+
+    loaded = load_bond_yields(str(csv_path))
+    assert list(loaded.keys()) == list(expected.keys())
+    for date, df in loaded.items():
+        pd.testing.assert_frame_equal(df, expected[date])
+
+    for prefetch_chunks in (0, 2):
+        streamed = iter_bond_yields(str(csv_path), chunksize=4, prefetch_chunks=prefetch_chunks)
+        assert isinstance(streamed, types.GeneratorType)
+
+        dates = []
+        for date, df in streamed:
+            pd.testing.assert_frame_equal(df, expected[date])
+            dates.append(date)
+        assert dates == list(expected.keys())
+
+
+def test_iter_bond_yields_date_range():
+    csv_path = pathlib.Path(__file__).parent / 'sample_historical_bond_yields.csv'
+    dates = [date for date, _ in iter_bond_yields(str(csv_path), chunksize=3,
+                                                  start_date='2023-01-10', end_date='2023-01-12')]
+    assert dates == ['2023-01-10', '2023-01-11', '2023-01-12']
+
+
+
+def test_load_bond_yields_float32_from_csv_and_cube(tmp_path):
+    csv_path = pathlib.Path(__file__).parent / 'sample_historical_bond_yields.csv'
+    expected = load_bond_yields(str(csv_path))
+    csv_to_cube(csv_path, tmp_path / 'cube')
+
+    for source in (csv_path, tmp_path / 'cube'):
+        compact = load_bond_yields(source, dtype=np.float32)
+        assert list(compact.keys()) == list(expected.keys())
+        for date, df in compact.items():
+            assert (df.dtypes == np.float32).all()
+            np.testing.assert_allclose(df.to_numpy(), expected[date].to_numpy(), rtol=1e-6)
+
+
 if __name__ == "__main__":
     test_load_bond_yields()
@@ -0,0 +1,131 @@
+import pathlib
+import numpy as np
+import pandas as pd
+import pytest
+from bond_yield.data_processing.loader import load_bond_yields
+from bond_yield.data_processing.multi_file_loader import (iter_files, iter_multi_file_yields, load_multi_file_yields,
+                                                          multi_file_to_cube)
+
+CSV_PATH = pathlib.Path(__file__).parent / 'sample_historical_bond_yields.csv'
+
+
+def _write_daily_files(directory):
+    wide = pd.read_csv(CSV_PATH, index_col=0)
+    directory.mkdir()
+    for date, row in wide.iterrows():
+        row.to_frame().T.to_csv(directory / f'{date}.csv')
+    return wide
+
+
+def _write_vendor_files(directory):
+    """
+    Split every date across two vendors quoting different ratings, one of them in a
+    different column order.
+    """
+    wide = pd.read_csv(CSV_PATH, index_col=0)
+    directory.mkdir()
+    first = [column for column in wide.columns if column.split('::')[0] in ('AAA', 'AA', 'A')]
+    second = [column for column in wide.columns if column not in first]
+    wide[first].to_csv(directory / 'vendor_a.csv')
+    wide[second[::-1]].to_csv(directory / 'vendor_b.csv')
+    return wide
+
+
+def test_daily_files_match_the_wide_csv(tmp_path):
+    _write_daily_files(tmp_path / 'daily')
+    expected = load_bond_yields(str(CSV_PATH))
+
+    loaded = load_bond_yields(tmp_path / 'daily')
+    assert list(loaded.keys()) == list(expected.keys())
+    for date, df in expected.items():
+        pd.testing.assert_frame_equal(loaded[date], df)
+
+    ranged = load_bond_yields(str(tmp_path / 'daily' / '*.csv'), start_date='2023-01-05', end_date='2023-01-07')
+    assert list(ranged.keys()) == ['2023-01-05', '2023-01-06', '2023-01-07']
+
+
+def test_ordered_and_as_completed_delivery(tmp_path):
+    _write_daily_files(tmp_path / 'daily')
+
+    ordered = [date for date, _ in iter_multi_file_yields(tmp_path / 'daily', max_workers=4)]
+    assert ordered == sorted(ordered)
+
+    positions = [position for position, _, _, _ in iter_files(tmp_path / 'daily', max_workers=4, ordered=False)]
+    assert sorted(positions) == list(range(len(ordered)))
+
+
+def test_vendor_files_are_merged_per_date(tmp_path):
+    _write_vendor_files(tmp_path / 'vendors')
+    expected = load_bond_yields(str(CSV_PATH))
+
+    loaded = load_multi_file_yields(tmp_path / 'vendors', max_workers=2)
+    for date, df in expected.items():
+        pd.testing.assert_frame_equal(loaded[date], df)
+
+    cube = multi_file_to_cube(tmp_path / 'vendors', tmp_path / 'cube', max_workers=2)
+    assert list(cube.dates) == list(expected.keys())
+    np.testing.assert_array_equal(np.asarray(cube.values), np.stack([df.to_numpy() for df in expected.values()]))
+
+
+def test_conflicting_quotes(tmp_path):
+    wide = _write_daily_files(tmp_path / 'daily')
+    changed = wide.iloc[[0]].copy()
+    changed.iloc[0, 0] += 1
+    changed.to_csv(tmp_path / 'daily' / 'zz_correction.csv')
+
+    with pytest.raises(ValueError, match='Conflicting quotes'):
+        load_multi_file_yields(tmp_path / 'daily')
+
+    date, column = wide.index[0], wide.columns[0]
+    rating, tenor = column.split('::')
+    first = load_multi_file_yields(tmp_path / 'daily', duplicates='first')
+    last = load_multi_file_yields(tmp_path / 'daily', duplicates='last')
+    assert first[date].at[rating, int(tenor)] == wide.iloc[0, 0]
+    assert last[date].at[rating, int(tenor)] == wide.iloc[0, 0] + 1
+
+
+def test_malformed_header_is_rejected(tmp_path):
+    _write_daily_files(tmp_path / 'daily')
+    pd.DataFrame({'AAA-365': [0.1]}, index=['2023-02-01']).to_csv(tmp_path / 'daily' / 'zz.csv')
+
+    with pytest.raises(ValueError, match='zz.csv'):
+        load_multi_file_yields(tmp_path / 'daily')
+
+
+def test_first_file_axes_reject_other_ratings(tmp_path):
+    _write_vendor_files(tmp_path / 'vendors')
+
+    with pytest.raises(ValueError, match='vendor_b.csv'):
+        load_multi_file_yields(tmp_path / 'vendors', axes='first')
+
+
+def test_batch_builds_from_vendor_files(tmp_path):
+    import io
+    from bond_yield.batch import run_batch
+
+    _write_vendor_files(tmp_path / 'vendors')
+    summary = run_batch(tmp_path / 'vendors', tmp_path / 'surfaces.csv', start_date='2023-01-02', end_date='2023-01-04',
+                        progress=False, stream=io.StringIO())
+    assert summary['dates'] == 3 and summary['failures'] == {}
+    expected = run_batch(CSV_PATH, tmp_path / 'expected.csv', start_date='2023-01-02', end_date='2023-01-04',
+                         progress=False, stream=io.StringIO())
+    assert expected['dates'] == 3
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'surfaces.csv', index_col=0),
+                                  pd.read_csv(tmp_path / 'expected.csv', index_col=0))
+
+
+def test_surface_loader_parses_daily_files_once(tmp_path):
+    from bond_yield.batch import build_surface
+    from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+    from bond_yield.service import make_surface_loader
+
+    _write_daily_files(tmp_path / 'daily')
+    loader = make_surface_loader(tmp_path / 'daily')
+    # Later calls are served from the parsed drop, without reading the files again
+    for path in (tmp_path / 'daily').iterdir():
+        path.unlink()
+    expected = load_bond_yields(str(CSV_PATH), start_date='2023-01-02', end_date='2023-01-02')['2023-01-02']
+    np.testing.assert_allclose(loader('2023-01-02').to_numpy(),
+                               build_surface(expected, ThinPlateSplineInterpolator).to_numpy())
+    with pytest.raises(KeyError):
+        loader('1999-01-01')
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from bond_yield.analysis.cross_validator import CrossValidatorByRollingScale
+from bond_yield.batch import build_surface
+from bond_yield.data_processing.rating_converter import RollingYieldRatingConverter
+from bond_yield.data_processing.synthetic import generate_yield_cube
+from bond_yield.interpolators.interpolate_bond_yields import MatrixInterpolator
+from bond_yield.interpolators.nelson_siegel import NelsonSiegelSvenssonInterpolator, nelson_siegel_loadings
+from bond_yield.interpolators.registry import get_interpolator
+
+
+def test_recovers_curves_with_decays_on_the_grid():
+    tenors = np.array([91, 182, 365, 730, 1095, 1825, 2555, 3650, 5475, 7300])
+    # Unequally spaced ratings: coefficients linear in the rating coordinate are not penalized
+    ratings = np.array([1.0, 2.0, 4.0, 7.0, 8.0, 12.0])
+    coefficients = np.array([0.03, -0.01, 0.005, 0.002]) + np.outer(ratings, [0.004, -0.001, 0.001, 0.0])
+    decays = (1.0, 4.0)
+    surface = coefficients @ nelson_siegel_loadings(tenors / 365, decays).T
+    df = pd.DataFrame(surface.copy(), index=ratings, columns=tenors)
+    df.iloc[[0, 2, 5], [1, 4, 8]] = np.nan
+
+    interpolator = NelsonSiegelSvenssonInterpolator(decays=[0.5, 1.0, 2.0, 4.0, 8.0])
+    filled = MatrixInterpolator(interpolator).fit_interpolate(df.copy(), rating_values=ratings)
+    assert interpolator.decay == decays
+    np.testing.assert_allclose(interpolator.coefficients, coefficients, atol=1e-8)
+    np.testing.assert_allclose(filled.to_numpy(), surface, atol=1e-10)
+    # Coefficients are interpolated between ratings
+    between = interpolator.interpolate(np.array([[3.0, 1095.0]]))
+    np.testing.assert_allclose(between, (surface[1, 4] + surface[2, 4]) / 2, atol=1e-10)
+    # and extrapolated linearly outside them
+    outside = np.array([0.0, 15.0])
+    expected = (np.array([0.03, -0.01, 0.005, 0.002]) + np.outer(outside, [0.004, -0.001, 0.001, 0.0])) \
+        @ nelson_siegel_loadings(np.array([1095.0]) / 365, decays).T
+    np.testing.assert_allclose(interpolator.interpolate(np.column_stack((outside, [1095.0, 1095.0]))),
+                               expected.ravel(), atol=1e-10)
+
+
+def test_history_fit_matches_single_dates_and_cross_validates():
+    history = generate_yield_cube(n_dates=12, n_ratings=5, n_tenors=6, seed=2, missing_fraction=0.2).to_date_dataframes()
+    interpolator = NelsonSiegelSvenssonInterpolator(svensson=False)
+    surfaces = interpolator.fit_history(history)
+
+    assert get_interpolator('nss') is NelsonSiegelSvenssonInterpolator
+    assert list(interpolator.history.columns) == ['beta0', 'beta1', 'beta2', 'tau1']
+    assert len(interpolator.history) == 12 * 5
+    for date, df in history.items():
+        expected = build_surface(df, lambda: NelsonSiegelSvenssonInterpolator(svensson=False))
+        assert list(surfaces[date].index) == list(df.index) and list(surfaces[date].columns) == list(df.columns)
+        np.testing.assert_allclose(surfaces[date].to_numpy(), expected.to_numpy(), atol=1e-10)
+
+    complete = generate_yield_cube(n_dates=4, n_ratings=5, n_tenors=6, seed=2, missing_pattern='none').to_date_dataframes()
+    converter = RollingYieldRatingConverter.from_date_dataframes(complete)
+    mse = CrossValidatorByRollingScale(NelsonSiegelSvenssonInterpolator, complete, converter,
+                                       n_splits=3).perform_cross_validation()
+    assert np.isfinite(mse)
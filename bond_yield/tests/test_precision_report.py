@@ -0,0 +1,19 @@
+from bond_yield.analysis.precision_report import format_report, precision_report
+from bond_yield.data_processing.synthetic import generate_yield_cube
+
+
+def test_precision_report_compares_compact_mode_with_float64():
+    cube = generate_yield_cube(n_dates=20, n_ratings=8, n_tenors=8, missing_fraction=0.3, seed=1)
+    report = precision_report(cube, n_dates=3)
+
+    memory = report['memory']
+    assert memory['cube_float32'] * 2 == memory['cube_float64']
+    assert memory['cube_float32'] < memory['dataframes_float64']
+
+    years, days = report['accuracy']
+    assert years['fallback_share'] == 0
+    assert days['fallback_share'] == 1
+    for result in report['accuracy']:
+        assert result['dates'] == 3
+        assert result['max_abs_error'] < 1e-9
+    assert 'tenors in days' in format_report(report)
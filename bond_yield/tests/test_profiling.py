@@ -0,0 +1,50 @@
+import json
+import numpy as np
+import pandas as pd
+from bond_yield.interpolators.interpolate_bond_yields import MatrixInterpolator
+from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+from bond_yield.utils import profiling
+
+
+def create_sample_data():
+    data = {
+        365: [np.nan, 0.022, 0.025],
+        720: [0.023, np.nan, 0.027],
+        1080: [0.026, 0.028, np.nan]
+    }
+    return pd.DataFrame(data, index=[1, 2, 3])
+
+
+def test_hooks_are_inert_without_recorder():
+    assert profiling.get_recorder() is None
+    assert profiling.span('anything') is profiling.span('something else')
+    profiling.count('anything')
+
+
+def test_aggregate_recorder_collects_stage_timings():
+    with profiling.recording(profiling.AggregateRecorder()) as recorder:
+        MatrixInterpolator(ThinPlateSplineInterpolator()).fit_interpolate(create_sample_data())
+    assert profiling.get_recorder() is None
+
+    summary = recorder.summary()
+    for name in ('matrix.prepare', 'matrix.fit', 'matrix.interpolate', 'tps.kernel_assembly', 'tps.solve'):
+        assert summary['spans'][name]['calls'] == 1
+    assert summary['counters'] == {'matrix.observed_points': 6, 'matrix.missing_points': 3}
+    assert 'tps.solve' in recorder.report()
+
+
+def test_file_recorders(tmp_path):
+    trace_path = tmp_path / 'trace.json'
+    lines_path = tmp_path / 'spans.jsonl'
+    recorder = profiling.FanOutRecorder([profiling.recorder_for_path(trace_path),
+                                         profiling.recorder_for_path(lines_path)])
+    with profiling.recording(recorder):
+        with profiling.span('outer', size=3):
+            profiling.count('items', 2)
+
+    events = json.loads(trace_path.read_text())['traceEvents']
+    assert [event['ph'] for event in events] == ['C', 'X']
+    assert events[1]['name'] == 'outer' and events[1]['args'] == {'size': 3}
+
+    records = [json.loads(line) for line in lines_path.read_text().splitlines()]
+    assert [record['type'] for record in records] == ['count', 'span']
@@ -0,0 +1,51 @@
+import numpy as np
+from bond_yield.analysis.racing import run_race
+from bond_yield.analysis.tournament import Candidate
+from bond_yield.data_processing.synthetic import generate_yield_cube
+from bond_yield.interpolators.baseInterpolator import BaseInterpolator
+from bond_yield.interpolators.registry import register_interpolator
+
+
+def _history(n_dates=24):
+    return generate_yield_cube(n_dates=n_dates, n_ratings=5, n_tenors=6, seed=7, missing_fraction=0.1).to_date_dataframes()
+
+
+def test_losing_candidates_are_dropped_early(clean_registry):
+    @register_interpolator('test_zero')
+    class ZeroInterpolator(BaseInterpolator):
+        def fit(self, X, y):
+            pass
+
+        def interpolate(self, X):
+            return np.zeros(len(X))
+
+    history = _history()
+    # Two identical configurations can never be told apart, so they race to the last date
+    candidates = ['tps', Candidate('tps', label='tps copy'), 'test_zero']
+    result = run_race(history, candidates, n_splits=3, initial_dates=3)
+
+    rows = {row['candidate']: row for row in result['leaderboard']}
+    assert rows['test_zero']['status'] == 'dropped'
+    assert rows['test_zero']['dates'] < len(history)
+    assert rows['tps']['status'] == rows['tps copy']['status'] == 'survivor'
+    assert rows['tps']['dates'] == len(history)
+
+    work = result['work']
+    assert work['folds_exhaustive'] == 3 * 3 * len(history)
+    assert work['folds_run'] == 3 * sum(row['dates'] for row in result['leaderboard'])
+    assert 0 < work['skipped_fraction'] < 1
+    assert [round_['dates'] for round_ in result['rounds']] == sorted({round_['dates'] for round_ in result['rounds']})
+
+
+def test_race_is_the_same_in_parallel():
+    history = _history(12)
+    candidates = ['tps', 'tps:lambda_val=10.0', 'linear']
+    serial = run_race(history, candidates, n_splits=3, eta=2)
+    parallel = run_race(history, candidates, n_splits=3, eta=2, workers=2)
+
+    assert serial['rounds'] == parallel['rounds']
+    assert [row['candidate'] for row in serial['leaderboard']] == [row['candidate'] for row in parallel['leaderboard']]
+    np.testing.assert_allclose([row['mse'] for row in serial['leaderboard']],
+                               [row['mse'] for row in parallel['leaderboard']])
+    # Successive halving leaves a single survivor
+    assert sum(row['status'] == 'survivor' for row in serial['leaderboard']) == 1
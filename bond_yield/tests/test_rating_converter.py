@@ -55,3 +55,85 @@ def test_yield_based_rating_converter():
     # Test a rating not in the DataFrame
     assert converter.convert('BBB') == 0, "Should return 0 for ratings not found"
 
+
+def test_rolling_rating_scales_match_pandas():
+    import numpy as np
+    from bond_yield.data_processing.rating_converter import RollingYieldRatingConverter, rolling_rating_scales
+    from bond_yield.data_processing.synthetic import generate_yield_cube
+
+    cube = generate_yield_cube(n_dates=40, n_ratings=4, n_tenors=5, seed=2, missing_fraction=0.2)
+    values = np.asarray(cube.values)
+    sums = pd.DataFrame(np.nansum(values, axis=2))
+    counts = pd.DataFrame((~np.isnan(values)).sum(axis=2))
+
+    # Per-date scales are the YieldBasedRatingConverter of each date
+    converter = RollingYieldRatingConverter.from_cube(cube)
+    for date, df in list(cube.to_date_dataframes().items())[:3]:
+        expected = YieldBasedRatingConverter(df).get_rating_scale()
+        assert converter.scale_at(date).to_dict() == pytest.approx(expected)
+
+    rolling = rolling_rating_scales(values, window=5)
+    expected = sums.rolling(5, min_periods=1).sum() / counts.rolling(5, min_periods=1).sum()
+    np.testing.assert_allclose(rolling, expected.to_numpy())
+
+    # Without missing quotes the exponential scale is the pandas EWM of the daily means
+    full = generate_yield_cube(n_dates=40, n_ratings=4, n_tenors=5, seed=2, missing_pattern='none')
+    daily = pd.DataFrame(np.asarray(full.values).mean(axis=2))
+    exponential = rolling_rating_scales(np.asarray(full.values), window=10, method='exponential')
+    np.testing.assert_allclose(exponential, daily.ewm(span=10).mean().to_numpy())
+
+
+def test_cross_validation_and_filling_with_rolling_scales():
+    import numpy as np
+    from bond_yield.analysis.cross_validator import CrossValidatorByRollingScale
+    from bond_yield.data_processing.rating_converter import RollingYieldRatingConverter
+    from bond_yield.data_processing.synthetic import generate_yield_cube
+    from bond_yield.interpolators.interpolate_bond_yields import MatrixInterpolator
+    from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+
+    history = generate_yield_cube(n_dates=6, n_ratings=4, n_tenors=5, seed=4, missing_pattern='none').to_date_dataframes()
+    converter = RollingYieldRatingConverter.from_date_dataframes(history, window=3, method='exponential')
+    assert converter.scales.shape == (6, 4)
+
+    mse = CrossValidatorByRollingScale(ThinPlateSplineInterpolator, {d: df.copy() for d, df in history.items()},
+                                       converter, n_splits=3).perform_cross_validation()
+    assert np.isfinite(mse)
+
+    gappy = generate_yield_cube(n_dates=6, n_ratings=4, n_tenors=5, seed=4, missing_fraction=0.2).to_date_dataframes()
+    dates = list(gappy)
+    # Dates may lack a rating or list the ratings in another order
+    gappy[dates[1]] = gappy[dates[1]].iloc[1:]
+    gappy[dates[-1]] = gappy[dates[-1]].iloc[::-1]
+    converter = RollingYieldRatingConverter.from_date_dataframes(gappy, window=3)
+    filled = dict(MatrixInterpolator(ThinPlateSplineInterpolator()).fit_interpolate_many(
+        {d: df.copy() for d, df in gappy.items()}, rating_values=converter))
+    for date in (dates[1], dates[-1]):
+        assert gappy[date].isna().any().any() and not filled[date].isna().any().any()
+        relabeled = gappy[date].copy()
+        relabeled.index = converter.values_for(date, gappy[date].index)
+        expected = MatrixInterpolator(ThinPlateSplineInterpolator()).fit_interpolate(relabeled)
+        assert list(filled[date].index) == list(gappy[date].index)
+        np.testing.assert_allclose(filled[date].to_numpy(), expected.to_numpy())
+
+
+def test_rolling_scales_carry_over_dates_without_quotes():
+    import numpy as np
+    from bond_yield.data_processing.rating_converter import RollingYieldRatingConverter
+    from bond_yield.data_processing.synthetic import generate_yield_cube
+    from bond_yield.interpolators.interpolate_bond_yields import MatrixInterpolator
+    from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+
+    history = generate_yield_cube(n_dates=4, n_ratings=4, n_tenors=5, seed=4, missing_fraction=0.2).to_date_dataframes()
+    dates = list(history)
+    # One rating has no quote at all on the third date, and another none before the last date
+    history[dates[2]].loc['AA'] = np.nan
+    for date in dates[:-1]:
+        history[date].loc['BBB'] = np.nan
+    converter = RollingYieldRatingConverter.from_date_dataframes(history)
+
+    assert converter.values_for(dates[2], ['AA'])[0] == converter.values_for(dates[1], ['AA'])[0]
+    filled = dict(MatrixInterpolator(ThinPlateSplineInterpolator()).fit_interpolate_many(
+        {date: df.drop(index='BBB') for date, df in history.items() if date != dates[-1]}, rating_values=converter))
+    assert not filled[dates[2]].isna().any().any()
+    with pytest.raises(ValueError, match='BBB'):
+        converter.values_for(dates[1], history[dates[1]].index)
@@ -55,3 +55,13 @@ def test_optimization_with_bounds():
     # Ensure bounds are respected
     for rating, value in optimized_ratings.items():
         assert 0.1 <= value <= 0.5, f"Rating {rating} should be within the bounds"
+
+
+def test_ratings_are_read_only():
+    converter = SlopeMinimizingRatingConverter({'AAA': 0.2, 'AA': 0.3, 'A': 0.4},
+                                               AbsoluteDifferenceStrategy(create_sample_data()))
+    with pytest.raises(TypeError):
+        converter.ratings['AAA'] = 1.0
+    converter.ratings = {'AAA': 1.0, 'AA': 2.0, 'A': 3.0}
+    assert converter.convert('AA') == 2.0
+    assert converter.get_rating_scale() == {'AAA': 1.0, 'AA': 2.0, 'A': 3.0}
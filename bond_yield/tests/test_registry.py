@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from bond_yield.batch import make_interpolator_factory
+from bond_yield.interpolators.baseInterpolator import BaseInterpolator
+from bond_yield.interpolators.registry import (available_interpolators, get_interpolator, make_interpolator,
+                                               register_interpolator)
+from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+
+
+def test_builtin_interpolators_are_registered():
+    assert {'tps', 'linear'} <= set(available_interpolators())
+    assert get_interpolator('tps') is ThinPlateSplineInterpolator
+    assert make_interpolator('tps', lambda_val=0.5).lambda_val == 0.5
+    with pytest.raises(ValueError):
+        get_interpolator('no-such-interpolator')
+
+
+def test_registered_interpolator_is_usable_by_the_batch_builder(clean_registry):
+    @register_interpolator('test_mean')
+    class MeanInterpolator(BaseInterpolator):
+        def fit(self, X, y):
+            self.mean = float(np.mean(y))
+
+        def interpolate(self, X):
+            return np.full(len(X), self.mean)
+
+    assert 'test_mean' in available_interpolators()
+    interpolator = make_interpolator_factory('test_mean')()
+    interpolator.fit(np.zeros((2, 2)), np.array([1.0, 3.0]))
+    np.testing.assert_array_equal(interpolator.interpolate(np.zeros((3, 2))), [2.0, 2.0, 2.0])
+
+    with pytest.raises(ValueError):
+        register_interpolator('test_mean', ThinPlateSplineInterpolator)
+
+
+def test_test_registrations_do_not_leak():
+    assert 'test_mean' not in available_interpolators()
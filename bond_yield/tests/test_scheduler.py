@@ -0,0 +1,72 @@
+import io
+import json
+import pathlib
+import numpy as np
+import pytest
+from bond_yield.analysis.tournament import run_tournament
+from bond_yield.batch import run_batch
+from bond_yield.data_processing.synthetic import generate_yield_cube
+from bond_yield.utils.scheduler import CostModel, pack_longest_first, utilization_report
+
+CSV_PATH = pathlib.Path(__file__).parent / 'sample_historical_bond_yields.csv'
+
+
+def test_pack_longest_first_balances_bins():
+    costs = [7, 1, 1, 1, 5, 3, 2, 4]
+    packed = pack_longest_first(costs, 3)
+    assert sorted(task for _, tasks in packed for task in tasks) == list(range(len(costs)))
+    loads = [load for load, _ in packed]
+    assert loads == sorted(loads, reverse=True)
+    assert loads[0] - loads[-1] <= 1
+    for load, tasks in packed:
+        assert load == sum(costs[task] for task in tasks)
+    # More bins than tasks leaves no empty bins
+    assert len(pack_longest_first([1.0, 2.0], 5)) == 2
+
+
+def test_cost_model_learns_from_timings(tmp_path):
+    path = tmp_path / 'timings.json'
+    model = CostModel(path, min_samples=4)
+    np.testing.assert_allclose(model.predict('tps', [100], 'cv5'), 5 * model.predict('tps', [100]))
+
+    # Timings of a linear cost, some recorded for tasks of several dates
+    rate = lambda points: 0.01 + 0.002 * np.sum(points)
+    for points in ([50], [100], [200], [100, 300], [400], [25, 75]):
+        model.observe('linear', points, 0.01 * len(points) + 0.002 * np.sum(points))
+    np.testing.assert_allclose(model.predict('linear', [150, 500]), [rate(150), rate(500)], rtol=1e-6)
+    model.save()
+
+    assert json.loads(path.read_text())['version'] == 1
+    loaded = CostModel(path, min_samples=4)
+    np.testing.assert_allclose(loaded.predict('linear', [150]), model.predict('linear', [150]))
+    # Other pairs keep their priors
+    np.testing.assert_allclose(loaded.predict('tps', [100]), CostModel.prior('tps') @ [1, 1, 1, 1])
+
+
+def test_utilization_report_straggler_time():
+    records = [{'pid': 1, 'start': 0.0, 'end': 4.0}, {'pid': 2, 'start': 0.0, 'end': 1.0},
+               {'pid': 2, 'start': 1.0, 'end': 2.0}]
+    report = utilization_report(records, workers=2, predicted_seconds=5.0)
+    assert report['wall_seconds'] == 4.0
+    assert report['busy_seconds'] == 6.0
+    assert report['utilization'] == pytest.approx(0.75)
+    assert report['straggler_seconds'] == 2.0
+    # A worker that never got a task was idle for the whole run
+    assert utilization_report(records, workers=3)['straggler_seconds'] == 4.0
+
+
+def test_scheduled_runs_record_timings(tmp_path):
+    path = tmp_path / 'timings.json'
+    summary = run_batch(CSV_PATH, tmp_path / 'surfaces.csv', end_date='2023-01-08', workers=2, chunk_size=2,
+                        progress=False, stream=io.StringIO(), cost_model=str(path))
+    assert summary['schedule']['tasks'] > 0
+    assert 0 < summary['schedule']['utilization'] <= 1
+    assert sum(len(samples) for samples in CostModel(path).samples.values()) == summary['dates']
+
+    history = generate_yield_cube(n_dates=8, n_ratings=4, n_tenors=5, seed=5, missing_fraction=0.1).to_date_dataframes()
+    stream = io.StringIO()
+    serial = run_tournament(history, ['tps', 'linear'], n_splits=3)
+    parallel = run_tournament(history, ['tps', 'linear'], n_splits=3, workers=2, chunk_size=3, stream=stream)
+    assert 'utilization' in stream.getvalue()
+    assert [row['candidate'] for row in serial] == [row['candidate'] for row in parallel]
+    np.testing.assert_allclose([row['mse'] for row in serial], [row['mse'] for row in parallel])
@@ -0,0 +1,124 @@
+import asyncio
+import pathlib
+import numpy as np
+import pandas as pd
+import pytest
+from bond_yield.batch import build_surface
+from bond_yield.data_processing.loader import load_bond_yields
+from bond_yield.data_processing.yield_cube import csv_to_cube
+from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+from bond_yield.service import SurfaceCache, SurfaceQueryService, lookup_points, make_surface_loader, request
+
+TESTS_DIR = pathlib.Path(__file__).parent
+CSV_PATH = TESTS_DIR / 'sample_historical_bond_yields.csv'
+
+
+def _surface(value=0.0):
+    return pd.DataFrame([[1.0, 2.0, 4.0], [2.0, 3.0, 5.0]], index=['AAA', 'AA'], columns=[365, 730, 1460]) + value
+
+
+def test_lookup_points_reads_grid_and_interpolates_between_tenors():
+    surface = _surface()
+    yields = lookup_points(surface, ['AAA', 'AA', 'AAA', 'AA', 'AAA'], [365, 1460, 1095, 547.5, 5000])
+    np.testing.assert_allclose(yields, [1.0, 5.0, 3.0, 2.5, 4.0])
+
+
+def test_lookup_points_rejects_unknown_rating():
+    with pytest.raises(KeyError):
+        lookup_points(_surface(), ['AAA', 'ZZZ'], [365, 365])
+
+
+def test_surface_cache_evicts_least_recently_used():
+    size = int(_surface().memory_usage(deep=True).sum())
+    cache = SurfaceCache(max_bytes=2 * size)
+    cache.put('d1', _surface(1))
+    cache.put('d2', _surface(2))
+    assert cache.get('d1') is not None
+    cache.put('d3', _surface(3))
+
+    assert cache.get('d2') is None
+    assert cache.get('d1') is not None and cache.get('d3') is not None
+    metrics = cache.metrics()
+    assert metrics['evictions'] == 1 and metrics['dates'] == 2
+    assert metrics['bytes'] <= metrics['max_bytes']
+
+
+def test_service_answers_batched_queries_over_http(tmp_path):
+    csv_to_cube(CSV_PATH, tmp_path / 'cube')
+    service = SurfaceQueryService(make_surface_loader(tmp_path / 'cube'))
+    expected = build_surface(load_bond_yields(CSV_PATH, end_date='2023-01-02')['2023-01-02'],
+                             ThinPlateSplineInterpolator)
+    queries = [{'date': '2023-01-02', 'rating': rating, 'tenor': int(tenor)}
+               for rating in expected.index for tenor in expected.columns]
+    queries.append({'date': '2023-01-03', 'rating': expected.index[0], 'tenor': int(expected.columns[0])})
+
+    async def scenario():
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            first = await request('POST', '/query', {'queries': queries}, port=port)
+            second = await request('POST', '/query', {'queries': queries[:3]}, port=port)
+            missing = await request('POST', '/query', {'queries': [dict(queries[0], date='1999-01-01')]}, port=port)
+            metrics = await request('GET', '/metrics', port=port)
+        return first, second, missing, metrics
+
+    first, second, missing, metrics = asyncio.run(scenario())
+
+    assert first[0] == 200
+    np.testing.assert_allclose(first[1]['yields'][:-1], expected.to_numpy().ravel())
+    assert second[0] == 200
+    assert missing[0] == 400
+    status, body = metrics
+    assert status == 200
+    assert body['surfaces_loaded'] == 2
+    assert body['cache']['hits'] == 1
+    assert body['requests'] == 4 and body['errors'] == 1
+    assert body['latency_ms']['count'] == 3
+
+
+def test_service_rejects_incomplete_queries_and_reports_failures():
+    def loader(date):
+        if date == 'broken':
+            raise np.linalg.LinAlgError('Singular matrix')
+        return _surface()
+
+    service = SurfaceQueryService(loader)
+
+    async def scenario():
+        return [await service.handle('POST', '/query', body) for body in (
+            b'{"queries": [{"rating": "AAA", "tenor": 365}]}',
+            b'[1, 2]',
+            b'{"queries": [{"date": "broken", "rating": "AAA", "tenor": 365}]}',
+            b'{"queries": [{"date": "d1", "rating": "AAA", "tenor": 365}]}',
+        )]
+
+    responses = asyncio.run(scenario())
+    assert [status for status, _ in responses] == [400, 400, 500, 200]
+    assert 'LinAlgError' in responses[2][1]['error']
+    assert responses[3][1]['yields'] == [1.0]
+    assert service.errors == 3
+
+
+@pytest.mark.parametrize('head', [b'GARBAGE\r\n\r\n',
+                                  b'GET /metrics HTTP/1.1\r\nNo colon here\r\n\r\n',
+                                  b'POST /query HTTP/1.1\r\nContent-Length: lots\r\n\r\n'])
+def test_malformed_requests_get_a_bad_request_response(head):
+    service = SurfaceQueryService(lambda date: _surface())
+
+    async def scenario():
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(head)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), timeout=5)
+            writer.close()
+            # The server keeps serving other connections
+            metrics = await request('GET', '/metrics', port=port)
+        return response, metrics
+
+    response, (status, metrics) = asyncio.run(scenario())
+    assert response.startswith(b'HTTP/1.1 400 Bad Request')
+    assert b'Malformed request' in response
+    assert status == 200 and metrics['errors'] == 1
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from bond_yield.batch import build_surface
+from bond_yield.data_processing.synthetic import generate_yield_cube
+from bond_yield.interpolators.spatio_temporal import SpatioTemporalInterpolator, kron_matvec, rbf_kernel
+from bond_yield.interpolators.thin_plate_spline import ThinPlateSplineInterpolator
+
+
+def _dense_fit(X, y, interpolator):
+    """
+    Reference solution with the full (date, rating, tenor) kernel matrix.
+    """
+    K = np.ones((len(X), len(X)))
+    for k, length in enumerate(interpolator.lengths):
+        K *= rbf_kernel(X[:, k], X[:, k], length)
+    trend = np.column_stack((np.ones(len(X)), X[:, 1], X[:, 2])) @ interpolator.coef
+    return trend + K @ np.linalg.solve(K + interpolator.lambda_val * np.eye(len(X)), y - trend)
+
+
+def test_kron_matvec_matches_dense_kronecker():
+    rng = np.random.default_rng(0)
+    factors = [rng.random((4, 3)), rng.random((2, 5)), rng.random((6, 2))]
+    grid = rng.random((3, 5, 2))
+    dense = np.kron(np.kron(factors[0], factors[1]), factors[2]) @ grid.ravel()
+    np.testing.assert_allclose(kron_matvec(factors, grid).ravel(), dense)
+
+
+def test_structured_solves_match_dense_solution():
+    rng = np.random.default_rng(1)
+    grid = np.array(np.meshgrid(np.arange(4), np.arange(1, 4), [365, 730, 1095, 1460], indexing='ij')).reshape(3, -1).T
+    X = grid.astype(float)
+    y = 0.03 + 0.01 * X[:, 1] + rng.normal(0, 0.002, len(X))
+
+    full = SpatioTemporalInterpolator(lambda_val=1e-2).fit(X, y)
+    assert full.iterations == 0
+    np.testing.assert_allclose(full.interpolate(X), _dense_fit(X, y, full), atol=1e-9)
+
+    keep = rng.random(len(X)) > 0.3
+    masked = SpatioTemporalInterpolator(lambda_val=1e-2).fit(X[keep], y[keep])
+    assert masked.iterations > 0 and masked.relative_residual <= masked.tol
+    with pytest.warns(RuntimeWarning, match='Conjugate gradients stopped'):
+        capped = SpatioTemporalInterpolator(lambda_val=1e-2, max_iter=1).fit(X[keep], y[keep])
+    assert capped.iterations == 1 and capped.relative_residual > capped.tol
+    np.testing.assert_allclose(masked.interpolate(X[keep]), _dense_fit(X[keep], y[keep], masked), atol=1e-7)
+
+    # Two-column points are a single date
+    single = SpatioTemporalInterpolator().fit(X[:12, 1:], y[:12])
+    assert single.interpolate(X[:12, 1:]).shape == (12,)
+
+
+def test_windows_fill_gaps_better_than_single_dates():
+    truth = generate_yield_cube(n_dates=30, n_ratings=6, n_tenors=8, seed=3, missing_pattern='none', noise=0.0002)
+    gappy = generate_yield_cube(n_dates=30, n_ratings=6, n_tenors=8, seed=3, missing_pattern='runs',
+                                missing_fraction=0.2, noise=0.0002)
+    history = gappy.to_date_dataframes()
+    expected = truth.to_date_dataframes()
+
+    filled = list(SpatioTemporalInterpolator().fit_interpolate(history, window=8, overlap=3))
+    assert [date for date, _ in filled] == list(history)
+
+    joint_errors, single_errors = [], []
+    for date, surface in filled:
+        missing = history[date].isna().to_numpy()
+        assert not surface.isna().any().any()
+        np.testing.assert_array_equal(surface.to_numpy()[~missing], history[date].to_numpy()[~missing])
+        single = build_surface(history[date], ThinPlateSplineInterpolator)
+        joint_errors.append(surface.to_numpy()[missing] - expected[date].to_numpy()[missing])
+        single_errors.append(single.to_numpy()[missing] - expected[date].to_numpy()[missing])
+    rmse = lambda errors: np.sqrt(np.mean(np.concatenate(errors) ** 2))
+    assert rmse(joint_errors) < rmse(single_errors)
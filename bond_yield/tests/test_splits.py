@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from bond_yield.analysis.splits import kfold_split, mean_squared_error
+
+
+def test_kfold_split_partitions_samples():
+    folds = list(kfold_split(11, n_splits=3, shuffle=True, random_state=42))
+    assert [len(test) for _, test in folds] == [4, 4, 3]
+
+    all_test = np.concatenate([test for _, test in folds])
+    assert sorted(all_test) == list(range(11))
+    for train, test in folds:
+        assert set(train).isdisjoint(test)
+        assert len(train) + len(test) == 11
+
+
+def test_kfold_split_matches_seeded_permutation():
+    indices = np.arange(10)
+    np.random.RandomState(42).shuffle(indices)
+    first_train, first_test = next(kfold_split(10, n_splits=5, shuffle=True, random_state=42))
+    assert list(first_test) == sorted(indices[:2])
+
+
+def test_kfold_split_rejects_too_many_splits():
+    with pytest.raises(ValueError):
+        list(kfold_split(3, n_splits=5))
+
+
+def test_mean_squared_error():
+    assert mean_squared_error([1.0, 2.0, 3.0], [1.0, 2.0, 5.0]) == pytest.approx(4 / 3)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from bond_yield.data_processing.loader import load_bond_yields
+from bond_yield.data_processing.synthetic import (credit_rating_map, generate_yield_cube, make_rating_labels,
+                                                  write_synthetic_csv, write_synthetic_cube)
+
+
+def test_generator_is_seeded_and_shaped():
+    first = generate_yield_cube(n_dates=20, n_ratings=4, n_tenors=6, seed=7)
+    second = generate_yield_cube(n_dates=20, n_ratings=4, n_tenors=6, seed=7)
+
+    assert first.shape == (20, 4, 6)
+    # Ratings are sorted like the loaders sort them
+    assert first.ratings == ['A', 'AA', 'AAA', 'BBB']
+    assert first.tenors == [365, 730, 1095, 1460, 1825, 2190]
+    np.testing.assert_array_equal(first.values, second.values)
+
+
+@pytest.mark.parametrize('n_ratings', [6, 15])
+def test_surfaces_are_monotone_in_credit_order(n_ratings):
+    cube = generate_yield_cube(n_dates=50, n_ratings=n_ratings, n_tenors=8, missing_pattern='none', seed=1)
+    assert cube.ratings == sorted(make_rating_labels(n_ratings))
+    by_credit = [cube.ratings.index(rating) for rating in make_rating_labels(n_ratings)]
+    assert np.all(np.diff(cube.values[:, by_credit], axis=1) >= 0)
+    ranks = credit_rating_map(n_ratings)
+    assert [ranks[rating] for rating in make_rating_labels(n_ratings)] == list(range(1, n_ratings + 1))
+
+
+@pytest.mark.parametrize('pattern', ['random', 'runs', 'illiquid'])
+def test_missing_patterns_keep_minimum_quotes(pattern):
+    cube = generate_yield_cube(n_dates=200, n_ratings=5, n_tenors=10, missing_pattern=pattern,
+                               missing_fraction=0.3, min_quotes_per_rating=4, seed=3)
+    observed = ~np.isnan(cube.values)
+    assert 0.1 < 1 - observed.mean() < 0.4
+    assert observed.sum(axis=2).min() >= 4
+
+
+def test_writers_round_trip(tmp_path):
+    cube = write_synthetic_csv(tmp_path / 'history.csv', chunksize=4, n_dates=10, n_ratings=3, n_tenors=4, seed=2)
+    from_csv = load_bond_yields(tmp_path / 'history.csv')
+    assert list(from_csv[cube.dates[5]].index) == cube.ratings
+    np.testing.assert_allclose(from_csv[cube.dates[5]].to_numpy(), cube.values[5])
+
+    on_disk = write_synthetic_cube(tmp_path / 'cube', n_dates=10, n_ratings=3, n_tenors=4, seed=2)
+    np.testing.assert_array_equal(np.asarray(on_disk.values), cube.values)
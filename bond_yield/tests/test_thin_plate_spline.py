@@ -26,3 +26,84 @@ def test_2d_fit_and_interpolate():
     # Assert that the predicted values are close to the actual function values
     assert np.allclose(Z_predicted_reshaped, Z, atol=2e-1), "The interpolated values should closely match the actual function values."
 
+
+
+def _yearly_surface_points():
+    ratings, tenors = np.meshgrid(np.arange(1, 11), np.arange(1, 11), indexing='ij')
+    points = np.column_stack((ratings.ravel(), tenors.ravel())).astype(float)
+    values = 0.02 + 0.003 * points[:, 0] + 0.01 * np.log1p(points[:, 1]) + 0.001 * np.sin(points[:, 0] * points[:, 1])
+    observed = np.random.default_rng(0).random(len(points)) > 0.3
+    return points, values, observed
+
+
+def test_construct_M_matches_green_function():
+    points, _, _ = _yearly_surface_points()
+    tps = ThinPlateSplineInterpolator()
+    M = tps.construct_M(points[:12])
+    expected = np.array([[tps.compute_green_function(p[np.newaxis], q[np.newaxis])[0] for q in points[:12]]
+                         for p in points[:12]])
+    np.testing.assert_allclose(M, expected)
+
+
+def test_float32_solve_is_refined_to_float64_accuracy():
+    points, values, observed = _yearly_surface_points()
+    reference = ThinPlateSplineInterpolator()
+    reference.fit(points[observed], values[observed])
+    compact = ThinPlateSplineInterpolator(dtype=np.float32)
+    compact.fit(points[observed], values[observed])
+
+    assert compact.refined
+    np.testing.assert_allclose(compact.interpolate(points), reference.interpolate(points), rtol=0, atol=1e-10)
+
+
+def test_float32_solve_falls_back_when_ill_conditioned(monkeypatch):
+    points, values, observed = _yearly_surface_points()
+    points = points * [1, 365]  # tenors in days
+    reference = ThinPlateSplineInterpolator()
+    reference.fit(points[observed], values[observed])
+    compact = ThinPlateSplineInterpolator(dtype='float32')
+    # The condition estimate rules out a single-precision factorization before any is attempted
+    monkeypatch.setattr(compact, '_solve_mixed_precision', lambda *args: pytest.fail('float32 solve attempted'))
+    compact.fit(points[observed], values[observed])
+
+    assert compact.refined is False and compact.evaluation_dtype == np.float64
+    np.testing.assert_allclose(compact.interpolate(points), reference.interpolate(points), rtol=0, atol=1e-10)
+
+
+def test_analytic_derivatives_match_finite_differences():
+    points, values, observed = _yearly_surface_points()
+    tps = ThinPlateSplineInterpolator(lambda_val=0.01)
+    tps.fit(points[observed], values[observed])
+
+    # Off the training points, where the spline is smooth
+    X = np.random.default_rng(1).uniform(1.2, 9.8, (25, 2))
+    value, gradient, hessian = tps.interpolate_with_derivatives(X, order=2)
+    np.testing.assert_allclose(value, tps.interpolate(X)[:, 0], atol=1e-12)
+
+    h = 1e-4
+    for k in range(2):
+        step = np.zeros(2)
+        step[k] = h
+        up, down = tps.interpolate(X + step)[:, 0], tps.interpolate(X - step)[:, 0]
+        np.testing.assert_allclose(gradient[:, k], (up - down) / (2 * h), atol=1e-7)
+        gradient_up = tps.interpolate_with_derivatives(X + step)[1]
+        gradient_down = tps.interpolate_with_derivatives(X - step)[1]
+        np.testing.assert_allclose(hessian[:, :, k], (gradient_up - gradient_down) / (2 * h), atol=1e-6)
+    np.testing.assert_allclose(hessian, hessian.transpose(0, 2, 1))
+    assert len(tps.interpolate_with_derivatives(X, order=0)) == 1
+
+
+def test_linear_derivatives_are_segment_slopes():
+    from bond_yield.interpolators.linear import LinearInterpolator
+
+    X = np.array([[1, 365], [1, 730], [1, 1825], [2, 365], [2, 1825]], dtype=float)
+    y = np.array([0.02, 0.03, 0.033, 0.04, 0.046])
+    linear = LinearInterpolator()
+    linear.fit(X, y)
+
+    queries = np.array([[1, 500], [1, 730], [1, 3650], [2, 100], [3, 500]], dtype=float)
+    value, gradient, hessian = linear.interpolate_with_derivatives(queries, order=2)
+    np.testing.assert_allclose(value, linear.interpolate(queries))
+    np.testing.assert_allclose(gradient[:, 1], [0.01 / 365, 0.01 / 365, 0.003 / 1095, 0.006 / 1460, 0.0])
+    assert np.isnan(gradient[:, 0]).all()
+    assert (hessian[:, 1, 1] == 0).all() and np.isnan(hessian[:, 0, 1]).all()
@@ -0,0 +1,38 @@
+import pathlib
+import numpy as np
+from bond_yield.analysis.tournament import Candidate, parse_candidate, prepare_history, run_tournament
+from bond_yield.data_processing.loader import load_bond_yields
+
+CSV_PATH = pathlib.Path(__file__).parent / 'sample_historical_bond_yields.csv'
+
+
+def test_parse_candidate():
+    candidate = parse_candidate('tps:lambda_val=0.05,dtype=float32')
+    assert candidate.name == 'tps'
+    assert candidate.params == {'lambda_val': 0.05, 'dtype': 'float32'}
+    assert candidate.label == 'tps dtype=float32 lambda_val=0.05'
+
+
+def test_prepare_history_keeps_observed_points_only():
+    history = load_bond_yields(str(CSV_PATH), end_date='2023-01-03')
+    prepared = prepare_history(history, n_splits=3)
+
+    assert [item['date'] for item in prepared] == list(history.keys())
+    for item, df in zip(prepared, history.values()):
+        assert len(item['y']) == df.notna().to_numpy().sum()
+        assert not np.isnan(item['y']).any()
+        assert len(item['folds']) == 3
+
+
+def test_tournament_leaderboard_is_the_same_in_parallel():
+    history = load_bond_yields(str(CSV_PATH), end_date='2023-01-06')
+    candidates = ['tps', Candidate('tps', {'lambda_val': 1.0}), 'linear']
+
+    serial = run_tournament(history, candidates, n_splits=3)
+    parallel = run_tournament(history, candidates, n_splits=3, workers=2, chunk_size=2)
+
+    assert [row['candidate'] for row in serial] == [row['candidate'] for row in parallel]
+    np.testing.assert_allclose([row['mse'] for row in serial], [row['mse'] for row in parallel])
+    assert serial == sorted(serial, key=lambda row: row['mse'])
+    assert any(row['pareto'] for row in serial)
+    assert all(row['folds'] + row['failures'] == 3 * len(history) for row in serial)
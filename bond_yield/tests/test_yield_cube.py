@@ -0,0 +1,65 @@
+import pathlib
+import numpy as np
+import pandas as pd
+from bond_yield.data_processing.loader import load_bond_yields
+from bond_yield.data_processing.yield_cube import csv_to_cube, cube_to_csv, load_yield_cube, YieldCube
+
+CSV_PATH = pathlib.Path(__file__).parent / 'sample_historical_bond_yields.csv'
+
+
+def test_csv_to_cube_matches_csv_loader(tmp_path):
+    cube = csv_to_cube(CSV_PATH, tmp_path / 'cube', chunksize=7)
+
+    assert isinstance(cube.values, np.memmap)
+    assert cube.shape == (30, 10, 10)
+
+    from_csv = load_bond_yields(str(CSV_PATH))
+    from_cube = load_bond_yields(tmp_path / 'cube')
+    assert list(from_csv.keys()) == list(from_cube.keys())
+    for date, df in from_csv.items():
+        pd.testing.assert_frame_equal(df, from_cube[date])
+
+
+def test_cube_round_trip_to_csv(tmp_path):
+    csv_to_cube(CSV_PATH, tmp_path / 'cube')
+    cube_to_csv(tmp_path / 'cube', tmp_path / 'round_trip.csv', chunksize=4)
+
+    original = pd.read_csv(CSV_PATH, index_col=0)
+    round_trip = pd.read_csv(tmp_path / 'round_trip.csv', index_col=0)
+    pd.testing.assert_frame_equal(original.sort_index(axis=1), round_trip.sort_index(axis=1))
+
+
+def test_date_range_slicing(tmp_path):
+    csv_to_cube(CSV_PATH, tmp_path / 'cube')
+
+    cube = load_yield_cube(tmp_path / 'cube', start_date='2023-01-05', end_date='2023-01-09')
+    assert list(cube.dates) == ['2023-01-05', '2023-01-06', '2023-01-07', '2023-01-08', '2023-01-09']
+
+    subset = load_bond_yields(tmp_path / 'cube', start_date='2023-01-28')
+    assert list(subset.keys()) == ['2023-01-28', '2023-01-29', '2023-01-30']
+    assert list(load_bond_yields(str(CSV_PATH), start_date='2023-01-28').keys()) == list(subset.keys())
+
+
+def test_unsorted_csv_is_sorted_in_cube(tmp_path):
+    wide = pd.read_csv(CSV_PATH, index_col=0)
+    wide.iloc[::-1].to_csv(tmp_path / 'reversed.csv')
+
+    cube = csv_to_cube(tmp_path / 'reversed.csv', tmp_path / 'cube', chunksize=8)
+    assert list(cube.dates) == sorted(wide.index)
+    csv_to_cube(CSV_PATH, tmp_path / 'reference')
+    reference = YieldCube.open(tmp_path / 'reference')
+    np.testing.assert_array_equal(np.asarray(cube.values), np.asarray(reference.values))
+
+
+def test_to_observations_uses_compact_codes(tmp_path):
+    cube = csv_to_cube(CSV_PATH, tmp_path / 'cube')
+    observations = cube.to_observations(chunksize=7)
+
+    assert observations['rating_code'].dtype == np.int8
+    assert observations['tenor_code'].dtype == np.int8
+    assert observations['yield'].dtype == np.float32
+    values = np.asarray(cube.values)
+    assert len(observations['yield']) == np.count_nonzero(~np.isnan(values))
+    np.testing.assert_allclose(
+        observations['yield'],
+        values[observations['date_code'], observations['rating_code'], observations['tenor_code']], rtol=1e-6)
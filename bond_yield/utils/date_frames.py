@@ -0,0 +1,10 @@
+from collections.abc import Mapping
+
+
+def iter_date_frames(date_dataframes):
+    """
+    Iterate over (date, DataFrame) pairs from a dict or from a lazy source such as `iter_bond_yields`.
+    """
+    if isinstance(date_dataframes, Mapping):
+        return iter(date_dataframes.items())
+    return iter(date_dataframes)
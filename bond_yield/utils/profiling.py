@@ -0,0 +1,252 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+# The active recorder. While it is None every hook returns immediately, so the
+# instrumentation left in the hot paths costs one global lookup per call.
+_recorder = None
+
+
+class BaseRecorder(ABC):
+    """
+    Destination for timing spans and counters emitted by the instrumented code.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def record_span(self, name, start, duration, attributes):
+        """
+        Record a finished span.
+
+        Parameters:
+        - name: str, Span name, e.g. 'tps.solve'.
+        - start: float, `time.perf_counter()` at entry, in seconds.
+        - duration: float, Elapsed time in seconds.
+        - attributes: dict, Extra key/value pairs given when the span was opened.
+        """
+        pass
+
+    @abstractmethod
+    def record_count(self, name, value):
+        """
+        Add `value` to the counter `name`.
+        """
+        pass
+
+    def close(self):
+        """
+        Flush any buffered output.
+        """
+        pass
+
+
+class AggregateRecorder(BaseRecorder):
+    """
+    Keep per-span call counts and total/min/max durations, plus counter totals, in memory.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.spans = {}
+        self.counters = {}
+
+    def record_span(self, name, start, duration, attributes):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                self.spans[name] = {'calls': 1, 'total': duration, 'min': duration, 'max': duration}
+            else:
+                stats['calls'] += 1
+                stats['total'] += duration
+                stats['min'] = min(stats['min'], duration)
+                stats['max'] = max(stats['max'], duration)
+
+    def record_count(self, name, value):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        """
+        Returns:
+        - dict: {'spans': {name: stats}, 'counters': {name: total}} with spans sorted by total time.
+        """
+        spans = sorted(self.spans.items(), key=lambda item: item[1]['total'], reverse=True)
+        return {'spans': dict(spans), 'counters': dict(sorted(self.counters.items()))}
+
+    def report(self):
+        """
+        Format the summary as a plain-text table.
+        """
+        summary = self.summary()
+        lines = [f"{'span':36s} {'calls':>8s} {'total s':>10s} {'mean ms':>10s} {'max ms':>10s}"]
+        for name, stats in summary['spans'].items():
+            lines.append(f"{name:36s} {stats['calls']:8d} {stats['total']:10.4f} "
+                         f"{1000 * stats['total'] / stats['calls']:10.3f} {1000 * stats['max']:10.3f}")
+        for name, value in summary['counters'].items():
+            lines.append(f"{name:36s} {value:>8}")
+        return '\n'.join(lines)
+
+
+class JsonLinesRecorder(BaseRecorder):
+    """
+    Append one JSON object per span or counter update to a file.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.file = open(path, 'a')
+
+    def _write(self, event):
+        with self._lock:
+            self.file.write(json.dumps(event) + '\n')
+
+    def record_span(self, name, start, duration, attributes):
+        self._write({'type': 'span', 'name': name, 'start': start, 'duration': duration,
+                     'thread': threading.get_ident(), 'attributes': attributes})
+
+    def record_count(self, name, value):
+        self._write({'type': 'count', 'name': name, 'value': value, 'time': time.perf_counter()})
+
+    def close(self):
+        with self._lock:
+            self.file.close()
+
+
+class ChromeTraceRecorder(BaseRecorder):
+    """
+    Collect spans as Chrome trace events and write them on `close`, for chrome://tracing or Perfetto.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.events = []
+        self.counters = {}
+
+    def record_span(self, name, start, duration, attributes):
+        with self._lock:
+            self.events.append({'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6,
+                                'pid': os.getpid(), 'tid': threading.get_ident(), 'args': attributes})
+
+    def record_count(self, name, value):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            self.events.append({'name': name, 'ph': 'C', 'ts': time.perf_counter() * 1e6,
+                                'pid': os.getpid(), 'args': {name: self.counters[name]}})
+
+    def close(self):
+        with self._lock:
+            with open(self.path, 'w') as file:
+                json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, file)
+
+
+class FanOutRecorder(BaseRecorder):
+    """
+    Forward every span and counter to several recorders.
+    """
+
+    def __init__(self, recorders):
+        super().__init__()
+        self.recorders = list(recorders)
+
+    def record_span(self, name, start, duration, attributes):
+        for recorder in self.recorders:
+            recorder.record_span(name, start, duration, attributes)
+
+    def record_count(self, name, value):
+        for recorder in self.recorders:
+            recorder.record_count(name, value)
+
+    def close(self):
+        for recorder in self.recorders:
+            recorder.close()
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('recorder', 'name', 'attributes', 'start')
+
+    def __init__(self, recorder, name, attributes):
+        self.recorder = recorder
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.recorder.record_span(self.name, self.start, time.perf_counter() - self.start, self.attributes)
+        return False
+
+
+def span(name, **attributes):
+    """
+    Time a block of code under `name` when a recorder is active.
+
+    Usage:
+        with span('tps.solve', n=len(y)):
+            ...
+    """
+    if _recorder is None:
+        return _NULL_SPAN
+    return _Span(_recorder, name, attributes)
+
+
+def count(name, value=1):
+    """
+    Add `value` to the counter `name` when a recorder is active.
+    """
+    if _recorder is not None:
+        _recorder.record_count(name, value)
+
+
+def get_recorder():
+    return _recorder
+
+
+def set_recorder(recorder):
+    """
+    Install `recorder` (or None to disable profiling) and return the previous one.
+    """
+    global _recorder
+    previous = _recorder
+    _recorder = recorder
+    return previous
+
+
+@contextmanager
+def recording(recorder):
+    """
+    Activate `recorder` for the duration of a with-block, then close it and restore the previous one.
+    """
+    previous = set_recorder(recorder)
+    try:
+        yield recorder
+    finally:
+        set_recorder(previous)
+        recorder.close()
+
+
+def recorder_for_path(path):
+    """
+    Pick a file recorder from the file name: '.jsonl' gives JSON lines, anything else a Chrome trace.
+    """
+    if str(path).endswith('.jsonl'):
+        return JsonLinesRecorder(path)
+    return ChromeTraceRecorder(path)
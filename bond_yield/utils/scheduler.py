@@ -0,0 +1,205 @@
+import heapq
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Prior cost in seconds of one fit as c0 + c1 * m + c2 * m^2 + c3 * m^3 with m = points / 100,
+# used until enough timings are recorded for an interpolator
+INTERPOLATOR_PRIORS = {
+    'tps': (2e-4, 1e-4, 1e-3, 5e-3),
+    'linear': (1e-3, 1e-3, 0.0, 0.0),
+    'spatiotemporal': (2e-3, 5e-3, 5e-3, 0.0),
+}
+DEFAULT_PRIOR = (1e-3, 1e-3, 1e-3, 0.0)
+# Extra prior cost of deriving the rating scale of a date
+OPTIMIZER_PRIORS = {
+    'ordinal': (0.0, 0.0, 0.0, 0.0),
+    'yield': (1e-4, 1e-4, 0.0, 0.0),
+    'slope': (5e-3, 5e-3, 1e-3, 0.0),
+}
+# Points are scaled by this before taking powers, which keeps the least squares well conditioned
+_POINT_SCALE = 100.0
+
+
+def cost_features(points):
+    """
+    Features of the cost of one fit on `points` points.
+
+    Returns:
+    - np.ndarray of shape (..., 4): [1, m, m^2, m^3] with m = points / 100.
+    """
+    m = np.asarray(points, dtype=float)[..., np.newaxis] / _POINT_SCALE
+    return m ** np.arange(4)
+
+
+class CostModel:
+    """
+    Predicts the seconds a task takes from its point count, interpolator and optimizer, and
+    learns from recorded timings.
+
+    Each (interpolator, optimizer) pair has a nonnegative cubic in the point count. It starts
+    from built-in priors and, once `min_samples` timings are recorded, is refitted by
+    nonnegative least squares on them. Timings of tasks covering several dates are recorded
+    with the summed features of their dates, so they can be learned from as well.
+    Cross-validation tasks use the optimizer 'cv<k>': k fits per date.
+    """
+
+    def __init__(self, path=None, min_samples=8, max_samples=1000):
+        """
+        Parameters:
+        - path: str or Path, optional, JSON file the timings are loaded from and saved to.
+        - min_samples: int, Timings needed before the priors of a pair are replaced.
+        - max_samples: int, Most recent timings kept per pair.
+        """
+        self.path = Path(path) if path is not None else None
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.samples = {}
+        self._coefficients = {}
+        if self.path is not None and self.path.exists():
+            with open(self.path) as file:
+                stored = json.load(file)
+            self.samples = {key: [tuple(sample) for sample in samples]
+                            for key, samples in stored.get('samples', {}).items()}
+
+    @staticmethod
+    def key(interpolator, optimizer='ordinal'):
+        return f'{interpolator}/{optimizer}'
+
+    @staticmethod
+    def prior(interpolator, optimizer='ordinal'):
+        fits = 1
+        if optimizer.startswith('cv'):
+            fits, optimizer = int(optimizer[2:] or 1), 'ordinal'
+        prior = np.asarray(INTERPOLATOR_PRIORS.get(interpolator, DEFAULT_PRIOR)) * fits
+        return prior + np.asarray(OPTIMIZER_PRIORS.get(optimizer, OPTIMIZER_PRIORS['ordinal']))
+
+    def coefficients(self, interpolator, optimizer='ordinal'):
+        """
+        Returns:
+        - np.ndarray: The four cost coefficients currently used for the pair.
+        """
+        key = self.key(interpolator, optimizer)
+        if key not in self._coefficients:
+            samples = self.samples.get(key, [])
+            if len(samples) < self.min_samples:
+                self._coefficients[key] = self.prior(interpolator, optimizer)
+            else:
+                # scipy.optimize is slow to import, so it is only loaded once timings are fitted
+                from scipy.optimize import nnls
+                features = np.array([sample[:4] for sample in samples])
+                seconds = np.array([sample[4] for sample in samples])
+                # Relative errors matter, so every sample is weighted by its inverse duration
+                weights = 1 / np.maximum(seconds, 1e-6)
+                self._coefficients[key] = nnls(features * weights[:, None], seconds * weights)[0]
+        return self._coefficients[key]
+
+    def predict(self, interpolator, points, optimizer='ordinal'):
+        """
+        Predicted seconds of one fit per entry of `points`.
+        """
+        return cost_features(points) @ self.coefficients(interpolator, optimizer)
+
+    def observe(self, interpolator, points, seconds, optimizer='ordinal'):
+        """
+        Record the duration of a task fitting one date per entry of `points`.
+        """
+        features = cost_features(np.atleast_1d(points)).sum(axis=0)
+        key = self.key(interpolator, optimizer)
+        samples = self.samples.setdefault(key, [])
+        samples.append(tuple(float(value) for value in features) + (float(seconds),))
+        del samples[:-self.max_samples]
+        self._coefficients.pop(key, None)
+
+    def save(self, path=None):
+        path = Path(path) if path is not None else self.path
+        if path is None:
+            raise ValueError("No path to save the cost model to.")
+        with open(path, 'w') as file:
+            json.dump({'version': 1, 'samples': self.samples}, file)
+
+
+def pack_longest_first(costs, n_bins):
+    """
+    Pack tasks into bins of similar total cost: tasks are taken longest first and each goes
+    to the currently lightest bin.
+
+    Parameters:
+    - costs: array-like, Predicted cost of each task.
+    - n_bins: int, Number of bins.
+
+    Returns:
+    - list of (predicted cost, list of task indices): Non-empty bins, heaviest first; each
+      bin lists its tasks in their original order.
+    """
+    costs = np.asarray(costs, dtype=float)
+    n_bins = max(1, min(n_bins, len(costs)))
+    heap = [(0.0, b) for b in range(n_bins)]
+    bins = [[] for _ in range(n_bins)]
+    for task in np.argsort(-costs, kind='stable'):
+        load, b = heapq.heappop(heap)
+        bins[b].append(int(task))
+        heapq.heappush(heap, (load + costs[task], b))
+    loads = {b: load for load, b in heap}
+    packed = [(loads[b], sorted(tasks)) for b, tasks in enumerate(bins) if tasks]
+    packed.sort(key=lambda item: -item[0])
+    return packed
+
+
+def timed_call(function, *args):
+    """
+    Worker entry point: run `function(*args)` and return it with when and where it ran.
+
+    Returns:
+    - tuple: (result, {'pid', 'start', 'end'}) with wall-clock start and end times.
+    """
+    start = time.time()
+    result = function(*args)
+    return result, {'pid': os.getpid(), 'start': start, 'end': time.time()}
+
+
+def utilization_report(records, workers, predicted_seconds=None):
+    """
+    Summarize how busy a worker pool was from the timing records of its tasks.
+
+    Parameters:
+    - records: list of dict, {'pid', 'start', 'end'} per task, as returned by `timed_call`.
+    - workers: int, Size of the pool.
+    - predicted_seconds: float, optional, Total predicted task seconds.
+
+    Returns:
+    - dict: Tasks, wall time from the first start to the last end, busy time, utilization
+            (busy / (workers * wall)), straggler time (from the moment the first worker ran
+            out of tasks to the end of the run) and the predicted total when given.
+    """
+    if not records:
+        return {'tasks': 0, 'workers': workers, 'wall_seconds': 0.0, 'busy_seconds': 0.0, 'utilization': None,
+                'straggler_seconds': 0.0, 'predicted_seconds': predicted_seconds}
+    first_start = min(record['start'] for record in records)
+    last_end = max(record['end'] for record in records)
+    busy = sum(record['end'] - record['start'] for record in records)
+    worker_ends = {}
+    for record in records:
+        worker_ends[record['pid']] = max(worker_ends.get(record['pid'], 0.0), record['end'])
+    # Workers that never got a task were idle from the start
+    first_idle = first_start if len(worker_ends) < workers else min(worker_ends.values())
+    wall = last_end - first_start
+    return {
+        'tasks': len(records),
+        'workers': workers,
+        'wall_seconds': wall,
+        'busy_seconds': busy,
+        'utilization': busy / (workers * wall) if wall > 0 else None,
+        'straggler_seconds': last_end - first_idle,
+        'predicted_seconds': predicted_seconds,
+    }
+
+
+def format_utilization(report):
+    utilization = report['utilization']
+    return (f"{report['tasks']} tasks on {report['workers']} workers in {report['wall_seconds']:.2f}s: "
+            f"{'n/a' if utilization is None else f'{100 * utilization:.0f}%'} utilization, "
+            f"{report['straggler_seconds']:.2f}s straggler time")
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def hash_config(config):
+    """
+    Hash a JSON-serialisable configuration dictionary.
+
+    Returns:
+    - str: Hex digest that is independent of the dictionary's key order.
+    """
+    payload = json.dumps(config, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+def hash_surface_input(df, config):
+    """
+    Content hash of one date's input DataFrame together with the processing configuration.
+
+    Parameters:
+    - df: DataFrame, Input yields of one date (ratings x tenors, NaN for missing quotes).
+    - config: dict, Configuration the surface is built with.
+
+    Returns:
+    - str: Hex digest used as the store key.
+    """
+    digest = hashlib.sha256()
+    digest.update(hash_config(config).encode('utf-8'))
+    digest.update(json.dumps([str(label) for label in df.index]).encode('utf-8'))
+    digest.update(json.dumps([str(label) for label in df.columns]).encode('utf-8'))
+    values = np.ascontiguousarray(df.to_numpy(dtype=float))
+    # All NaN payloads hash the same
+    values = np.where(np.isnan(values), np.nan, values)
+    digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+class SurfaceStore:
+    """
+    Local content-addressed store of fitted surfaces and the scales they were built with.
+
+    Objects live under `objects/<key[:2]>/<key>.npz`, keyed by `hash_surface_input`. For
+    every configuration an index under `index/<config hash>.json` records which key each
+    date was last built from, which is how new and changed dates are detected.
+    """
+
+    def __init__(self, root):
+        """
+        Parameters:
+        - root: str or Path, Directory of the store, created if needed.
+        """
+        self.root = Path(root)
+        (self.root / 'objects').mkdir(parents=True, exist_ok=True)
+        (self.root / 'index').mkdir(parents=True, exist_ok=True)
+
+    def _object_path(self, key):
+        return self.root / 'objects' / key[:2] / f'{key}.npz'
+
+    def _index_path(self, config_hash):
+        return self.root / 'index' / f'{config_hash}.json'
+
+    def __contains__(self, key):
+        return self._object_path(key).exists()
+
+    def put(self, key, surface, rating_scale=None, tenor_scale=None):
+        """
+        Store a fitted surface under `key`.
+
+        Parameters:
+        - key: str, Key from `hash_surface_input`.
+        - surface: DataFrame, Filled surface.
+        - rating_scale: dict, optional, Rating label -> numerical value used for the fit.
+        - tenor_scale: dict, optional, Tenor label -> numerical value used for the fit.
+        """
+        path = self._object_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        scales = {
+            'rating_scale': _scale_to_pairs(rating_scale),
+            'tenor_scale': _scale_to_pairs(tenor_scale),
+        }
+        temporary_path = path.with_suffix('.tmp.npz')
+        np.savez(temporary_path,
+                 values=surface.to_numpy(dtype=float),
+                 index=np.asarray([str(label) for label in surface.index]),
+                 columns=np.asarray([str(label) for label in surface.columns]),
+                 scales=np.asarray(json.dumps(scales)))
+        # Readers never see a partially written object
+        os.replace(temporary_path, path)
+
+    def get(self, key):
+        """
+        Load a stored surface.
+
+        Returns:
+        - dict or None: {'surface': DataFrame, 'rating_scale': dict or None, 'tenor_scale': dict or None},
+                        or None if the key is not in the store.
+        """
+        path = self._object_path(key)
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            surface = pd.DataFrame(data['values'], index=data['index'], columns=data['columns'])
+            scales = json.loads(str(data['scales']))
+        return {
+            'surface': surface,
+            'rating_scale': _pairs_to_scale(scales['rating_scale']),
+            'tenor_scale': _pairs_to_scale(scales['tenor_scale']),
+        }
+
+    def read_index(self, config_hash):
+        """
+        Return the date -> key index recorded for a configuration.
+        """
+        path = self._index_path(config_hash)
+        if not path.exists():
+            return {}
+        with open(path, 'r') as file:
+            return json.load(file)
+
+    def write_index(self, config_hash, index):
+        """
+        Atomically replace the date -> key index of a configuration.
+        """
+        path = self._index_path(config_hash)
+        temporary_path = path.with_suffix('.tmp')
+        with open(temporary_path, 'w') as file:
+            json.dump(index, file, sort_keys=True)
+        os.replace(temporary_path, path)
+
+
+def _scale_to_pairs(scale):
+    if scale is None:
+        return None
+    return [[str(label), float(value)] for label, value in scale.items()]
+
+
+def _pairs_to_scale(pairs):
+    if pairs is None:
+        return None
+    return {label: value for label, value in pairs}
@@ -5,11 +5,14 @@ setup(
     version='0.1.0',
     packages=find_packages(),
     install_requires=[
-        # List your project dependencies here
-        # 'numpy',
-        # 'pandas',
-        # 'scipy',
-        # ...
+        'numpy',
+        'pandas',
+        'scipy',
+        'pyyaml',
     ],
-    # Add other package data, entry points, classifiers...
+    entry_points={
+        'console_scripts': [
+            'bond-yield=bond_yield.cli:main',
+        ],
+    },
 )